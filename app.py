@@ -2,22 +2,87 @@
 Flask 웹 애플리케이션
 가격 오라클 대시보드를 제공합니다.
 """
-from flask import Flask, render_template, jsonify, request
+import os
+
+# 서빙 동시성 모드 (예: ORACLE_ROLE=web ORACLE_ASYNC_MODE=gevent)
+# - threading: 클라이언트당 OS 스레드, Werkzeug 서버 (기본값)
+# - eventlet, gevent: 그린 스레드로 수천 개의 Socket.IO/API 연결 처리 (pip install eventlet 또는 gevent)
+#   다른 모듈보다 먼저 몽키 패치해야 하며, 수집 루프는 실제 스레드의 asyncio 이벤트 루프를 쓰므로
+#   수집/계산이 없는 web 역할에서만 사용할 수 있습니다.
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+ASYNC_MODE = os.environ.get('ORACLE_ASYNC_MODE', 'threading')
+if ASYNC_MODE not in ASYNC_MODES:
+    raise ValueError(f"ORACLE_ASYNC_MODE는 {ASYNC_MODES} 중 하나여야 합니다")
+if ASYNC_MODE != 'threading' and os.environ.get('ORACLE_ROLE', 'all') != 'web':
+    raise ValueError(f"ORACLE_ASYNC_MODE={ASYNC_MODE}는 ORACLE_ROLE=web에서만 사용할 수 있습니다")
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import threading
 import time
+from collections import deque
 from datetime import datetime
+from typing import Optional
 from price_fetcher import PriceFetcher
 from oracle import Oracle
+from asset_matrix import parse_symbols
+from recompute_scheduler import RecomputeScheduler
+from ring_buffer import ColumnarRingBuffer
+from rollup import RollupHistory
+from tick_log import TickLog, restore_from_tick_log
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS
+from payload_codec import (
+    CONTENT_TYPES, CodecStats, EncodedPayload, JsonModule,
+    ORJSON_AVAILABLE, available_codecs, available_encodings, decode_payload, encode_json, negotiate_codec,
+    negotiate_encoding,
+)
+from shared_snapshot import CONTROL_AVAILABLE, ControlListener, SnapshotReader, SnapshotWriter, send_control
+from broadcaster import Broadcaster
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# 미리 인코딩하지 않은 이벤트도 orjson으로 인코딩 (없으면 표준 json)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, json=JsonModule)
+
+# 다중 자산 심볼 유니버스 (예: ORACLE_SYMBOLS=ETH,BTC,XRP,SOL)
+ASSET_SYMBOLS = parse_symbols(os.environ.get('ORACLE_SYMBOLS'))
+
+# 갱신되지 않은 채 이 시간(초)보다 오래된 소스는 오라클 입력에서 제외 (예: ORACLE_MAX_SOURCE_AGE=30)
+MAX_SOURCE_AGE = float(os.environ.get('ORACLE_MAX_SOURCE_AGE', 30))
+
+# ETH 소스 가격 산출 방식: last(체결가), mid, microprice, depth (예: ORACLE_PRICING=microprice)
+PRICING = os.environ.get('ORACLE_PRICING', 'last')
+
+# 실행 역할 (예: ORACLE_ROLE=collector 프로세스 하나 + ORACLE_ROLE=web 프로세스 여러 개)
+# - all: 수집, 오라클 계산, 서빙을 한 프로세스에서 (기본값)
+# - collector: 수집과 오라클 계산만 하고 틱마다 공유 메모리에 게시 (웹 서버 없음)
+# - web: 수집기가 공유 메모리에 게시한 스냅샷만 읽어 서빙 (수집/계산 없음, GIL을 수집기와 나누지 않음)
+ROLES = ('all', 'collector', 'web')
+ROLE = os.environ.get('ORACLE_ROLE', 'all')
+if ROLE not in ROLES:
+    raise ValueError(f"ORACLE_ROLE은 {ROLES} 중 하나여야 합니다")
+SHM_NAME = os.environ.get('ORACLE_SHM_NAME', 'oracle_snapshot')  # collector와 web이 같은 이름 사용
+PORT = int(os.environ.get('ORACLE_PORT', 5100))
 
-# 전역 변수
-price_fetcher = PriceFetcher()
-oracle = Oracle(twap_window_seconds=300, volatility_threshold=0.05)
+# 전역 변수 (web 역할에서는 수집기 프로세스가 소유)
+if ROLE == 'web':
+    price_fetcher = None
+    oracle = None
+    recompute_scheduler = None
+else:
+    price_fetcher = PriceFetcher(symbols=ASSET_SYMBOLS, max_source_age=MAX_SOURCE_AGE, pricing=PRICING)
+    oracle = Oracle(twap_window_seconds=300, volatility_threshold=0.05)
+
+    # 틱 기반 재계산 스케줄러 (버스트 병합: 50ms 정숙 구간, 최대 200ms 지연)
+    recompute_scheduler = RecomputeScheduler(min_interval=0.05, max_delay=0.2, heartbeat_interval=5.0)
+    price_fetcher.add_tick_listener(lambda cache_key, price, timestamp: recompute_scheduler.notify(cache_key))
 
 # 최신 데이터 저장
 latest_data = {
@@ -26,30 +91,581 @@ latest_data = {
     'timestamp': None,
 }
 
+# 최신 다중 자산 결과 (심볼별 KRW 중앙값)
+latest_assets = None
+
 # 가격 히스토리 (차트용, 시간 기반으로 관리)
-price_history = {
-    'timestamps': [],
-    'median_prices': [],
-    'upbit_eth_krw': [],
-    'upbit_usdt_krw': [],
-    'max_points': 10000,  # 충분히 큰 값으로 설정 (실제로는 시간 기반으로 필터링)
-    'max_hours': 24,  # 최대 24시간 데이터 보관
+# 고정 용량 컬럼형 링 버퍼, 타임스탬프는 epoch 초 (float)
+HISTORY_SERIES = ('timestamps', 'median_prices', 'upbit_eth_krw', 'upbit_usdt_krw')
+HISTORY_MAX_POINTS = 10000  # 최대 포인트 수 (메모리 상한: 10000 × 4컬럼 × 8바이트 = 320KB)
+HISTORY_MAX_HOURS = 24  # 최대 24시간 데이터 보관
+
+# 공유 메모리 스냅샷 (collector 역할은 게시, web 역할은 follow_collector()에서 연결)
+# collector의 price_history는 공유 메모리 구간을 그대로 사용하므로 웹 워커가 복사 없이 읽을 수 있음
+snapshot_writer = SnapshotWriter(SHM_NAME, HISTORY_SERIES, HISTORY_MAX_POINTS) if ROLE == 'collector' else None
+# 웹 워커의 수동 가격 요청은 공유 메모리가 아닌 수집기 소유 소켓으로 받아 공유 메모리 쓰기는 수집기만 함
+control_listener = ControlListener(SHM_NAME) if ROLE == 'collector' and CONTROL_AVAILABLE else None
+snapshot_reader = None
+SHARED_STATUS_INTERVAL = 1.0  # 수집기 통계(상태 데이터) 게시 주기 (초)
+SHARED_CONTROL_INTERVAL = 0.5  # collector: 제어 소켓 대기 시간 (초, 종료 확인 주기)
+SHARED_POLL_INTERVAL = 0.005  # web: 공유 메모리 버전 확인 주기 (초)
+SHARED_STALE_SECONDS = 15.0  # web: 이 시간 동안 게시가 없으면 수집기 재시작으로 보고 다시 연결 (하트비트 5초)
+shared_status = {}  # web: 수집기가 게시한 통계 {'symbols', 'ingest', 'health', 'books', 'scheduler', 'metrics', 'manual'}
+shared_status_at = 0.0  # collector: 마지막 상태 데이터 게시 시각
+
+if snapshot_writer is not None:
+    price_history = snapshot_writer.history
+else:
+    price_history = ColumnarRingBuffer(HISTORY_SERIES, capacity=HISTORY_MAX_POINTS)
+
+# 다중 해상도 롤업 (1초/10초/1분/5분 OHLC·평균, price_history와 함께 증분 갱신)
+rollup_history = RollupHistory()
+HISTORY_MAX_BUCKETS = 2000  # /api/history 응답의 최대 버킷 수 (resolution=auto 기준)
+
+# 영속 틱 로그 (거래소 원본 가격 + 오라클 출력, 재시작 시 TWAP/차트 히스토리 복원용)
+TICK_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ticks')
+tick_log = TickLog(
+    TICK_LOG_DIR,
+    segment_seconds=3600,  # 1시간 단위 세그먼트
+    retention_seconds=HISTORY_MAX_HOURS * 3600,
+    fsync='interval',
+    fsync_interval=1.0,
+)
+if price_fetcher is not None:
+    price_fetcher.add_tick_listener(
+        lambda cache_key, price, timestamp: tick_log.append_source(cache_key, price, exchange_timestamp=timestamp)
+    )
+
+# 히스토리 동기화 프로토콜
+# - 'full': 매 틱마다 전체 price_history 전송 (기존 클라이언트 호환)
+# - 'delta': 연결 시 전체 스냅샷 1회, 이후 새로 추가된 포인트와 제거된 개수만 전송
+history_seq = 0  # 틱 메시지 시퀀스 번호 (delta 클라이언트의 누락 감지용, 소켓 연결별이므로 워커마다 따로 셈)
+client_history_modes = {}  # {sid: 'full' | 'delta'}
+# /api/data 버전: web 역할은 수집기가 게시한 틱 시퀀스를 그대로 써서 로드 밸런서 뒤의 모든 워커가 같은 값으로 응답
+# (계산하는 프로세스는 재시작해도 버전이 줄어들지 않도록 시작 값을 밀리초 시각으로, 틱은 초당 1000개보다 훨씬 적음)
+if ROLE != 'web':
+    history_seq = int(time.time() * 1000)
+data_version = history_seq
+# 최근 변경분 [(버전, 기준 버전, history_seq, 변경분)]: /api/data?history=delta 롱 폴링과 밀린 소켓 클라이언트에
+# 그 사이에 쌓인 틱을 합쳐서 전송 (남아 있지 않으면 스냅샷)
+HISTORY_DELTA_LOG_SIZE = 256
+history_delta_log = deque(maxlen=HISTORY_DELTA_LOG_SIZE)
+
+# 페이로드 코덱 (auth={'codec': 'json' | 'msgpack'}로 협상, 틱마다 코덱별 1회 인코딩)
+# 코덱을 지정하지 않은 클라이언트는 기존처럼 객체로 받음 (Socket.IO가 인코딩)
+client_codecs = {}  # {sid: 'json' | 'msgpack' | None}
+
+# 토픽 구독 (auth={'topics': [...]} 또는 subscribe 이벤트, price_update 대신 topic_update로 필요한 스트림만 수신)
+# - 'median': 중앙값과 계산 방식, 'venues': 거래소별 원본 가격, 'volatility': 변동성/TWAP 상태
+# - 'history:raw': 히스토리 변경분 (seq 누락 시 다시 구독하면 스냅샷 재전송)
+# - 'history:<해상도>': 롤업 현재 버킷 (1, 10, 60, 300초)
+# 토픽 × 코덱마다 틱당 한 번 인코딩해 해당 방에만 전송하고, 구독 직후에는 현재 상태를 한 번 보냅니다.
+TOPIC_FIELDS = {
+    'median': ('median_price', 'calculation_method', 'usdt_krw_used', 'max_source_age'),
+    'venues': ('price_details', 'source_ages'),
+    'volatility': ('is_volatile', 'twap', 'usdt_krw_original', 'inverse_usdt_krw', 'calculation_method'),
 }
+HISTORY_TOPIC_PREFIX = 'history:'
+client_topics = {}  # {sid: set(토픽)}
+codec_stats = CodecStats()
+api_data_cache = {'seq': None, 'payloads': {}}  # /api/data 응답 {히스토리 포함 여부: 페이로드} (다음 틱까지 재사용)
+api_data_lock = threading.Lock()
+
+# /api/data 롱 폴링 (?since=<version>, 버전은 data_version)
+API_DATA_POLL_TIMEOUT = 25.0  # 기본 대기 시간 (초), 새 틱이 없으면 304
+API_DATA_POLL_MAX_TIMEOUT = 60.0  # ?timeout= 상한 (초)
+API_DATA_LEASE_SECONDS = 10.0  # 요청(롱 폴링은 대기 시간 이후)부터 틱마다 재계산을 유지하는 시간 (초, 다음 폴링까지의 여유)
+
+# 구간별 처리 시간 히스토그램 (/metrics)
+# collect: 가격 수집, oracle: ETH 중앙값, assets: 다중 자산, history: 히스토리 기록,
+# emit: 인코딩 + Socket.IO 전송, publish: 브로드캐스트 전체, update: 틱 처리 전체
+STAGES = ('collect', 'oracle', 'assets', 'history', 'emit', 'publish', 'update')
+stage_latency = {stage: METRICS.histogram('oracle_stage_seconds', '틱 처리 구간별 시간', stage=stage)
+                 for stage in STAGES}
+tick_to_emit_latency = METRICS.histogram('oracle_tick_to_emit_seconds', '첫 티커 변경부터 브로드캐스트 완료까지의 지연')
+
+# 브로드캐스트 (틱 처리 스레드는 전송 요청만 넣고, 인코딩/전송은 전송 작업에서 방마다 한 번)
+# Engine.IO 대기열이 BROADCAST_MAX_QUEUE 패킷 이상 밀린 클라이언트는 최신 틱 하나만 보관했다가 전송
+# (히스토리 변경분 방은 건너뛴 틱의 변경분을 합쳐서, _merge_conflated 참고)
+BROADCAST_MAX_QUEUE = int(os.environ.get('ORACLE_BROADCAST_MAX_QUEUE', 8))
+broadcaster = Broadcaster(socketio, max_queue=BROADCAST_MAX_QUEUE, emit_latency=stage_latency['emit'],
+                          merge=lambda event, room, first, latest: _merge_conflated(event, room, first, latest))
 
 # 데이터 업데이트 스레드
 update_lock = threading.Lock()
+tick_version = threading.Condition(update_lock)  # data_version이 바뀔 때마다 notify_all (/api/data 롱 폴링)
+publish_lock = threading.Lock()  # 시퀀스 번호 순서대로 전송되도록 브로드캐스트 직렬화
 running = True
 
+def _copy_history() -> dict:
+    """전체 히스토리 배열 복사본 (update_lock 안에서 호출, memcpy 수준으로 빠름)"""
+    return price_history.copy_columns()
+
+def _history_to_lists(columns: dict) -> dict:
+    """배열 복사본을 JSON 직렬화용 리스트로 변환 (락 밖에서 호출)"""
+    return {key: arr.tolist() for key, arr in columns.items()}
+
+def _append_history(epoch_timestamp: float, prices: dict, oracle_result: dict) -> dict:
+    """
+    히스토리에 포인트 추가 및 오래된 데이터 제거 (update_lock 안에서 호출)
+    
+    Returns:
+        delta 프로토콜용 변경분 {'timestamps': [...], ..., 'evicted': int}
+    """
+    delta = {key: [] for key in HISTORY_SERIES}
+    delta['evicted'] = 0
+    
+    if oracle_result.get('median_price') is None:
+        return delta
+    
+    # None 값 대신 0 또는 이전 값 사용
+    upbit_eth = prices.get('upbit_eth_krw') if prices.get('upbit_eth_krw') is not None else 0
+    upbit_usdt = prices.get('upbit_usdt_krw') if prices.get('upbit_usdt_krw') is not None else 0
+    point = (epoch_timestamp, oracle_result['median_price'], upbit_eth, upbit_usdt)
+    
+    evicted = _record_point(point)
+    for key, value in zip(HISTORY_SERIES, point):
+        delta[key].append(value)
+    
+    delta['evicted'] = evicted + _evict_history(epoch_timestamp)
+    return delta
+
+def _append_history_rows(columns: dict) -> dict:
+    """
+    web 역할: 수집기 히스토리에서 새로 읽은 행을 로컬 히스토리와 롤업에 반영 (update_lock 안에서 호출)
+    
+    Returns:
+        _append_history()와 같은 형식의 변경분
+    """
+    delta = {key: columns[key].tolist() for key in HISTORY_SERIES}
+    evicted = 0
+    for point in zip(*(delta[key] for key in HISTORY_SERIES)):
+        evicted += _record_point(point)
+    if delta['timestamps']:
+        evicted += _evict_history(delta['timestamps'][-1])
+    delta['evicted'] = evicted
+    return delta
+
+def _record_point(point: tuple) -> int:
+    """히스토리와 롤업에 포인트 하나 기록, 용량 초과로 제거된 행 수 반환"""
+    # 최대 포인트 수 초과 시 가장 오래된 포인트를 덮어씀 (O(1))
+    evicted = price_history.append(point)
+    
+    # 롤업 버킷 갱신 (누락된 가격은 0 대신 제외)
+    epoch_timestamp, median, upbit_eth, upbit_usdt = point
+    rollup_history.add(epoch_timestamp, {
+        'median_prices': median,
+        'upbit_eth_krw': upbit_eth or None,
+        'upbit_usdt_krw': upbit_usdt or None,
+    })
+    return evicted
+
+def _evict_history(epoch_timestamp: float) -> int:
+    """시간 기반으로 오래된 데이터 제거 (최대 24시간, 이진 탐색 후 O(1)), 제거된 행 수 반환"""
+    cutoff = epoch_timestamp - HISTORY_MAX_HOURS * 3600
+    rollup_history.evict_before(cutoff)
+    return price_history.evict_before(cutoff)
+
+def publish_update(prices: dict, oracle_result: dict, record_history: bool = True) -> dict:
+    """
+    최신 데이터 갱신, 히스토리 기록 후 웹소켓으로 브로드캐스트
+    delta 클라이언트에는 변경분만, full 클라이언트에는 전체 히스토리를 전송합니다.
+    """
+    with publish_lock:
+        if snapshot_writer is not None:
+            return _publish_shared_locked(prices, oracle_result, record_history)
+        return _publish_update_locked(prices, oracle_result, record_history)
+
+def _publish_update_locked(prices: dict, oracle_result: dict, record_history: bool) -> dict:
+    """publish_update 본문 (publish_lock 안에서 호출)"""
+    global latest_data
+    
+    now = time.time()
+    data = {
+        'prices': prices,
+        'oracle_result': oracle_result,
+        'timestamp': datetime.fromtimestamp(now).isoformat(),
+    }
+    
+    with update_lock:
+        latest_data = data
+        
+        if record_history:
+            history_start = time.perf_counter()
+            delta = _append_history(now, prices, oracle_result)
+            stage_latency['history'].record(time.perf_counter() - history_start)
+        else:
+            delta = {key: [] for key in HISTORY_SERIES}
+            delta['evicted'] = 0
+        
+        seq, audiences, full_history_columns, topics = _next_broadcast(delta)
+    
+    # 틱 로그에 오라클 출력 기록 (재시작 시 복원용)
+    tick_log.append_oracle(oracle_result, prices, timestamp=now)
+    
+    # 웹소켓으로 데이터 브로드캐스트 (락 밖에서 실행하여 블로킹 최소화)
+    _broadcast(data, seq, delta, audiences, full_history_columns, topics)
+    return data
+
+def _next_broadcast(delta: dict, version: Optional[int] = None) -> tuple:
+    """
+    틱 시퀀스 증가 후 (시퀀스, 접속 중인 (히스토리 모드, 코덱) 조합, full용 히스토리 복사본, 토픽 구독 정보) 반환
+    (update_lock 안에서 호출, 변경분은 HTTP 폴링용으로 history_delta_log에 보관)
+    
+    Args:
+        version: /api/data 버전 (web 역할은 수집기 틱 시퀀스, 없으면 history_seq)
+    """
+    global history_seq, data_version
+    history_seq += 1
+    base = data_version
+    data_version = history_seq if version is None else version
+    history_delta_log.append((data_version, base, history_seq, delta))
+    tick_version.notify_all()
+    audiences = {(mode, client_codecs.get(sid)) for sid, mode in client_history_modes.items()}
+    
+    # full 클라이언트가 있을 때만 전체 스냅샷 생성 (락 내에서 빠르게)
+    full_history_columns = None
+    if any(mode == 'full' for mode, _ in audiences):
+        full_history_columns = _copy_history()
+    
+    # 구독 중인 (토픽, 코덱) 조합과 롤업 토픽의 현재 버킷 복사본
+    topic_audiences = {(topic, client_codecs.get(sid)) for sid, topics in client_topics.items() for topic in topics}
+    rollups = {}
+    for topic, _ in topic_audiences:
+        resolution = _topic_resolution(topic)
+        if resolution is not None and resolution not in rollups:
+            rollups[resolution] = rollup_history.copy_latest(resolution)
+    topics = {'audiences': topic_audiences, 'rollups': rollups}
+    return history_seq, audiences, full_history_columns, topics
+
+def _client_room(mode: str, codec) -> str:
+    """(히스토리 모드, 코덱)별 전송 방 이름"""
+    return f'history_{mode}' if codec is None else f'history_{mode}.{codec}'
+
+def _broadcast(data: dict, seq: int, delta: dict, audiences: set, full_history_columns, topics: dict):
+    """
+    price_update / topic_update 전송 요청 (락 밖에서 호출, 대기 없이 반환)
+    (히스토리 모드 또는 토픽, 코덱) 조합별 인코딩과 전송은 브로드캐스터의 전송 작업에서 한 번씩 실행합니다.
+    """
+    # 접속 중인 클라이언트가 없으면 (대기 상태) 인코딩과 전송 생략
+    if audiences:
+        broadcaster.publish('price_update', lambda: _room_payloads(data, seq, delta, audiences, full_history_columns))
+    if topics['audiences']:
+        broadcaster.publish('topic_update', lambda: _topic_room_payloads(data, seq, delta, topics))
+
+def _room_payloads(data: dict, seq: int, delta: dict, audiences: set, full_history_columns) -> dict:
+    """전송 방별 price_update 데이터 (코덱을 지정하지 않은 방은 객체, 나머지는 미리 인코딩한 바이트)"""
+    payloads = {
+        'delta': EncodedPayload({
+            'prices': data['prices'],
+            'oracle_result': data['oracle_result'],
+            'timestamp': data['timestamp'],
+            'history_seq': seq,
+            'price_history_delta': delta,
+        }, 'delta', codec_stats),
+    }
+    if full_history_columns is not None:
+        payloads['full'] = EncodedPayload({
+            'prices': data['prices'],
+            'oracle_result': data['oracle_result'],
+            'timestamp': data['timestamp'],
+            'history_seq': seq,
+            'price_history': _history_to_lists(full_history_columns),
+        }, 'full', codec_stats)
+    
+    rooms = {}
+    for mode, codec in audiences:
+        payload = payloads[mode]
+        # 코덱 방은 같은 바이트를 방의 모든 클라이언트에 전송 (바이너리 프레임)
+        rooms[_client_room(mode, codec)] = payload.data if codec is None else payload.encode(codec)
+    return rooms
+
+def _merge_conflated(event: str, room: str, first, latest):
+    """
+    브로드캐스터 병합 함수: 밀린 클라이언트가 건너뛴 delta/history:raw 틱의 히스토리 변경분을 합쳐 최신 틱과 함께 전송
+    변경분이 history_delta_log에 남아 있지 않으면 전체 스냅샷을 보내며, 둘 다 브로드캐스터의 대기열 검사를 거친 뒤 나갑니다.
+    """
+    name, _, codec = room.partition('.')
+    if event == 'price_update' and name == _client_room('delta', None):
+        seq_key, delta_key = 'history_seq', 'price_history_delta'
+    elif event == 'topic_update' and name == _topic_room(f'{HISTORY_TOPIC_PREFIX}raw', None):
+        seq_key, delta_key = 'seq', 'delta'
+    else:
+        return latest
+    if codec:
+        first, latest = decode_payload(first, codec), decode_payload(latest, codec)
+    
+    base, seq = first[seq_key] - 1, latest[seq_key]
+    merged = dict(latest)
+    with update_lock:
+        entries = [entry for entry in history_delta_log if base < entry[2] <= seq]
+        if entries and entries[0][2] == base + 1 and entries[-1][2] == seq:
+            merged[delta_key] = _merge_deltas(entry[3] for entry in entries)
+            history_columns = None
+        else:
+            # 스냅샷은 지금 시점의 히스토리이므로 시퀀스도 지금 값 (이후 틱만 변경분으로 적용됨)
+            history_columns = _copy_history()
+            merged[seq_key] = history_seq
+    if history_columns is not None:
+        del merged[delta_key]
+        if event == 'price_update':
+            merged['price_history'] = _history_to_lists(history_columns)
+        else:
+            merged.update(snapshot=True, history=_history_to_lists(history_columns))
+    return EncodedPayload(merged, 'catch_up', codec_stats).encode(codec) if codec else merged
+
+def _parse_topic(topic) -> Optional[str]:
+    """구독 요청의 토픽 이름 정규화 (지원하지 않으면 None)"""
+    if not isinstance(topic, str):
+        return None
+    if topic in TOPIC_FIELDS:
+        return topic
+    if topic.startswith(HISTORY_TOPIC_PREFIX):
+        resolution = topic[len(HISTORY_TOPIC_PREFIX):]
+        if resolution == 'raw':
+            return topic
+        if resolution.isdigit() and rollup_history.get_tier(int(resolution)) is not None:
+            return f'{HISTORY_TOPIC_PREFIX}{int(resolution)}'
+    return None
+
+def _topic_resolution(topic: str) -> Optional[int]:
+    """롤업 히스토리 토픽의 해상도 (그 외 토픽은 None)"""
+    if topic.startswith(HISTORY_TOPIC_PREFIX) and topic != f'{HISTORY_TOPIC_PREFIX}raw':
+        return int(topic[len(HISTORY_TOPIC_PREFIX):])
+    return None
+
+def _topic_room(topic: str, codec) -> str:
+    """(토픽, 코덱)별 전송 방 이름"""
+    return f'topic:{topic}' if codec is None else f'topic:{topic}.{codec}'
+
+def _topic_data(topic: str, data: dict, seq: int, delta: dict, rollups: dict) -> Optional[dict]:
+    """토픽별 topic_update 데이터 (이번 틱에 보낼 내용이 없으면 None)"""
+    oracle_result = data['oracle_result']
+    if oracle_result is None:
+        return None
+    
+    result = {'topic': topic, 'seq': seq, 'timestamp': data['timestamp']}
+    if topic in TOPIC_FIELDS:
+        result.update({key: oracle_result.get(key) for key in TOPIC_FIELDS[topic]})
+        if topic == 'venues':
+            result['prices'] = data['prices']
+    elif topic == f'{HISTORY_TOPIC_PREFIX}raw':
+        result['delta'] = delta
+    else:
+        # 롤업 토픽은 새 포인트가 기록된 틱에만 현재 버킷 전송
+        if not delta['timestamps']:
+            return None
+        result.update(rollup_history.format_range(rollups[_topic_resolution(topic)]))
+    return result
+
+def _topic_room_payloads(data: dict, seq: int, delta: dict, topics: dict) -> dict:
+    """전송 방별 topic_update 데이터 (토픽마다 한 번 만들고 코덱별로 한 번 인코딩)"""
+    payloads = {}
+    rooms = {}
+    for topic, codec in topics['audiences']:
+        if topic not in payloads:
+            topic_data = _topic_data(topic, data, seq, delta, topics['rollups'])
+            payloads[topic] = None if topic_data is None else EncodedPayload(topic_data, f'topic_{topic}', codec_stats)
+        payload = payloads[topic]
+        if payload is not None:
+            rooms[_topic_room(topic, codec)] = payload.data if codec is None else payload.encode(codec)
+    return rooms
+
+def _publish_shared_locked(prices: dict, oracle_result: dict, record_history: bool) -> dict:
+    """
+    collector 역할의 publish_update 본문 (publish_lock 안에서 호출)
+    히스토리 기록과 최신 결과를 한 번의 seqlock 쓰기로 공유 메모리에 게시합니다.
+    """
+    global latest_data, history_seq, data_version, shared_status_at
+    
+    now = time.time()
+    data = {
+        'prices': prices,
+        'oracle_result': oracle_result,
+        'timestamp': datetime.fromtimestamp(now).isoformat(),
+    }
+    # 인코딩은 쓰기 구간 밖에서 (읽는 쪽이 재시도하는 시간 최소화, publish_lock 안이라 다음 시퀀스가 확정됨)
+    seq = history_seq + 1
+    tick = encode_json({'data': data, 'assets': latest_assets, 'manual': _manual_prices(), 'version': seq})
+    status = None
+    if now - shared_status_at >= SHARED_STATUS_INTERVAL:
+        status = encode_json(_collector_status())
+        shared_status_at = now
+    
+    with update_lock:
+        latest_data = data
+        history_seq = data_version = seq
+        tick_version.notify_all()
+        snapshot_writer.begin()
+        try:
+            if record_history:
+                history_start = time.perf_counter()
+                _append_history(now, prices, oracle_result)
+                stage_latency['history'].record(time.perf_counter() - history_start)
+        finally:
+            snapshot_writer.commit(tick, status)
+    
+    tick_log.append_oracle(oracle_result, prices, timestamp=now)
+    return latest_data
+
+def _manual_prices() -> dict:
+    """수동 설정 가격 {'usdt_krw', 'eth_krw'} (web 역할은 수집기가 게시한 값)"""
+    if oracle is None:
+        return shared_status.get('manual') or {'usdt_krw': None, 'eth_krw': None}
+    return {'usdt_krw': oracle.get_manual_usdt_krw(), 'eth_krw': oracle.get_manual_eth_krw()}
+
+def _ingest_stats() -> dict:
+    """수집 루프 통계와 거래소별 REST 폴백 지연"""
+    stats = price_fetcher.get_ingest_stats()
+    stats['rest_fallback'] = price_fetcher.get_rest_fallback_stats()
+    return stats
+
+# 수집기 통계 (web 역할은 collector가 SHARED_STATUS_INTERVAL마다 게시한 값으로 응답)
+COLLECTOR_STATUS = {
+    'symbols': lambda: list(price_fetcher.symbols),
+    'ingest': _ingest_stats,
+    'health': lambda: price_fetcher.get_source_health(),
+    'books': lambda: price_fetcher.get_order_books(),
+    'scheduler': lambda: recompute_scheduler.get_stats(),
+    'metrics': lambda: METRICS.render(),
+}
+
+def _collector_status() -> dict:
+    """게시할 수집기 통계 전체"""
+    return {name: collect() for name, collect in COLLECTOR_STATUS.items()}
+
+def _status(name: str):
+    """수집기 통계 하나 (web 역할은 수집기가 게시한 값, 아직 받지 못했으면 None)"""
+    if ROLE == 'web':
+        return shared_status.get(name)
+    return COLLECTOR_STATUS[name]()
+
+def _status_response(name: str):
+    """수집기 통계 JSON 응답"""
+    value = _status(name)
+    if value is None:
+        return jsonify({'success': False, 'message': '수집기 상태를 아직 받지 못했습니다'}), 503
+    return jsonify(value)
+
+def _collector_only():
+    """web 역할에서 수집기 상태를 바꾸는 요청에 대한 응답"""
+    return jsonify({'success': False, 'message': '수집기 프로세스(ORACLE_ROLE=all/collector)에서만 실행할 수 있습니다'}), 409
+
+def apply_shared_control():
+    """collector 역할: 웹 워커가 제어 소켓으로 보낸 수동 가격을 받은 순서대로 오라클에 반영하고 바로 재계산"""
+    while running:
+        try:
+            message = control_listener.receive(timeout=SHARED_CONTROL_INTERVAL)
+        except OSError:
+            return  # 종료 중 소켓이 닫힘
+        if message is None:
+            continue
+        if message['field'] == 'manual_usdt_krw':
+            oracle.set_manual_usdt_krw(message['value'])
+        else:
+            oracle.set_manual_eth_krw(message['value'])
+        recompute_scheduler.notify('manual')
+
+def _attach_collector() -> bool:
+    """web 역할: 수집기 공유 메모리에 (다시) 연결, 아직 없으면 False"""
+    global snapshot_reader
+    if snapshot_reader is not None:
+        snapshot_reader.close()
+        snapshot_reader = None
+    try:
+        snapshot_reader = SnapshotReader(SHM_NAME, HISTORY_SERIES)
+    except FileNotFoundError:
+        return False
+    print(f"수집기 공유 메모리 연결: {SHM_NAME} (수집기 pid {snapshot_reader.writer_pid})")
+    return True
+
+def _apply_shared_snapshot(snapshot: dict):
+    """web 역할: 공유 메모리에서 읽은 스냅샷을 최신 데이터/히스토리에 반영하고 브로드캐스트"""
+    global latest_data, latest_assets, shared_status
+    
+    tick = JsonModule.loads(snapshot['tick'])
+    status = JsonModule.loads(snapshot['status']) if snapshot['status'] is not None else None
+    with publish_lock:
+        with update_lock:
+            latest_data = tick['data']
+            latest_assets = tick['assets']
+            shared_status = dict(status if status is not None else shared_status, manual=tick['manual'])
+            
+            history_start = time.perf_counter()
+            delta = _append_history_rows(snapshot['history'])
+            stage_latency['history'].record(time.perf_counter() - history_start)
+            
+            seq, audiences, full_history_columns, topics = _next_broadcast(delta, tick['version'])
+            data = latest_data
+        _broadcast(data, seq, delta, audiences, full_history_columns, topics)
+
+def follow_collector():
+    """
+    web 역할: 공유 메모리 버전이 바뀔 때마다 스냅샷을 읽어 반영
+    버전 확인은 공유 메모리의 정수 하나를 읽는 것이므로 IPC 없이 짧은 주기로 확인합니다.
+    """
+    sequence = None
+    status_version = None
+    attached_at = 0.0
+    while running:
+        reader = snapshot_reader
+        if reader is None or reader.closed or (
+                reader.age() > SHARED_STALE_SECONDS and time.monotonic() - attached_at > SHARED_STALE_SECONDS):
+            if not _attach_collector():
+                time.sleep(1.0)  # 수집기가 아직 시작되지 않음
+                continue
+            reader = snapshot_reader
+            attached_at = time.monotonic()
+            sequence = status_version = None
+        
+        current = reader.sequence
+        if current == sequence or current & 1:
+            time.sleep(SHARED_POLL_INTERVAL)
+            continue
+        
+        with update_lock:
+            since = price_history.last('timestamps')
+        snapshot = reader.read(since=since if since is not None else float('-inf'), status_version=status_version)
+        if snapshot is None:
+            time.sleep(SHARED_POLL_INTERVAL)
+            continue
+        sequence = snapshot['sequence']
+        status_version = snapshot['status_version']
+        try:
+            _apply_shared_snapshot(snapshot)
+        except Exception as e:
+            print(f"공유 스냅샷 반영 오류: {e}")
+
+def update_assets(prices: dict) -> dict:
+    """가격 행렬 스냅샷으로 심볼별 KRW 중앙값 계산 후 저장"""
+    global latest_assets
+    
+    result = oracle.calculate_median_krw_prices(
+        price_fetcher.get_asset_snapshot(),
+        upbit_usdt_krw=prices['upbit_usdt_krw'],
+        use_manual_usdt_krw=oracle.manual_usdt_krw_override is not None
+    )
+    result['timestamp'] = datetime.now().isoformat()
+    with update_lock:
+        latest_assets = result
+    return result
+
 def update_prices():
-    """주기적으로 가격 데이터 업데이트 및 웹소켓으로 브로드캐스트"""
-    global latest_data, running
+    """티커 변경 시 가격 데이터 업데이트 및 웹소켓으로 브로드캐스트"""
+    global running
     
     while running:
+        # 티커 변경(또는 하트비트)까지 대기, 클라이언트가 없으면 하트비트 주기로만 재계산
+        batch = recompute_scheduler.wait()
+        if batch is None:
+            break
+        
         try:
-            update_start = time.time()
+            update_start = time.perf_counter()
             
             # 가격 데이터 수집 (병렬 처리로 빠르게)
             prices = price_fetcher.get_all_prices()
+            collected = time.perf_counter()
             
             # 오라클 계산
             oracle_result = oracle.calculate_median_eth_krw_price(
@@ -57,112 +673,523 @@ def update_prices():
                 upbit_usdt_krw=prices['upbit_usdt_krw'],
                 overseas_eth_usdt=prices['overseas_eth_usdt'],
                 use_manual_usdt_krw=oracle.manual_usdt_krw_override is not None,
-                use_manual_eth_krw=oracle.manual_eth_krw_override is not None
+                use_manual_eth_krw=oracle.manual_eth_krw_override is not None,
+                source_ages=prices['source_ages']
             )
+            computed = time.perf_counter()
             
-            timestamp = datetime.now().isoformat()
-            
-            # 가격 히스토리 업데이트 (차트용)
-            price_history_snapshot = None
-            with update_lock:
-                latest_data = {
-                    'prices': prices,
-                    'oracle_result': oracle_result,
-                    'timestamp': timestamp,
-                }
-                
-                if oracle_result.get('median_price') is not None:
-                    price_history['timestamps'].append(timestamp)
-                    price_history['median_prices'].append(oracle_result['median_price'])
-                    # None 값 대신 0 또는 이전 값 사용
-                    upbit_eth = prices.get('upbit_eth_krw') if prices.get('upbit_eth_krw') is not None else 0
-                    upbit_usdt = prices.get('upbit_usdt_krw') if prices.get('upbit_usdt_krw') is not None else 0
-                    price_history['upbit_eth_krw'].append(upbit_eth)
-                    price_history['upbit_usdt_krw'].append(upbit_usdt)
-                    
-                    # 시간 기반으로 오래된 데이터 제거 (최대 24시간)
-                    from datetime import timedelta
-                    cutoff_time = datetime.now() - timedelta(hours=price_history['max_hours'])
-                    cutoff_iso = cutoff_time.isoformat()
-                    
-                    # 오래된 데이터 제거
-                    while (price_history['timestamps'] and 
-                           len(price_history['timestamps']) > 0 and 
-                           price_history['timestamps'][0] < cutoff_iso):
-                        price_history['timestamps'].pop(0)
-                        price_history['median_prices'].pop(0)
-                        price_history['upbit_eth_krw'].pop(0)
-                        price_history['upbit_usdt_krw'].pop(0)
-                    
-                    # 최대 포인트 수 제한 (안전장치)
-                    if len(price_history['timestamps']) > price_history['max_points']:
-                        price_history['timestamps'].pop(0)
-                        price_history['median_prices'].pop(0)
-                        price_history['upbit_eth_krw'].pop(0)
-                        price_history['upbit_usdt_krw'].pop(0)
-                
-                # 히스토리 스냅샷 생성 (락 내에서 빠르게)
-                price_history_snapshot = {
-                    'timestamps': price_history['timestamps'].copy(),
-                    'median_prices': price_history['median_prices'].copy(),
-                    'upbit_eth_krw': price_history['upbit_eth_krw'].copy(),
-                    'upbit_usdt_krw': price_history['upbit_usdt_krw'].copy(),
-                }
-            
-            # 웹소켓으로 데이터 브로드캐스트 (락 밖에서 실행하여 블로킹 최소화)
-            data_to_send = {
-                'prices': prices,
-                'oracle_result': oracle_result,
-                'timestamp': timestamp,
-                'price_history': price_history_snapshot,
-            }
+            # 다중 자산 KRW 가격 (모든 심볼을 배열 연산 한 번으로)
+            update_assets(prices)
+            assets_done = time.perf_counter()
             
-            # 비동기 브로드캐스트 (모든 클라이언트에게 즉시 전송)
-            socketio.emit('price_update', data_to_send, namespace='/')
+            # 히스토리 기록 및 브로드캐스트
+            publish_update(prices, oracle_result)
+            published = time.perf_counter()
             
-            update_duration = (time.time() - update_start) * 1000
-            print(f"가격 업데이트 완료: {datetime.now()} (소요: {update_duration:.1f}ms)")
+            stage_latency['collect'].record(collected - update_start)
+            stage_latency['oracle'].record(computed - collected)
+            stage_latency['assets'].record(assets_done - computed)
+            stage_latency['publish'].record(published - assets_done)
+            stage_latency['update'].record(published - update_start)
+            update_duration = (published - update_start) * 1000
+            tick_latency = recompute_scheduler.record_emit(batch)
+            if tick_latency is not None:
+                tick_to_emit_latency.record(tick_latency / 1000)
+            latency_text = f", 틱→전송: {tick_latency:.1f}ms" if tick_latency is not None else ""
+            print(f"가격 업데이트 완료: {datetime.now()} ({batch['reason']}, 틱 {batch['tick_count']}개, "
+                  f"소요: {update_duration:.1f}ms{latency_text})")
             
         except Exception as e:
             print(f"가격 업데이트 오류: {e}")
             import traceback
             traceback.print_exc()
-        
-        # 병렬 처리로 속도가 빨라졌으므로 0.5초마다 업데이트 (더 빠른 반응성)
-        time.sleep(0.5)
 
 @app.route('/')
 def index():
     """메인 대시보드 페이지"""
     return render_template('index.html')
 
+def _merge_deltas(deltas) -> dict:
+    """
+    연속된 변경분을 하나로 합침
+    추가 후 오래된 포인트 제거 순서라 추가분을 이어 붙이고 제거 수를 더해도 차례로 적용한 결과와 같습니다.
+    """
+    merged = {key: [] for key in HISTORY_SERIES}
+    merged['evicted'] = 0
+    for delta in deltas:
+        for key in HISTORY_SERIES:
+            merged[key].extend(delta[key])
+        merged['evicted'] += delta['evicted']
+    return merged
+
+def _merged_history_delta(base: int) -> Optional[dict]:
+    """
+    base 버전 이후의 변경분을 하나로 합침 (update_lock 안에서 호출)
+    
+    Returns:
+        변경분 또는 None (history_delta_log에 base 이후가 모두 남아 있지 않거나, 이 워커가 base 버전을
+        따로 반영하지 않고 다음 게시와 합쳐 읽은 경우)
+    """
+    if base == data_version:
+        return _merge_deltas([])
+    entries = list(history_delta_log)
+    start = next((i for i, entry in enumerate(entries) if entry[1] == base), None)
+    if start is None:
+        return None
+    return _merge_deltas(entry[3] for entry in entries[start:])
+
+def _api_data_payload(history_mode: str = 'full', base: Optional[int] = None) -> tuple:
+    """
+    /api/data 응답 페이로드 (틱마다 히스토리 형식별로 한 번 생성, 다음 틱까지 모든 요청이 공유)
+    
+    Args:
+        history_mode: 'full' (전체 히스토리), 'latest' (히스토리 생략), 'delta' (base 이후 변경분)
+        base: delta 형식의 기준 시퀀스 (변경분을 만들 수 없으면 전체 히스토리)
+    
+    Returns:
+        (버전, 실제 히스토리 형식, EncodedPayload)
+    """
+    with api_data_lock:
+        with update_lock:
+            seq = data_version
+            if api_data_cache['seq'] != seq:
+                api_data_cache['seq'] = seq
+                api_data_cache['payloads'] = {}
+            delta = None
+            if history_mode == 'delta':
+                delta = _merged_history_delta(base) if base is not None else None
+                history_mode = 'full' if delta is None else history_mode
+            key = (history_mode, base) if history_mode == 'delta' else history_mode
+            payload = api_data_cache['payloads'].get(key)
+            if payload is not None:
+                return seq, history_mode, payload
+            data = latest_data.copy()
+            history_columns = _copy_history() if history_mode == 'full' else None
+        
+        data['version'] = seq
+        if history_mode == 'full':
+            data['price_history'] = _history_to_lists(history_columns)
+            data['price_history']['max_points'] = HISTORY_MAX_POINTS
+            data['price_history']['max_hours'] = HISTORY_MAX_HOURS
+        elif history_mode == 'delta':
+            data['price_history_delta'] = delta
+            data['history_base'] = base
+        payload = EncodedPayload(data, 'api_data' if history_mode == 'full' else f'api_data_{history_mode}', codec_stats)
+        api_data_cache['payloads'][key] = payload
+        return seq, history_mode, payload
+
 @app.route('/api/data')
 def get_data():
-    """현재 가격 데이터 API (웹소켓 미지원 클라이언트용)"""
+    """
+    현재 가격 데이터 API (웹소켓 미지원 클라이언트용)
+    Accept: application/msgpack 또는 ?format=msgpack이면 MessagePack으로 응답합니다.
+    
+    Query:
+        history: 0이면 price_history 생략, delta면 since 이후의 변경분 price_history_delta와 기준 버전
+                 history_base (since가 없거나 변경분이 남아 있지 않으면 전체 price_history, 기본값: 1)
+        since: 이 버전보다 새 틱이 생길 때까지 대기 (롱 폴링, 시간 초과 시 304)
+        timeout: 롱 폴링 대기 시간 (초, 기본값 25, 최대 60)
+    
+    응답의 version과 ETag는 틱 시퀀스이며, If-None-Match가 같으면 304를 반환합니다.
+    Accept-Encoding에 따라 버전별로 한 번만 압축한 gzip/brotli 본문을 보냅니다.
+    폴링 중인 HTTP 클라이언트도 소켓 클라이언트처럼 스케줄러를 깨워 틱마다 재계산되게 합니다.
+    """
+    requested = request.args.get('format')
+    if requested is None and 'application/msgpack' in request.headers.get('Accept', ''):
+        requested = 'msgpack'
+    codec = negotiate_codec(requested)
+    history_mode = request.args.get('history', '1').lower()
+    if history_mode != 'delta':
+        history_mode = 'latest' if history_mode in ('0', 'false', 'no') else 'full'
+    
+    since = request.args.get('since')
+    timeout = 0.0
+    if since is not None:
+        try:
+            since = int(since)
+            timeout = max(min(float(request.args.get('timeout', API_DATA_POLL_TIMEOUT)), API_DATA_POLL_MAX_TIMEOUT), 0.0)
+        except ValueError:
+            return jsonify({'success': False, 'message': '잘못된 since/timeout 형식'}), 400
+    
+    if recompute_scheduler is not None:
+        # 대기 상태(하트비트 주기)였다면 바로 재계산되어 롱 폴링이 최신 버전을 받음
+        recompute_scheduler.keep_alive(timeout + API_DATA_LEASE_SECONDS)
+    
+    if since is not None:
+        # 더 새 버전이 생기면 반환 (다른 워커에서 받은 버전을 이 워커가 아직 반영하지 않았으면 따라잡을 때까지 대기)
+        with tick_version:
+            tick_version.wait_for(lambda: data_version > since, timeout=timeout)
+    
+    seq, history_mode, payload = _api_data_payload(history_mode, since)
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if since == seq:
+        response = Response(status=304)
+    elif encoding is None:
+        response = Response(payload.encode(codec), mimetype=CONTENT_TYPES[codec])
+    else:
+        response = Response(payload.compress(codec, encoding), mimetype=CONTENT_TYPES[codec])
+        response.headers['Content-Encoding'] = encoding
+    
+    # 표현(코덱, 히스토리 포함 여부, 압축)마다 본문이 다르므로 약한 ETag에 버전과 표현을 함께 기록
+    tag = history_mode if history_mode != 'delta' else f'delta{since}'
+    response.set_etag(f'{seq}-{codec}-{tag}', weak=True)
+    response.headers['X-Oracle-Version'] = str(seq)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response.make_conditional(request)
+
+@app.route('/api/history')
+def get_history():
+    """
+    구간별 히스토리 API
+    
+    Query:
+        from: 시작 시간 (epoch 초, 기본값: to - 1시간)
+        to: 종료 시간 (epoch 초, 기본값: 현재)
+        resolution: 'auto' (기본값), 'raw' 또는 롤업 해상도 초 (1, 10, 60, 300)
+    """
+    try:
+        end = float(request.args.get('to', time.time()))
+        start = float(request.args.get('from', end - 3600))
+    except ValueError:
+        return jsonify({'success': False, 'message': '잘못된 시간 형식'}), 400
+    if start > end:
+        return jsonify({'success': False, 'message': 'from은 to보다 클 수 없습니다'}), 400
+    
+    resolution = request.args.get('resolution', 'auto')
+    if resolution == 'raw':
+        with update_lock:
+            first = price_history.bisect_left(start)
+            last = price_history.bisect_right(end)
+            columns = price_history.copy_columns(first, last)
+        series = {key: {'value': arr.tolist()} for key, arr in columns.items() if key != 'timestamps'}
+        return jsonify({
+            'resolution': 'raw',
+            'from': start,
+            'to': end,
+            'timestamps': columns['timestamps'].tolist(),
+            'series': series,
+        })
+    
+    if resolution != 'auto':
+        try:
+            resolution = int(resolution)
+        except ValueError:
+            resolution = None
+        if rollup_history.get_tier(resolution) is None:
+            return jsonify({
+                'success': False,
+                'message': f'지원하지 않는 해상도 (auto, raw, {", ".join(map(str, rollup_history.resolutions))})',
+            }), 400
+    
+    with update_lock:
+        if resolution == 'auto':
+            resolution = rollup_history.choose_resolution(start, end, HISTORY_MAX_BUCKETS)
+        copied = rollup_history.copy_range(start, end, resolution)
+    
+    result = rollup_history.format_range(copied)
+    result['from'] = start
+    result['to'] = end
+    return jsonify(result)
+
+@app.route('/api/assets')
+def get_assets():
+    """다중 자산 KRW 중앙값 API (symbols=ETH,BTC 로 필터링 가능)"""
+    with update_lock:
+        result = latest_assets
+    if result is None:
+        return jsonify({'symbols': _status('symbols') or [], 'assets': {}})
+    
+    symbols = request.args.get('symbols')
+    if symbols:
+        wanted = parse_symbols(symbols)
+        result = dict(result, assets={symbol: result['assets'][symbol]
+                                      for symbol in wanted if symbol in result['assets']})
+    return jsonify(dict(result, symbols=list(result['assets'])))
+
+@app.route('/api/assets/symbols', methods=['POST'])
+def update_asset_symbols():
+    """심볼 구독 추가/제거 ({'add': ['DOGE'], 'remove': ['XRP']}, 재연결 없이 반영)"""
+    if price_fetcher is None:
+        return _collector_only()
+    data = request.get_json() or {}
+    add = data.get('add') or []
+    remove = data.get('remove') or []
+    if not isinstance(add, list) or not isinstance(remove, list):
+        return jsonify({'success': False, 'message': 'add/remove는 심볼 목록이어야 합니다'}), 400
+    
+    add = [symbol.strip().upper() for symbol in add if isinstance(symbol, str)]
+    remove = [symbol.strip().upper() for symbol in remove if isinstance(symbol, str)]
+    added = [symbol for symbol in add if price_fetcher.add_symbol(symbol)]
+    removed = [symbol for symbol in remove if price_fetcher.remove_symbol(symbol)]
+    return jsonify({
+        'success': True,
+        'added': added,
+        'removed': removed,
+        'symbols': list(price_fetcher.symbols),
+    })
+
+@app.route('/api/ingest')
+def get_ingest_stats():
+    """수집 루프 스레드 수, 소스별 메시지당 처리 비용, 거래소별 REST 폴백 지연"""
+    return _status_response('ingest')
+
+@app.route('/api/health')
+def get_source_health():
+    """거래소별 상태 (healthy/degraded/open/half_open), 연속 실패 수, 회로 차단 횟수, 재시도까지 남은 시간"""
+    return _status_response('health')
+
+@app.route('/api/books')
+def get_order_books():
+    """호가창 기반 가격 산출 방식과 소스별 최우선 호가, 스프레드, mid/microprice/깊이 가중 가격"""
+    return _status_response('books')
+
+@app.route('/api/payloads')
+def get_payload_stats():
+    """페이로드별 인코딩 시간과 전송 바이트 수"""
+    return jsonify({
+        'orjson': ORJSON_AVAILABLE,
+        'codecs': list(available_codecs()),
+        'encodings': list(available_encodings()),
+        'payloads': codec_stats.get_stats(),
+        'broadcast': broadcaster.get_stats(),
+    })
+
+def _connected_clients() -> list:
+    """(히스토리 모드, 코덱)별 접속 클라이언트 수"""
+    counts = {}
+    with update_lock:
+        for sid, mode in client_history_modes.items():
+            key = (mode, client_codecs.get(sid) or 'object')
+            counts[key] = counts.get(key, 0) + 1
+    return [({'history': mode, 'codec': codec}, count) for (mode, codec), count in counts.items()]
+
+def _emit_queue_depths() -> list:
+    """Engine.IO 소켓별 전송 대기 패킷 수"""
+    sockets = list(getattr(socketio.server.eio, 'sockets', {}).values()) if socketio.server else []
+    return [socket.queue.qsize() for socket in sockets if hasattr(socket, 'queue')]
+
+def _topic_subscribers() -> list:
+    """토픽별 구독 클라이언트 수"""
+    counts = {}
+    with update_lock:
+        for topics in client_topics.values():
+            for topic in topics:
+                counts[topic] = counts.get(topic, 0) + 1
+    return [({'topic': topic}, count) for topic, count in counts.items()]
+
+METRICS.add_collector('oracle_connected_clients', 'gauge', '접속 중인 Socket.IO 클라이언트 수', _connected_clients)
+METRICS.add_collector('oracle_topic_subscribers', 'gauge', '토픽별 구독 클라이언트 수', _topic_subscribers)
+METRICS.add_collector('oracle_broadcast_lagging_clients', 'gauge', '전송 대기열이 밀려 최신 틱만 보관 중인 클라이언트 수',
+                      lambda: broadcaster.get_stats()['lagging'])
+METRICS.add_collector('oracle_broadcast_conflated_total', 'counter', '밀린 클라이언트에서 최신 틱으로 병합되어 건너뛴 틱 수',
+                      lambda: broadcaster.get_stats()['conflated'])
+METRICS.add_collector('oracle_broadcast_dropped_ticks_total', 'counter', '전송 작업이 밀려 버린 틱 수',
+                      lambda: broadcaster.get_stats()['dropped_jobs'])
+METRICS.add_collector('oracle_emit_queue_depth', 'gauge', '모든 클라이언트의 전송 대기 패킷 수 합계',
+                      lambda: sum(_emit_queue_depths()))
+METRICS.add_collector('oracle_emit_queue_depth_max', 'gauge', '클라이언트 하나의 최대 전송 대기 패킷 수',
+                      lambda: max(_emit_queue_depths(), default=0))
+if ROLE == 'web':
+    METRICS.add_collector('oracle_shared_snapshot_age_seconds', 'gauge', '수집기의 마지막 공유 메모리 게시 이후 경과 시간',
+                          lambda: snapshot_reader.age() if snapshot_reader is not None else None)
+    METRICS.add_collector('oracle_shared_snapshot_retries_total', 'counter', '게시와 겹쳐 공유 메모리를 다시 읽은 횟수',
+                          lambda: snapshot_reader.retries if snapshot_reader is not None else 0)
+else:
+    METRICS.add_collector('oracle_scheduler_ticks_total', 'counter', '재계산 스케줄러가 받은 티커 변경 수',
+                          lambda: recompute_scheduler.get_stats()['ticks'])
+    METRICS.add_collector('oracle_scheduler_pending_ticks', 'gauge', '재계산을 기다리는 티커 변경 수',
+                          lambda: recompute_scheduler.get_stats()['pending_ticks'])
+    METRICS.add_collector('oracle_recomputes_total', 'counter', '오라클 재계산 수 (하트비트 포함)',
+                          lambda: recompute_scheduler.get_stats()['recomputes'])
+    METRICS.add_collector('oracle_price_book_version', 'gauge', '가격 장부 버전',
+                          lambda: price_fetcher.price_book.version)
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus 텍스트 형식 메트릭 (구간별/소스별 지연 분위수, 틱 수, 신선도, 클라이언트, 전송 대기열)"""
+    return Response(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/metrics/collector')
+def get_collector_metrics():
+    """수집기 프로세스의 메트릭 (web 역할에서 수집기가 게시한 값, 그 외에는 /metrics와 같음)"""
+    text = _status('metrics')
+    if text is None:
+        return Response('', status=503, content_type=METRICS_CONTENT_TYPE)
+    return Response(text, content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/scheduler')
+def get_scheduler_stats():
+    """재계산 스케줄러 통계 (틱 수, 병합률, 틱→전송 지연)"""
+    return _status_response('scheduler')
+
+def _emit_to_client(data: dict, event: str = 'price_update'):
+    """요청한 클라이언트의 코덱으로 price_update (또는 event) 전송"""
+    codec = client_codecs.get(request.sid)
+    if codec is None:
+        emit(event, data)
+    else:
+        emit(event, EncodedPayload(data, 'snapshot', codec_stats).encode(codec))
+
+def _emit_history_snapshot():
+    """요청한 클라이언트에게 최신 데이터와 전체 히스토리 스냅샷 전송"""
     with update_lock:
         data = latest_data.copy()
-        data['price_history'] = price_history.copy()
-        return jsonify(data)
+        history_columns = _copy_history()
+        data['history_seq'] = history_seq
+    data['price_history'] = _history_to_lists(history_columns)
+    _emit_to_client(data)
 
 @socketio.on('connect')
-def handle_connect():
-    """클라이언트 연결 시 최신 데이터 즉시 전송"""
+def handle_connect(auth=None):
+    """
+    클라이언트 연결 시 최신 데이터 즉시 전송
+    auth={'history': 'delta'}로 연결한 클라이언트는 스냅샷 이후 변경분만 받습니다.
+    auth={'codec': 'json' | 'msgpack'}로 연결한 클라이언트는 미리 인코딩된 바이너리 프레임을 받습니다.
+    """
     print('클라이언트 연결됨')
+    auth = auth if isinstance(auth, dict) else {}
+    mode = 'delta' if auth.get('history') == 'delta' else 'full'
+    codec = negotiate_codec(auth['codec']) if auth.get('codec') else None
+    if auth.get('topics'):
+        # 토픽 클라이언트는 price_update 방에 들어가지 않고 구독한 토픽만 수신
+        with update_lock:
+            client_codecs[request.sid] = codec
+            client_topics[request.sid] = set()
+        broadcaster.add_client(request.sid)
+        if recompute_scheduler is not None:
+            recompute_scheduler.client_connected()
+        _subscribe_topics(auth['topics'])
+        return
+    
     with update_lock:
-        data = latest_data.copy()
+        client_history_modes[request.sid] = mode
+        client_codecs[request.sid] = codec
+    broadcaster.add_client(request.sid, _client_room(mode, codec))
+    if recompute_scheduler is not None:
+        recompute_scheduler.client_connected()
+    
+    if mode == 'delta':
+        # delta 클라이언트는 시퀀스 기준점이 필요하므로 항상 스냅샷 전송
+        _emit_history_snapshot()
+    else:
+        with update_lock:
+            data = latest_data.copy()
+            history_columns = _copy_history()
+            data['history_seq'] = history_seq
         if data.get('prices') is not None:  # 데이터가 있을 때만 전송
-            data['price_history'] = {
-                'timestamps': price_history['timestamps'].copy(),
-                'median_prices': price_history['median_prices'].copy(),
-                'upbit_eth_krw': price_history['upbit_eth_krw'].copy(),
-                'upbit_usdt_krw': price_history['upbit_usdt_krw'].copy(),
-            }
-            emit('price_update', data)
+            data['price_history'] = _history_to_lists(history_columns)
+            _emit_to_client(data)
+
+@socketio.on('history_resync')
+def handle_history_resync():
+    """delta 클라이언트가 시퀀스 누락을 감지했을 때 전체 스냅샷 재전송"""
+    _emit_history_snapshot()
+
+def _emit_topic_snapshot(topic: str):
+    """요청한 클라이언트에게 토픽의 현재 상태 전송 (히스토리 토픽은 스냅샷)"""
+    resolution = _topic_resolution(topic)
+    with update_lock:
+        data = latest_data.copy()
+        seq = history_seq
+        if topic == f'{HISTORY_TOPIC_PREFIX}raw':
+            history_columns = _copy_history()
+        elif resolution is not None:
+            rollup = rollup_history.copy_latest(resolution, HISTORY_MAX_BUCKETS)
+    
+    if data['oracle_result'] is None:
+        return
+    if topic in TOPIC_FIELDS:
+        result = _topic_data(topic, data, seq, None, None)
+    else:
+        result = {'topic': topic, 'seq': seq, 'timestamp': data['timestamp'], 'snapshot': True}
+        if resolution is None:
+            result['history'] = _history_to_lists(history_columns)
+        else:
+            result.update(rollup_history.format_range(rollup))
+    _emit_to_client(result, 'topic_update')
+
+def _subscribe_topics(topics) -> dict:
+    """요청한 클라이언트의 토픽 구독 추가 후 새 토픽의 현재 상태 전송"""
+    requested = topics if isinstance(topics, list) else [topics]
+    added = []
+    invalid = []
+    for name in requested:
+        topic = _parse_topic(name)
+        if topic is None:
+            invalid.append(name)
+            continue
+        with update_lock:
+            subscribed = client_topics.setdefault(request.sid, set())
+            if topic in subscribed:
+                continue
+            subscribed.add(topic)
+            codec = client_codecs.get(request.sid)
+        broadcaster.subscribe(request.sid, _topic_room(topic, codec))
+        added.append(topic)
+    
+    for topic in added:
+        _emit_topic_snapshot(topic)
+    with update_lock:
+        current = sorted(client_topics.get(request.sid, ()))
+    return {'success': not invalid, 'topics': current, 'invalid': invalid}
+
+@socketio.on('subscribe')
+def handle_subscribe(message=None):
+    """
+    토픽 구독 추가 ({'topics': ['median', 'history:60', ...]})
+    
+    Returns:
+        ack {'success': bool, 'topics': 구독 중인 토픽 목록, 'invalid': 지원하지 않는 토픽 목록}
+    """
+    topics = message.get('topics', []) if isinstance(message, dict) else message
+    return _subscribe_topics(topics or [])
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(message=None):
+    """토픽 구독 해제 ({'topics': [...]}), ack로 남은 구독 목록 반환"""
+    topics = message.get('topics', []) if isinstance(message, dict) else message
+    topics = topics if isinstance(topics, list) else [topics]
+    for name in topics:
+        topic = _parse_topic(name)
+        if topic is None:
+            continue
+        with update_lock:
+            subscribed = client_topics.get(request.sid, set())
+            if topic not in subscribed:
+                continue
+            subscribed.discard(topic)
+            codec = client_codecs.get(request.sid)
+        broadcaster.unsubscribe(request.sid, _topic_room(topic, codec))
+    with update_lock:
+        current = sorted(client_topics.get(request.sid, ()))
+    return {'success': True, 'topics': current}
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """클라이언트 연결 해제"""
     print('클라이언트 연결 해제됨')
+    with update_lock:
+        client_history_modes.pop(request.sid, None)
+        client_codecs.pop(request.sid, None)
+        client_topics.pop(request.sid, None)
+    broadcaster.remove_client(request.sid)
+    if recompute_scheduler is not None:
+        recompute_scheduler.client_disconnected()
+
+def _set_manual_price(name: str, price) -> bool:
+    """수동 가격 설정 (web 역할은 수집기 제어 소켓으로 보내고 다음 틱에 반영), 수집기에 보내지 못하면 False"""
+    if oracle is None:
+        try:
+            send_control(SHM_NAME, f'manual_{name}', price)
+        except OSError as e:
+            print(f"수집기 제어 소켓 전송 실패: {e}")
+            return False
+    elif name == 'usdt_krw':
+        oracle.set_manual_usdt_krw(price)
+    else:
+        oracle.set_manual_eth_krw(price)
+    return True
 
 @app.route('/api/usdt-krw/manual', methods=['POST'])
 def set_manual_usdt_krw():
@@ -171,12 +1198,14 @@ def set_manual_usdt_krw():
     price = data.get('price')
     
     if price is None:
-        oracle.set_manual_usdt_krw(None)
+        if not _set_manual_price('usdt_krw', None):
+            return jsonify({'success': False, 'message': '수집기에 연결되지 않았습니다'}), 503
         return jsonify({'success': True, 'message': '수동 가격 해제됨'})
     
     try:
         price = float(price)
-        oracle.set_manual_usdt_krw(price)
+        if not _set_manual_price('usdt_krw', price):
+            return jsonify({'success': False, 'message': '수집기에 연결되지 않았습니다'}), 503
         return jsonify({'success': True, 'message': f'USDT/KRW 가격이 {price}로 설정됨'})
     except ValueError:
         return jsonify({'success': False, 'message': '잘못된 가격 형식'}), 400
@@ -184,7 +1213,7 @@ def set_manual_usdt_krw():
 @app.route('/api/usdt-krw/manual', methods=['GET'])
 def get_manual_usdt_krw():
     """USDT/KRW 수동 가격 조회"""
-    manual_price = oracle.get_manual_usdt_krw()
+    manual_price = _manual_prices()['usdt_krw']
     return jsonify({'manual_price': manual_price})
 
 @app.route('/api/eth-krw/manual', methods=['POST'])
@@ -194,12 +1223,14 @@ def set_manual_eth_krw():
     price = data.get('price')
     
     if price is None:
-        oracle.set_manual_eth_krw(None)
+        if not _set_manual_price('eth_krw', None):
+            return jsonify({'success': False, 'message': '수집기에 연결되지 않았습니다'}), 503
         return jsonify({'success': True, 'message': '수동 가격 해제됨'})
     
     try:
         price = float(price)
-        oracle.set_manual_eth_krw(price)
+        if not _set_manual_price('eth_krw', price):
+            return jsonify({'success': False, 'message': '수집기에 연결되지 않았습니다'}), 503
         return jsonify({'success': True, 'message': f'ETH/KRW 가격이 {price}로 설정됨'})
     except ValueError:
         return jsonify({'success': False, 'message': '잘못된 가격 형식'}), 400
@@ -207,12 +1238,14 @@ def set_manual_eth_krw():
 @app.route('/api/eth-krw/manual', methods=['GET'])
 def get_manual_eth_krw():
     """ETH/KRW 수동 가격 조회"""
-    manual_price = oracle.get_manual_eth_krw()
+    manual_price = _manual_prices()['eth_krw']
     return jsonify({'manual_price': manual_price})
 
 @app.route('/api/oracle/update', methods=['POST'])
 def force_update():
     """수동으로 가격 업데이트 강제 실행"""
+    if price_fetcher is None:
+        return _collector_only()
     try:
         prices = price_fetcher.get_all_prices()
         oracle_result = oracle.calculate_median_eth_krw_price(
@@ -220,48 +1253,88 @@ def force_update():
             upbit_usdt_krw=prices['upbit_usdt_krw'],
             overseas_eth_usdt=prices['overseas_eth_usdt'],
             use_manual_usdt_krw=oracle.manual_usdt_krw_override is not None,
-            use_manual_eth_krw=oracle.manual_eth_krw_override is not None
+            use_manual_eth_krw=oracle.manual_eth_krw_override is not None,
+            source_ages=prices['source_ages']
         )
         
-        timestamp = datetime.now().isoformat()
-        
-        with update_lock:
-            latest_data = {
-                'prices': prices,
-                'oracle_result': oracle_result,
-                'timestamp': timestamp,
-            }
-        
-        # 웹소켓으로도 브로드캐스트
-        data_to_send = {
-            'prices': prices,
-            'oracle_result': oracle_result,
-            'timestamp': timestamp,
-            'price_history': {
-                'timestamps': price_history['timestamps'].copy(),
-                'median_prices': price_history['median_prices'].copy(),
-                'upbit_eth_krw': price_history['upbit_eth_krw'].copy(),
-                'upbit_usdt_krw': price_history['upbit_usdt_krw'].copy(),
-            }
-        }
-        socketio.emit('price_update', data_to_send)
+        # 최신 데이터 갱신 및 웹소켓 브로드캐스트 (히스토리에는 기록하지 않음)
+        data = publish_update(prices, oracle_result, record_history=False)
         
-        return jsonify({'success': True, 'data': latest_data})
+        return jsonify({'success': True, 'data': data})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def warm_start():
+    """
+    틱 로그로 TWAP 윈도우와 차트 히스토리 복원
+    web 역할은 롤업을 채우기 위해 히스토리만 복원하고, 이후 행은 공유 메모리에서 이어받습니다.
+    collector 역할은 첫 게시 전(버전 0)이므로 웹 워커가 복원 중인 히스토리를 읽지 않습니다.
+    """
+    try:
+        with update_lock:
+            stats = restore_from_tick_log(
+                tick_log, oracle if oracle is not None else Oracle(), price_history, rollup_history,
+                history_seconds=HISTORY_MAX_HOURS * 3600
+            )
+        print(f"틱 로그 복원 완료: 오라클 레코드 {stats['oracle_records']}개 (시간 역행 {stats['skipped_records']}개 제외), "
+              f"TWAP {stats['twap_points']}개, 히스토리 {stats['history_points']}개 ({stats['duration_ms']:.1f}ms)")
+    except Exception as e:
+        print(f"틱 로그 복원 실패: {e}")
+
+def shutdown():
+    """백그라운드 스레드, 수집기, 틱 로그, 공유 메모리 정리"""
+    global running
+    running = False
+    broadcaster.stop()
+    if recompute_scheduler is not None:
+        recompute_scheduler.stop()
+    if price_fetcher is not None:
+        price_fetcher.close()
+    tick_log.close()
+    if snapshot_writer is not None:
+        snapshot_writer.close()
+    if control_listener is not None:
+        control_listener.close()
+
 if __name__ == '__main__':
-    # 백그라운드 스레드 시작
-    update_thread = threading.Thread(target=update_prices, daemon=True)
-    update_thread.start()
+    # 재시작 전 데이터 복원
+    warm_start()
     
-    print("가격 오라클 대시보드 시작...")
-    print("http://localhost:5100 에서 접속하세요.")
-    print("웹소켓을 사용하여 실시간 데이터를 전송합니다.")
+    # 백그라운드 스레드 시작 (web 역할은 async_mode에 맞는 스레드/그린 스레드)
+    if ROLE == 'web':
+        socketio.start_background_task(follow_collector)
+    else:
+        update_thread = threading.Thread(target=update_prices, daemon=True)
+        update_thread.start()
     
-    try:
-        socketio.run(app, host='0.0.0.0', port=5100, debug=True, allow_unsafe_werkzeug=True)
-    except KeyboardInterrupt:
-        running = False
-        print("서버 종료 중...")
+    if ROLE == 'collector':
+        # 웹 워커 접속 여부와 관계없이 계속 계산해 게시
+        recompute_scheduler.client_connected()
+        if control_listener is not None:
+            threading.Thread(target=apply_shared_control, daemon=True).start()
+        else:
+            print("경고: Unix 소켓을 쓸 수 없어 웹 워커의 수동 가격 설정을 받지 않습니다")
+        print(f"가격 수집기 시작... (공유 메모리: {SHM_NAME})")
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            print("수집기 종료 중...")
+        finally:
+            shutdown()
+    else:
+        broadcaster.start()
+        print("가격 오라클 대시보드 시작...")
+        print(f"http://localhost:{PORT} 에서 접속하세요.")
+        print("웹소켓을 사용하여 실시간 데이터를 전송합니다.")
+        if ROLE == 'web':
+            print(f"수집기 공유 메모리({SHM_NAME})의 스냅샷을 서빙합니다. (동시성 모드: {ASYNC_MODE})")
+        
+        try:
+            # 리로더는 끔: 리로더 부모 프로세스가 수집 스레드와 틱 로그 쓰기 잠금을 가져가면
+            # 실제로 클라이언트를 서빙하는 자식 프로세스의 히스토리가 기록되지 않음
+            socketio.run(app, host='0.0.0.0', port=PORT, debug=True, use_reloader=False, allow_unsafe_werkzeug=True)
+        except KeyboardInterrupt:
+            shutdown()
+            print("서버 종료 중...")
 
@@ -0,0 +1,221 @@
+"""
+다중 자산 가격 행렬
+심볼 × 해외 거래소 USDT 가격과 심볼별 국내(업비트) KRW 가격을 NumPy 배열로 보관합니다.
+수신 스레드는 배열의 해당 칸만 제자리에서 갱신하고,
+오라클은 스냅샷 하나로 모든 심볼의 KRW 변환, 역산, 중앙값을 배열 연산으로 한 번에 계산합니다.
+"""
+import threading
+import time
+import warnings
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# 기본 심볼 유니버스 (ORACLE_SYMBOLS 환경 변수로 변경 가능)
+DEFAULT_SYMBOLS = ('ETH', 'BTC', 'XRP', 'SOL')
+
+# 해외 거래소 견적 통화
+QUOTE = 'USDT'
+
+
+def parse_symbols(value: Optional[str]) -> tuple:
+    """'ETH,BTC, xrp' 형식 문자열을 심볼 튜플로 변환 (중복 제거, 순서 유지)"""
+    if not value:
+        return DEFAULT_SYMBOLS
+    symbols = []
+    for symbol in value.split(','):
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return tuple(symbols) or DEFAULT_SYMBOLS
+
+
+class AssetPriceMatrix:
+    """심볼 × 거래소 가격 행렬 클래스"""
+
+    def __init__(self, symbols: Sequence[str], venues: Sequence[str]):
+        """
+        Args:
+            symbols: 심볼 목록 (예: ['ETH', 'BTC'])
+            venues: 해외 거래소 이름 목록 (예: ['binance', 'okx'])
+        """
+        self.symbols = tuple(symbols)
+        self.venues = tuple(venues)
+        # 심볼/거래소 → 행/열 인덱스 (수신 메시지를 O(1)로 칸에 매핑)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.venue_index = {venue: j for j, venue in enumerate(self.venues)}
+
+        shape = (len(self.symbols), len(self.venues))
+        self.overseas_usdt = np.full(shape, np.nan)  # 심볼/USDT 가격
+        self.overseas_ts = np.zeros(shape)  # 갱신 시각 (epoch 초)
+        self.domestic_krw = np.full(len(self.symbols), np.nan)  # 업비트 심볼/KRW 가격
+        self.domestic_ts = np.zeros(len(self.symbols))
+
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def add_symbol(self, symbol: str) -> bool:
+        """심볼 행 추가 (이미 있으면 False)"""
+        with self._lock:
+            if symbol in self.symbol_index:
+                return False
+            self.symbols = self.symbols + (symbol,)
+            self.overseas_usdt = np.vstack((self.overseas_usdt, np.full((1, len(self.venues)), np.nan)))
+            self.overseas_ts = np.vstack((self.overseas_ts, np.zeros((1, len(self.venues)))))
+            self.domestic_krw = np.append(self.domestic_krw, np.nan)
+            self.domestic_ts = np.append(self.domestic_ts, 0.0)
+            self.symbol_index = {name: i for i, name in enumerate(self.symbols)}
+            self.version += 1
+        return True
+
+    def remove_symbol(self, symbol: str) -> bool:
+        """심볼 행 제거 (없으면 False)"""
+        with self._lock:
+            i = self.symbol_index.get(symbol)
+            if i is None:
+                return False
+            self.symbols = self.symbols[:i] + self.symbols[i + 1:]
+            self.overseas_usdt = np.delete(self.overseas_usdt, i, axis=0)
+            self.overseas_ts = np.delete(self.overseas_ts, i, axis=0)
+            self.domestic_krw = np.delete(self.domestic_krw, i)
+            self.domestic_ts = np.delete(self.domestic_ts, i)
+            self.symbol_index = {name: i for i, name in enumerate(self.symbols)}
+            self.version += 1
+        return True
+
+    def update_overseas(self, symbol: str, venue: str, price: float, timestamp: Optional[float] = None) -> bool:
+        """해외 거래소 가격 칸 갱신 (가격이 바뀌었는지 반환, 유니버스 밖이면 False)"""
+        j = self.venue_index.get(venue)
+        if j is None:
+            return False
+        with self._lock:
+            i = self.symbol_index.get(symbol)
+            if i is None:
+                return False
+            changed = self.overseas_usdt[i, j] != price
+            self.overseas_usdt[i, j] = price
+            self.overseas_ts[i, j] = timestamp if timestamp is not None else time.time()
+            self.version += 1
+        return bool(changed)
+
+    def update_domestic(self, symbol: str, price: float, timestamp: Optional[float] = None) -> bool:
+        """업비트 KRW 가격 칸 갱신 (가격이 바뀌었는지 반환, 유니버스 밖이면 False)"""
+        with self._lock:
+            i = self.symbol_index.get(symbol)
+            if i is None:
+                return False
+            changed = self.domestic_krw[i] != price
+            self.domestic_krw[i] = price
+            self.domestic_ts[i] = timestamp if timestamp is not None else time.time()
+            self.version += 1
+        return bool(changed)
+
+    def update_domestic_many(self, updates: Sequence[Tuple[str, float, Optional[float]]]) -> set:
+        """업비트 KRW 가격 여러 개를 락 한 번으로 갱신 (가격이 바뀐 심볼 반환)"""
+        changed = set()
+        now = time.time()
+        with self._lock:
+            for symbol, price, timestamp in updates:
+                i = self.symbol_index.get(symbol)
+                if i is None:
+                    continue
+                if self.domestic_krw[i] != price:
+                    changed.add(symbol)
+                self.domestic_krw[i] = price
+                self.domestic_ts[i] = timestamp if timestamp is not None else now
+            self.version += 1
+        return changed
+
+    def snapshot(self, max_age: Optional[float] = None, now: Optional[float] = None) -> Dict:
+        """
+        배열 복사본 (max_age보다 오래된 칸은 NaN으로 제외)
+
+        Returns:
+            {'version', 'symbols', 'venues', 'domestic_krw', 'overseas_usdt'}
+        """
+        with self._lock:
+            version = self.version
+            symbols = self.symbols
+            domestic = self.domestic_krw.copy()
+            overseas = self.overseas_usdt.copy()
+            domestic_ts = self.domestic_ts.copy()
+            overseas_ts = self.overseas_ts.copy()
+
+        if max_age is not None:
+            if now is None:
+                now = time.time()
+            domestic[now - domestic_ts >= max_age] = np.nan
+            overseas[now - overseas_ts >= max_age] = np.nan
+
+        return {
+            'version': version,
+            'symbols': symbols,
+            'venues': self.venues,
+            'domestic_krw': domestic,
+            'overseas_usdt': overseas,
+        }
+
+
+def compute_krw_prices(
+    domestic_krw: np.ndarray,
+    overseas_usdt: np.ndarray,
+    usdt_krw: Union[float, np.ndarray, None],
+    inverse: bool
+) -> Dict[str, np.ndarray]:
+    """
+    모든 심볼의 KRW 기준 가격을 한 번에 계산
+
+    정상 모드: 해외 심볼/USDT × USDT/KRW
+    역산 모드: 심볼마다 업비트 심볼/KRW ÷ 해외 심볼/USDT 의 평균으로 USDT/KRW를 역산한 뒤 변환
+    중앙값은 [업비트 가격, 변환된 해외 가격들] 중 NaN이 아닌 값으로 계산합니다.
+    usdt_krw에 행별 배열을 넘기면 행마다 다른 USDT/KRW를 사용합니다 (예: 시점 × 거래소 시계열).
+
+    Returns:
+        {
+            'converted_krw': (심볼, 거래소) 변환 가격,
+            'usdt_krw_used': (심볼,) 사용한 USDT/KRW,
+            'median_krw': (심볼,) 중앙값 (데이터 없으면 NaN),
+            'source_count': (심볼,) 중앙값에 사용한 가격 수,
+        }
+    """
+    with warnings.catch_warnings():
+        # 데이터가 전혀 없는 행의 nanmean 경고는 NaN 결과로 대신함
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        if inverse:
+            usdt_krw_used = np.nanmean(domestic_krw[:, None] / overseas_usdt, axis=1)
+        else:
+            usdt_krw_used = np.full(domestic_krw.shape, np.nan if usdt_krw is None else usdt_krw)
+
+        converted = overseas_usdt * usdt_krw_used[:, None]
+        candidates = np.concatenate((domestic_krw[:, None], converted), axis=1)
+
+    # 행별 NaN 제외 중앙값 (np.nanmedian은 행이 짧을 때 느리므로 정렬 후 가운데 값 선택, NaN은 뒤로 정렬됨)
+    counts = np.count_nonzero(~np.isnan(candidates), axis=1)
+    ordered = np.sort(candidates, axis=1)
+    lower = np.maximum((counts - 1) // 2, 0)[:, None]
+    upper = (counts // 2)[:, None]
+    median = (np.take_along_axis(ordered, lower, axis=1) + np.take_along_axis(ordered, upper, axis=1))[:, 0] / 2
+    median[counts == 0] = np.nan
+
+    return {
+        'converted_krw': converted,
+        'usdt_krw_used': usdt_krw_used,
+        'median_krw': median,
+        'source_count': counts,
+    }
+
+
+if __name__ == '__main__':
+    # 테스트
+    matrix = AssetPriceMatrix(['ETH', 'BTC', 'DOGE'], ['binance', 'okx', 'coinbase'])
+    for venue, eth, btc in (('binance', 3000, 60000), ('okx', 3001, 60010), ('coinbase', 2999, 59990)):
+        matrix.update_overseas('ETH', venue, eth)
+        matrix.update_overseas('BTC', venue, btc)
+    matrix.update_domestic('ETH', 5_000_000)
+    matrix.update_domestic('BTC', 100_000_000)
+
+    snapshot = matrix.snapshot(max_age=5)
+    for inverse in (False, True):
+        result = compute_krw_prices(snapshot['domestic_krw'], snapshot['overseas_usdt'], 1300.0, inverse)
+        print('inverse' if inverse else 'normal', result['median_krw'], result['usdt_krw_used'], result['source_count'])
@@ -0,0 +1,90 @@
+"""
+다중 자산 가격 행렬 벤치마크
+100개 심볼 × 6개 거래소에서 틱 하나당 오라클 계산 비용을 측정합니다.
+
+    python benchmarks/bench_asset_matrix.py [--symbols 100] [--venues 6] [--iterations 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_matrix import AssetPriceMatrix, compute_krw_prices  # noqa: E402
+from oracle import Oracle  # noqa: E402
+
+VENUES = ('binance', 'okx', 'bybit', 'coinbase', 'kraken', 'gate', 'kucoin', 'htx')
+
+
+def build_matrix(num_symbols: int, num_venues: int):
+    """무작위 가격으로 채운 행렬과 심볼별 USDT 기준 가격"""
+    symbols = [f'SYM{i:03d}' for i in range(num_symbols)]
+    venues = list(VENUES[:num_venues]) + [f'venue{i}' for i in range(num_venues - len(VENUES))]
+    matrix = AssetPriceMatrix(symbols, venues)
+    base_prices = {symbol: random.uniform(0.1, 50000) for symbol in symbols}
+    for symbol, base in base_prices.items():
+        matrix.update_domestic(symbol, base * 1300 * random.uniform(1.0, 1.05))
+        for venue in venues:
+            matrix.update_overseas(symbol, venue, base * random.uniform(0.999, 1.001))
+    return matrix, base_prices
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--venues', type=int, default=6)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    matrix, base_prices = build_matrix(args.symbols, args.venues)
+    oracle = Oracle()
+    oracle.add_usdt_krw_price(1300.0)
+    snapshot = matrix.snapshot()
+
+    # 수신 스레드의 칸 갱신 (메시지 하나당)
+    symbol, venue = matrix.symbols[0], matrix.venues[0]
+    update_us = per_call_us(lambda: matrix.update_overseas(symbol, venue, random.random()), args.iterations * 10)
+
+    results = {
+        '칸 갱신 (메시지당)': update_us,
+        '스냅샷 복사': per_call_us(lambda: matrix.snapshot(max_age=5), args.iterations),
+        '배열 계산 (정상 모드)': per_call_us(
+            lambda: compute_krw_prices(snapshot['domestic_krw'], snapshot['overseas_usdt'], 1300.0, False),
+            args.iterations),
+        '배열 계산 (역산 모드)': per_call_us(
+            lambda: compute_krw_prices(snapshot['domestic_krw'], snapshot['overseas_usdt'], 1300.0, True),
+            args.iterations),
+        '틱 전체 (스냅샷 + 계산 + 응답 변환)': per_call_us(
+            lambda: oracle.calculate_median_krw_prices(matrix.snapshot(max_age=5), 1300.0),
+            args.iterations),
+    }
+
+    # 비교: 심볼마다 기존 스칼라 경로(calculate_median_eth_krw_price)를 호출
+    domestic = snapshot['domestic_krw'].tolist()
+    overseas = [dict(zip(matrix.venues, row)) for row in snapshot['overseas_usdt'].tolist()]
+    scalar_oracle = Oracle()
+
+    def scalar_tick():
+        for i in range(len(matrix.symbols)):
+            scalar_oracle.calculate_median_eth_krw_price(domestic[i], 1300.0, overseas[i])
+
+    results['스칼라 경로 (심볼별 루프)'] = per_call_us(scalar_tick, max(args.iterations // 10, 1))
+
+    print(f"심볼 {args.symbols}개 × 거래소 {args.venues}개, 반복 {args.iterations}회")
+    for name, value in results.items():
+        print(f"  {name:<32} {value:10.1f} µs")
+    print(f"  배열 경로 속도 향상: {results['스칼라 경로 (심볼별 루프)'] / results['틱 전체 (스냅샷 + 계산 + 응답 변환)']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
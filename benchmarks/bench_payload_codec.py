@@ -0,0 +1,110 @@
+"""
+페이로드 인코딩 벤치마크
+틱 하나의 delta 페이로드와 전체 히스토리 페이로드를 표준 json, orjson, MessagePack으로 인코딩할 때의
+인코딩 시간과 바이트 수, 그리고 클라이언트 수만큼 매번 인코딩할 때와 한 번만 인코딩할 때의 비용을 비교합니다.
+
+    python benchmarks/bench_payload_codec.py [--points 10000] [--clients 100] [--iterations 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payload_codec import (  # noqa: E402
+    MSGPACK_AVAILABLE, ORJSON_AVAILABLE, EncodedPayload, encode_json, encode_msgpack,
+)
+
+
+def build_payloads(points: int):
+    """오라클 틱과 같은 형태의 delta / full 페이로드"""
+    now = time.time()
+    prices = {
+        'upbit_eth_krw': 5_000_000.0,
+        'upbit_usdt_krw': 1400.0,
+        'overseas_eth_usdt': {name: 3500.0 + random.random() for name in ('binance', 'okx', 'bybit', 'coinbase', 'kraken')},
+        'timestamp': '2024-01-01T00:00:00',
+        'collection_metadata': {'collection_duration_ms': 0.05, 'max_timestamp_diff_ms': 12.3, 'price_book_version': 42},
+    }
+    details = [('upbit', 5_000_000.0)] + [(f'{name} (Converted)', price * 1400.0)
+                                          for name, price in prices['overseas_eth_usdt'].items()]
+    oracle_result = {
+        'median_price': 4_900_000.0,
+        'prices_used': [price for _, price in details],
+        'calculation_method': 'normal',
+        'usdt_krw_used': 1400.0,
+        'usdt_krw_original': 1400.0,
+        'inverse_usdt_krw': None,
+        'is_volatile': False,
+        'twap': 1399.5,
+        'price_details': details,
+    }
+    delta = {
+        'prices': prices,
+        'oracle_result': oracle_result,
+        'timestamp': '2024-01-01T00:00:00',
+        'history_seq': 1,
+        'price_history_delta': {'timestamps': [now], 'median_prices': [4_900_000.0],
+                                'upbit_eth_krw': [5_000_000.0], 'upbit_usdt_krw': [1400.0], 'evicted': 1},
+    }
+    full = dict(delta)
+    del full['price_history_delta']
+    full['price_history'] = {
+        'timestamps': [now - points + i for i in range(points)],
+        'median_prices': [4_900_000.0 + random.uniform(-5000, 5000) for _ in range(points)],
+        'upbit_eth_krw': [5_000_000.0 + random.uniform(-5000, 5000) for _ in range(points)],
+        'upbit_usdt_krw': [1400.0 + random.uniform(-5, 5) for _ in range(points)],
+    }
+    return {'delta': delta, 'full': full}
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=10000, help='전체 히스토리 포인트 수')
+    parser.add_argument('--clients', type=int, default=100, help='팬아웃 비교용 클라이언트 수')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(42)
+    payloads = build_payloads(args.points)
+    encoders = {'stdlib json': lambda obj: json.dumps(obj).encode('utf-8')}
+    if ORJSON_AVAILABLE:
+        encoders['orjson'] = encode_json
+    if MSGPACK_AVAILABLE:
+        encoders['msgpack'] = encode_msgpack
+
+    print(f"히스토리 {args.points}포인트, 반복 {args.iterations}회")
+    for name, payload in payloads.items():
+        iterations = args.iterations * 10 if name == 'delta' else args.iterations
+        print(f"[{name}]")
+        for encoder_name, encoder in encoders.items():
+            size = len(encoder(payload))
+            elapsed = per_call_us(lambda: encoder(payload), iterations)
+            print(f"  {encoder_name:<12} {elapsed:10.1f} µs  {size:>10,} bytes")
+
+    # 팬아웃: 클라이언트마다 인코딩 vs 틱당 한 번 인코딩 후 바이트 재사용
+    delta = payloads['delta']
+    per_client = per_call_us(lambda: [json.dumps(delta) for _ in range(args.clients)], args.iterations)
+
+    def encode_once():
+        payload = EncodedPayload(delta, 'delta')
+        return [payload.encode() for _ in range(args.clients)]
+
+    once = per_call_us(encode_once, args.iterations)
+    print(f"[팬아웃 {args.clients}명, delta]")
+    print(f"  클라이언트마다 stdlib json  {per_client:10.1f} µs/틱")
+    print(f"  틱당 1회 인코딩            {once:10.1f} µs/틱")
+
+
+if __name__ == '__main__':
+    main()
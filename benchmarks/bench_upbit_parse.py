@@ -0,0 +1,207 @@
+"""
+업비트 웹소켓 메시지 파싱 벤치마크
+기록된 업비트 티커 프레임으로 기존 경로(표준 json + DEFAULT 필드 폴백 + 키마다 락)와
+빠른 경로(SIMPLE 포맷 + orjson + 필요한 필드만 추출 + 묶음 반영)의 코어당 초당 처리 메시지 수를 비교합니다.
+
+    python benchmarks/bench_upbit_parse.py                        # 합성 프레임 사용
+    python benchmarks/bench_upbit_parse.py --record 2000 --frames frames.jsonl   # 실제 프레임 기록 (SIMPLE)
+    python benchmarks/bench_upbit_parse.py --frames frames.jsonl  # 기록된 프레임 사용
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_matrix import AssetPriceMatrix  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from price_book import PriceBook  # noqa: E402
+from price_fetcher import ORJSON_AVAILABLE, PriceFetcher, parse_upbit_frame  # noqa: E402
+from source_health import SourceHealth  # noqa: E402
+
+# DEFAULT 포맷 필드명 → SIMPLE 포맷 필드명
+FIELDS = {
+    'type': 'ty', 'code': 'cd', 'opening_price': 'op', 'high_price': 'hp', 'low_price': 'lp',
+    'trade_price': 'tp', 'prev_closing_price': 'pcp', 'change': 'c', 'change_price': 'cp',
+    'signed_change_price': 'scp', 'change_rate': 'cr', 'signed_change_rate': 'scr',
+    'trade_volume': 'tv', 'acc_trade_volume': 'atv', 'acc_trade_volume_24h': 'atv24h',
+    'acc_trade_price': 'atp', 'acc_trade_price_24h': 'atp24h', 'trade_date': 'tdt', 'trade_time': 'ttm',
+    'trade_timestamp': 'ttms', 'ask_bid': 'ab', 'acc_ask_volume': 'aav', 'acc_bid_volume': 'abv',
+    'highest_52_week_price': 'h52wp', 'highest_52_week_date': 'h52wdt', 'lowest_52_week_price': 'l52wp',
+    'lowest_52_week_date': 'l52wdt', 'market_state': 'ms', 'is_trading_suspended': 'its',
+    'delisting_date': 'dd', 'market_warning': 'mw', 'timestamp': 'tms', 'stream_type': 'st',
+}
+
+CODES = ('KRW-ETH', 'KRW-USDT', 'KRW-BTC', 'KRW-XRP', 'KRW-SOL')
+
+
+def synthesize_frames(count: int, simple: bool) -> list:
+    """업비트 티커와 같은 필드 구성의 합성 프레임"""
+    frames = []
+    now_ms = int(time.time() * 1000)
+    for i in range(count):
+        price = round(5_000_000 + random.uniform(-10000, 10000), 0)
+        ticker = {
+            'type': 'ticker', 'code': random.choice(CODES), 'opening_price': 4_950_000.0,
+            'high_price': 5_100_000.0, 'low_price': 4_900_000.0, 'trade_price': price,
+            'prev_closing_price': 4_950_000.0, 'change': 'RISE', 'change_price': 50000.0,
+            'signed_change_price': 50000.0, 'change_rate': 0.0101, 'signed_change_rate': 0.0101,
+            'trade_volume': 0.0123, 'acc_trade_volume': 12345.678, 'acc_trade_volume_24h': 23456.789,
+            'acc_trade_price': 61728390000.123, 'acc_trade_price_24h': 117283950000.456,
+            'trade_date': '20240101', 'trade_time': '000000', 'trade_timestamp': now_ms + i,
+            'ask_bid': 'BID', 'acc_ask_volume': 6000.1, 'acc_bid_volume': 6345.5,
+            'highest_52_week_price': 6_000_000.0, 'highest_52_week_date': '2023-12-01',
+            'lowest_52_week_price': 2_000_000.0, 'lowest_52_week_date': '2023-01-01',
+            'market_state': 'ACTIVE', 'is_trading_suspended': False, 'delisting_date': None,
+            'market_warning': 'NONE', 'timestamp': now_ms + i, 'stream_type': 'REALTIME',
+        }
+        if simple:
+            ticker = {FIELDS[key]: value for key, value in ticker.items()}
+        frames.append(json.dumps(ticker).encode('utf-8'))
+    return frames
+
+
+async def record_frames(path: str, count: int):
+    """업비트 웹소켓에서 SIMPLE 포맷 티커 프레임을 기록 (한 줄에 프레임 하나)"""
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect('wss://api.upbit.com/websocket/v1') as ws:
+            await ws.send_str(json.dumps([
+                {'ticket': str(uuid.uuid4())},
+                {'type': 'ticker', 'codes': list(CODES)},
+                {'format': 'SIMPLE'},
+            ]))
+            with open(path, 'wb') as f:
+                for _ in range(count):
+                    msg = await ws.receive()
+                    if msg.type not in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                        break
+                    data = msg.data if isinstance(msg.data, bytes) else msg.data.encode('utf-8')
+                    f.write(data.replace(b'\n', b'') + b'\n')
+
+
+def to_default_format(frames: list) -> list:
+    """SIMPLE 프레임을 기존 경로용 DEFAULT 포맷으로 변환"""
+    reverse = {short: long for long, short in FIELDS.items()}
+    return [json.dumps({reverse.get(key, key): value for key, value in json.loads(frame).items()}).encode('utf-8')
+            for frame in frames]
+
+
+def legacy_handler():
+    """기존 경로: json.loads + 긴/짧은 필드명 폴백 + 키마다 락"""
+    price_cache = {}
+    cache_timestamp = {}
+    lock = threading.Lock()
+
+    def process(data):
+        code = data.get('code') or data.get('cd')
+        if not code:
+            return
+        price = data.get('trade_price') or data.get('tp')
+        if price is None:
+            return
+        price = float(price)
+        timestamp_ms = data.get('timestamp') or data.get('tms')
+        timestamp = float(timestamp_ms) / 1000.0 if timestamp_ms else time.time()
+        data.get('stream_type') or data.get('st', 'REALTIME')
+        if code == 'KRW-ETH':
+            cache_key = 'upbit_eth_krw'
+        elif code == 'KRW-USDT':
+            cache_key = 'upbit_usdt_krw'
+        else:
+            return
+        with lock:
+            price_cache.get(cache_key) != price
+            price_cache[cache_key] = price
+            cache_timestamp[cache_key] = timestamp
+
+    def handle(message):
+        data = json.loads(message)
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict) and (item.get('type') or item.get('ty')) == 'ticker':
+                    process(item)
+        elif isinstance(data, dict) and (data.get('type') or data.get('ty')) == 'ticker':
+            process(data)
+
+    return handle
+
+
+def fast_handler(batch: int):
+    """빠른 경로: parse_upbit_frame + batch개 프레임마다 가격 장부/행렬에 묶음 반영"""
+    fetcher = SimpleNamespace(
+        asset_matrix=AssetPriceMatrix(['ETH', 'BTC', 'XRP', 'SOL'], ['binance']),
+        price_book=PriceBook(),
+        metrics=MetricsRegistry(),
+        lag_histograms={},
+        upbit_health=SourceHealth('upbit'),
+        _notify_tick=lambda cache_key, price, timestamp: None,
+    )
+    fetcher._lag_histogram = lambda cache_key: PriceFetcher._lag_histogram(fetcher, cache_key)
+    fetcher.upbit_routes = {f'KRW-{symbol}': (symbol, f'upbit_{symbol.lower()}_krw', symbol == 'ETH')
+                            for symbol in fetcher.asset_matrix.symbols}
+    fetcher.upbit_routes['KRW-USDT'] = ('USDT', 'upbit_usdt_krw', True)
+    pending = []
+
+    def handle(message):
+        pending.extend(parse_upbit_frame(message))
+        if len(pending) >= batch:
+            PriceFetcher._apply_upbit_ticks(fetcher, pending)
+            pending.clear()
+
+    return handle
+
+
+def messages_per_second(handle, frames: list, repeat: int) -> float:
+    """단일 스레드 CPU 시간 기준 초당 처리 메시지 수"""
+    started = time.process_time()
+    for _ in range(repeat):
+        for frame in frames:
+            handle(frame)
+    return len(frames) * repeat / (time.process_time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', help='기록된 SIMPLE 프레임 파일 (한 줄에 프레임 하나)')
+    parser.add_argument('--record', type=int, default=0, help='업비트에서 프레임을 기록할 개수 (--frames 경로에 저장)')
+    parser.add_argument('--count', type=int, default=5000, help='합성 프레임 수')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=8, help='빠른 경로의 묶음 반영 크기')
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.frames:
+            parser.error('--record에는 --frames 경로가 필요합니다')
+        asyncio.run(record_frames(args.frames, args.record))
+        print(f"프레임 {args.record}개 기록: {args.frames}")
+
+    random.seed(42)
+    if args.frames:
+        with open(args.frames, 'rb') as f:
+            simple_frames = [line.rstrip(b'\n') for line in f if line.strip()]
+        source = args.frames
+    else:
+        simple_frames = synthesize_frames(args.count, simple=True)
+        source = '합성'
+    default_frames = to_default_format(simple_frames)
+
+    print(f"프레임 {len(simple_frames)}개 ({source}), 반복 {args.repeat}회, orjson {'사용' if ORJSON_AVAILABLE else '없음'}")
+    print(f"  평균 프레임 크기: DEFAULT {sum(map(len, default_frames)) / len(default_frames):.0f} bytes, "
+          f"SIMPLE {sum(map(len, simple_frames)) / len(simple_frames):.0f} bytes")
+    legacy = messages_per_second(legacy_handler(), default_frames, args.repeat)
+    fast = messages_per_second(fast_handler(args.batch), simple_frames, args.repeat)
+    print(f"  기존 경로 (DEFAULT + json)      {legacy:12,.0f} msg/s/core")
+    print(f"  빠른 경로 (SIMPLE + 묶음 {args.batch:>2})     {fast:12,.0f} msg/s/core  ({fast / legacy:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+벤치마크 결과 비교
+benchmarks/suite.py로 저장한 두 결과(JSON)의 항목별 중앙값을 비교해 회귀를 찾습니다.
+기준보다 threshold 이상 느려진 항목이 있으면 종료 코드 1을 반환하므로 CI에서 사용할 수 있습니다.
+
+    python benchmarks/suite.py --output base.json      # 기준 커밋에서
+    python benchmarks/suite.py --output head.json      # 변경 커밋에서
+    python benchmarks/compare.py base.json head.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base: Dict, head: Dict, threshold: float = 0.1, metric: str = 'median_ns') -> List[Dict]:
+    """
+    항목별 비교 (ratio = head / base, 1보다 크면 느려짐)
+
+    Returns:
+        [{'name', 'base_ns', 'head_ns', 'ratio', 'status'}, ...]
+        status: 'regression' | 'improvement' | 'same' | 'added' | 'removed'
+    """
+    base_results = base['benchmarks']
+    head_results = head['benchmarks']
+    rows = []
+    for name in list(base_results) + [name for name in head_results if name not in base_results]:
+        base_value = base_results.get(name, {}).get(metric)
+        head_value = head_results.get(name, {}).get(metric)
+        if base_value is None or head_value is None:
+            rows.append({'name': name, 'base_ns': base_value, 'head_ns': head_value, 'ratio': None,
+                         'status': 'added' if base_value is None else 'removed'})
+            continue
+        ratio = head_value / base_value if base_value > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'same'
+        rows.append({'name': name, 'base_ns': base_value, 'head_ns': head_value, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def _format_us(value) -> str:
+    return '-' if value is None else f'{value / 1000:.2f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help='기준 결과 (JSON)')
+    parser.add_argument('head', help='비교할 결과 (JSON)')
+    parser.add_argument('--threshold', type=float, default=0.1, help='회귀로 판단할 느려짐 비율 (0.1 = 10%%)')
+    parser.add_argument('--metric', default='median_ns', choices=('median_ns', 'min_ns', 'p95_ns', 'mean_ns'))
+    args = parser.parse_args()
+
+    base = load(args.base)
+    head = load(args.head)
+    for label, report in (('base', base), ('head', head)):
+        env = report.get('environment', {})
+        commit = (env.get('commit') or '?')[:10] + (' (dirty)' if env.get('dirty') else '')
+        print(f"{label}: {commit}  python {env.get('python')}  {env.get('machine')}  cpu {env.get('cpu_count')}")
+    if base.get('environment', {}).get('machine') != head.get('environment', {}).get('machine'):
+        print("⚠️ 경고: 서로 다른 머신의 결과입니다")
+
+    rows = compare(base, head, args.threshold, args.metric)
+    marks = {'regression': '▲ 느려짐', 'improvement': '▼ 빨라짐', 'same': '', 'added': '추가', 'removed': '제거'}
+    print(f"\n{'항목':<44} {'base µs':>12} {'head µs':>12} {'비율':>8}")
+    for row in rows:
+        ratio = '-' if row['ratio'] is None else f"{row['ratio']:.2f}x"
+        print(f"{row['name']:<44} {_format_us(row['base_ns']):>12} {_format_us(row['head_ns']):>12} "
+              f"{ratio:>8}  {marks[row['status']]}")
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    print(f"\n회귀 {len(regressions)}개 (기준 {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
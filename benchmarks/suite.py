@@ -0,0 +1,428 @@
+"""
+핫 패스 벤치마크 모음
+네트워크 없이 합성 데이터로 오라클 계산, TWAP, 가격 수집, 히스토리, 업비트 파싱, 페이로드 인코딩, 메트릭 기록 비용을 측정하고
+결과를 JSON으로 저장합니다. 커밋 간 비교는 benchmarks/compare.py를 사용합니다.
+
+    python benchmarks/suite.py --output bench.json               # 전체 실행
+    python benchmarks/suite.py --filter twap --filter oracle     # 이름에 포함된 항목만
+    python benchmarks/suite.py --list                             # 항목 목록
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_asset_matrix import build_matrix  # noqa: E402
+from bench_payload_codec import build_payloads  # noqa: E402
+from bench_upbit_parse import fast_handler, legacy_handler, synthesize_frames  # noqa: E402
+
+from clock import ManualClock  # noqa: E402
+from metrics import LatencyHistogram, MetricsRegistry  # noqa: E402
+from oracle import Oracle  # noqa: E402
+from order_book import OrderBook, book_price  # noqa: E402
+from payload_codec import (  # noqa: E402
+    MSGPACK_AVAILABLE, ORJSON_AVAILABLE, EncodedPayload, encode_json, encode_msgpack,
+)
+from price_book import PriceBook  # noqa: E402
+from price_fetcher import PriceFetcher, parse_upbit_frame  # noqa: E402
+from ring_buffer import ColumnarRingBuffer  # noqa: E402
+from rollup import RollupHistory  # noqa: E402
+from source_health import SourceHealthRegistry  # noqa: E402
+from twap import calculate_twap_full_scan  # noqa: E402
+
+VENUES = ('binance', 'okx', 'bybit', 'coinbase', 'kraken')
+
+# app.py의 히스토리 설정과 같은 값
+HISTORY_SERIES = ('timestamps', 'median_prices', 'upbit_eth_krw', 'upbit_usdt_krw')
+HISTORY_MAX_POINTS = 10000
+HISTORY_MAX_HOURS = 24
+
+# 항목 등록 테이블: [(이름, 준비 함수)] (준비 함수는 측정할 호출 하나를 반환)
+BENCHMARKS: List[Tuple[str, Callable[[], Callable[[], object]]]] = []
+
+
+def benchmark(name: str):
+    """벤치마크 항목 등록 데코레이터"""
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def measure(op: Callable[[], object], min_time: float = 0.02, repeat: int = 15) -> Dict:
+    """
+    호출 하나의 비용 측정 (timeit과 같이 GC를 끄고, 한 라운드가 min_time 이상이 되도록 반복 횟수를 맞춤)
+
+    Returns:
+        {'median_ns', 'min_ns', 'p95_ns', 'mean_ns', 'stdev_ns', 'ops_per_sec', 'number', 'repeat'}
+    """
+    def run(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        return time.perf_counter() - started
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            elapsed = run(number)
+            if elapsed >= min_time:
+                break
+            number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+        samples = sorted(run(number) / number * 1e9 for _ in range(repeat))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    median = statistics.median(samples)
+    return {
+        'median_ns': round(median, 1),
+        'min_ns': round(samples[0], 1),
+        'p95_ns': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+        'mean_ns': round(statistics.fmean(samples), 1),
+        'stdev_ns': round(statistics.stdev(samples), 1) if len(samples) > 1 else 0.0,
+        'ops_per_sec': round(1e9 / median, 1),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 오라클
+# ---------------------------------------------------------------------------
+
+def _oracle_tick(volatility_threshold: float):
+    """1초 간격 틱으로 TWAP 윈도우가 채워진 상태의 calculate_median_eth_krw_price 호출"""
+    clock = ManualClock(1_700_000_000.0)
+    oracle = Oracle(twap_window_seconds=300, volatility_threshold=volatility_threshold, clock=clock)
+    for _ in range(300):
+        clock.advance(1.0)
+        oracle.add_usdt_krw_price(1400.0 + random.uniform(-1, 1))
+    overseas = {venue: 3500.0 + random.uniform(-1, 1) for venue in VENUES}
+
+    def op():
+        clock.advance(1.0)
+        return oracle.calculate_median_eth_krw_price(5_000_000.0, 1400.0, overseas)
+    return op
+
+
+@benchmark('oracle.median_eth_krw.normal')
+def bench_oracle_normal():
+    return _oracle_tick(0.05)
+
+
+@benchmark('oracle.median_eth_krw.inverse')
+def bench_oracle_inverse():
+    # 임계값이 음수면 항상 변동성 구간으로 판단되어 역산 모드로 계산
+    return _oracle_tick(-1.0)
+
+
+def _twap_setup(points: int, full_scan: bool):
+    """히스토리가 points개인 상태의 TWAP 계산"""
+    clock = ManualClock(1_700_000_000.0)
+    oracle = Oracle(twap_window_seconds=points * 10, clock=clock)
+    for _ in range(points):
+        clock.advance(1.0)
+        oracle.add_usdt_krw_price(1400.0 + random.uniform(-5, 5))
+    if full_scan:
+        history = list(oracle.usdt_krw_history)
+        now = clock.time()
+        return lambda: calculate_twap_full_scan(history, now)
+    return oracle.calculate_twap
+
+
+for _points in (100, 1000, 10000, 100000):
+    benchmark(f'oracle.calculate_twap[history={_points}]')(lambda points=_points: _twap_setup(points, False))
+for _points in (100, 1000, 10000):
+    benchmark(f'twap.full_scan[history={_points}]')(lambda points=_points: _twap_setup(points, True))
+
+
+# ---------------------------------------------------------------------------
+# 가격 수집
+# ---------------------------------------------------------------------------
+
+class _StubRestPool:
+    """네트워크 없이 갱신 요청만 받는 REST 폴백 풀 (장애 중처럼 모든 요청이 이미 조회 중)"""
+
+    def refresh(self, requests, callback):
+        return 0
+
+
+def _stub_fetcher(stale: bool) -> PriceFetcher:
+    """웹소켓과 REST 클라이언트 없이 가격 장부만 채운 PriceFetcher"""
+    fetcher = PriceFetcher.__new__(PriceFetcher)
+    fetcher.price_book = PriceBook()
+    fetcher.cache_max_age = 5
+    fetcher.max_source_age = 30.0
+    fetcher.overseas_exchanges = [(venue, None) for venue in VENUES]
+    fetcher.rest_pool = _StubRestPool()
+    fetcher.health = SourceHealthRegistry()
+    # 오래된 장부는 최대 나이를 넘긴 타임스탬프로 채워 모든 소스가 갱신 요청 후 제외됨
+    timestamp = time.time() - (3600 if stale else 0)
+    updates = [('upbit_eth_krw', 5_000_000.0, timestamp), ('upbit_usdt_krw', 1400.0, timestamp)]
+    updates += [(f'{venue}_eth_usdt', 3500.0 + random.random(), timestamp) for venue in VENUES]
+    fetcher.price_book.update_many(updates)
+    return fetcher
+
+
+@benchmark('price_fetcher.get_all_prices[fresh]')
+def bench_get_all_prices_fresh():
+    fetcher = _stub_fetcher(stale=False)
+    fetcher.cache_max_age = float('inf')  # 측정 중에 캐시가 만료되지 않음
+    return fetcher.get_all_prices
+
+
+@benchmark('price_fetcher.get_all_prices[stale]')
+def bench_get_all_prices_stale():
+    return _stub_fetcher(stale=True).get_all_prices
+
+
+# ---------------------------------------------------------------------------
+# 히스토리
+# ---------------------------------------------------------------------------
+
+def _full_history():
+    """24시간 보관 기준으로 가득 찬 price_history와 롤업"""
+    price_history = ColumnarRingBuffer(HISTORY_SERIES, capacity=HISTORY_MAX_POINTS)
+    rollup_history = RollupHistory()
+    clock = ManualClock(1_700_000_000.0)
+    # 8.64초 간격이면 10000포인트가 24시간을 채움
+    step = HISTORY_MAX_HOURS * 3600 / HISTORY_MAX_POINTS
+    for _ in range(HISTORY_MAX_POINTS):
+        clock.advance(step)
+        median = 4_900_000.0 + random.uniform(-5000, 5000)
+        price_history.append((clock.time(), median, 5_000_000.0, 1400.0))
+        rollup_history.add(clock.time(), {'median_prices': median, 'upbit_eth_krw': 5_000_000.0,
+                                          'upbit_usdt_krw': 1400.0})
+    return price_history, rollup_history, clock, step
+
+
+@benchmark('history.append_trim[24h]')
+def bench_history_append_trim():
+    price_history, rollup_history, clock, step = _full_history()
+
+    def op():
+        # app._append_history와 같은 순서: 추가 (용량 초과 시 덮어씀) → 롤업 → 24시간 이전 제거
+        clock.advance(step)
+        timestamp = clock.time()
+        median = 4_900_000.0 + random.uniform(-5000, 5000)
+        evicted = price_history.append((timestamp, median, 5_000_000.0, 1400.0))
+        rollup_history.add(timestamp, {'median_prices': median, 'upbit_eth_krw': 5_000_000.0,
+                                       'upbit_usdt_krw': 1400.0})
+        cutoff = timestamp - HISTORY_MAX_HOURS * 3600
+        evicted += price_history.evict_before(cutoff)
+        rollup_history.evict_before(cutoff)
+        return evicted
+    return op
+
+
+@benchmark('history.copy_full[24h]')
+def bench_history_copy():
+    price_history, _, _, _ = _full_history()
+    return lambda: {key: column.tolist() for key, column in price_history.copy_columns().items()}
+
+
+# ---------------------------------------------------------------------------
+# 업비트 메시지 파싱 (프레임 하나당)
+# ---------------------------------------------------------------------------
+
+def _cycle_frames(handle: Callable, simple: bool):
+    frames = itertools.cycle(synthesize_frames(2000, simple=simple))
+    return lambda: handle(next(frames))
+
+
+@benchmark('upbit.parse[simple]')
+def bench_upbit_parse_simple():
+    return _cycle_frames(parse_upbit_frame, simple=True)
+
+
+@benchmark('upbit.ingest[legacy]')
+def bench_upbit_ingest_legacy():
+    return _cycle_frames(legacy_handler(), simple=False)
+
+
+@benchmark('upbit.ingest[simple,batch=8]')
+def bench_upbit_ingest_fast():
+    return _cycle_frames(fast_handler(8), simple=True)
+
+
+# ---------------------------------------------------------------------------
+# 페이로드 인코딩
+# ---------------------------------------------------------------------------
+
+_PAYLOAD_ENCODERS = {'stdlib_json': lambda obj: json.dumps(obj).encode('utf-8')}
+if ORJSON_AVAILABLE:
+    _PAYLOAD_ENCODERS['json'] = encode_json
+if MSGPACK_AVAILABLE:
+    _PAYLOAD_ENCODERS['msgpack'] = encode_msgpack
+
+def _encode_setup(kind: str, codec: str):
+    """히스토리가 가득 찬 상태의 delta / full 페이로드 인코딩"""
+    payload = build_payloads(HISTORY_MAX_POINTS)[kind]
+    encode = _PAYLOAD_ENCODERS[codec]
+    return lambda: encode(payload)
+
+
+for _kind in ('delta', 'full'):
+    for _codec in _PAYLOAD_ENCODERS:
+        benchmark(f'payload.encode[{_kind},{_codec}]')(lambda kind=_kind, codec=_codec: _encode_setup(kind, codec))
+
+
+@benchmark('payload.fanout[delta,clients=100]')
+def bench_payload_fanout():
+    delta = build_payloads(10)['delta']
+
+    def op():
+        payload = EncodedPayload(delta, 'delta')
+        return [payload.encode() for _ in range(100)]
+    return op
+
+
+# ---------------------------------------------------------------------------
+# 다중 자산
+# ---------------------------------------------------------------------------
+
+@benchmark('asset_matrix.tick[100x6]')
+def bench_asset_matrix_tick():
+    matrix, _ = build_matrix(100, 6)
+    oracle = Oracle()
+    oracle.add_usdt_krw_price(1300.0)
+    return lambda: oracle.calculate_median_krw_prices(matrix.snapshot(max_age=5), 1300.0)
+
+
+# ---------------------------------------------------------------------------
+# 호가창
+# ---------------------------------------------------------------------------
+
+@benchmark('order_book.delta[200 levels]+depth')
+def bench_order_book_delta():
+    # Binance 100ms 증분 하나 반영 + 깊이 가중 가격 계산
+    rng = random.Random(1)
+    book = OrderBook()
+    book.apply_snapshot([(3000 - i * 0.01, 1.0) for i in range(5000)],
+                        [(3000.01 + i * 0.01, 1.0) for i in range(5000)], sequence=0)
+    events = []
+    for _ in range(64):
+        changes = [(round(3000 + rng.gauss(0, 5), 2), rng.choice((0.0, rng.random() * 5))) for _ in range(200)]
+        events.append(([c for c in changes if c[0] <= 3000], [c for c in changes if c[0] > 3000]))
+    cycle = itertools.cycle(events)
+    sequence = itertools.count(1)
+
+    def op():
+        event_bids, event_asks = next(cycle)
+        book.apply_delta(event_bids, event_asks, next(sequence))
+        return book_price(book.bids, book.asks, 'depth', 50_000.0)
+    return op
+
+
+# ---------------------------------------------------------------------------
+# 메트릭
+# ---------------------------------------------------------------------------
+
+@benchmark('metrics.record')
+def bench_metrics_record():
+    # 조회 없이 기록만 계속되는 경우 (flush_size마다 버킷 반영 비용 포함)
+    histogram = LatencyHistogram()
+    return lambda: histogram.record(0.0012)
+
+
+@benchmark('metrics.render[40 series]')
+def bench_metrics_render():
+    registry = MetricsRegistry()
+    for i in range(40):
+        histogram = registry.histogram('oracle_ingest_seconds', '수신 처리 시간', source=f'source{i}')
+        for _ in range(1000):
+            histogram.record(random.lognormvariate(-9, 1))
+    return registry.render
+
+
+# ---------------------------------------------------------------------------
+
+def environment() -> Dict:
+    """결과 비교에 필요한 실행 환경 정보"""
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  timeout=10, check=True).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy_version,
+        'orjson': ORJSON_AVAILABLE,
+        'msgpack': MSGPACK_AVAILABLE,
+    }
+
+
+def run(filters: Optional[List[str]] = None, min_time: float = 0.02, repeat: int = 15) -> Dict:
+    """등록된 항목 실행 (filters가 있으면 이름에 하나라도 포함된 항목만)"""
+    results = {}
+    for name, setup in BENCHMARKS:
+        if filters and not any(pattern in name for pattern in filters):
+            continue
+        random.seed(42)
+        try:
+            op = setup()
+            results[name] = measure(op, min_time, repeat)
+        except Exception as e:
+            print(f"벤치마크 실패 ({name}): {e}")
+            continue
+        print(f"  {name:<44} {results[name]['median_ns'] / 1000:12.2f} µs  "
+              f"(p95 {results[name]['p95_ns'] / 1000:.2f} µs, ×{results[name]['number']})")
+    return {'environment': environment(), 'benchmarks': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='결과 저장 경로 (JSON)')
+    parser.add_argument('--filter', action='append', help='이름에 이 문자열이 포함된 항목만 실행 (여러 번 지정 가능)')
+    parser.add_argument('--min-time', type=float, default=0.02, help='라운드당 최소 측정 시간 (초)')
+    parser.add_argument('--repeat', type=int, default=15, help='라운드 수')
+    parser.add_argument('--quick', action='store_true', help='짧게 실행 (라운드 5회, 라운드당 5ms)')
+    parser.add_argument('--list', action='store_true', help='항목 목록만 출력')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, _ in BENCHMARKS:
+            print(name)
+        return
+
+    min_time, repeat = (0.005, 5) if args.quick else (args.min_time, args.repeat)
+    report = run(args.filter, min_time, repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output} ({len(report['benchmarks'])}개 항목)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Socket.IO 브로드캐스터 (클라이언트별 역압)
+틱 처리 스레드는 전송할 페이로드를 작업 큐에 넣기만 하고, 전송 전용 백그라운드 작업이
+방(히스토리 모드 또는 토픽 × 코덱)마다 한 번 인코딩해 전송하므로 느린 클라이언트가 틱 처리를 막지 않습니다.
+클라이언트는 여러 방(토픽)에 동시에 들어 있을 수 있습니다.
+
+클라이언트마다 Engine.IO 전송 대기열 길이를 보고 max_queue개 이상 밀려 있으면 방에서 잠시 빼고
+그동안의 틱은 방마다 최신 것 하나로 병합(conflate)해 두었다가, 대기열이 비워지면 그것만 보내고 방에 다시 넣습니다.
+따라서 클라이언트 하나가 서버에 쌓을 수 있는 메시지 수는 max_queue개 정도로 제한됩니다.
+변경분처럼 최신 틱 하나로 대신할 수 없는 방은 merge 함수로 건너뛴 틱의 첫 틱과 최신 틱을 합쳐 보냅니다.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Set
+
+
+class _Client:
+    """클라이언트 전송 상태"""
+    __slots__ = ('sid', 'eio_sid', 'rooms', 'lagging', 'latest', 'conflated', 'lagged')
+
+    def __init__(self, sid: str, eio_sid: Optional[str], rooms: Set[str]):
+        self.sid = sid
+        self.eio_sid = eio_sid
+        self.rooms = rooms
+        self.lagging = False  # 방에서 빠져 최신 틱만 보관 중
+        self.latest: Dict[str, tuple] = {}  # 방별로 보관 중인 (이벤트, 건너뛴 첫 데이터, 최신 데이터)
+        self.conflated = 0  # 병합으로 건너뛴 틱 수
+        self.lagged = 0  # 밀림 상태로 바뀐 횟수
+
+
+class Broadcaster:
+    """방 단위 브로드캐스트와 클라이언트별 병합 대기열 클래스"""
+
+    def __init__(
+        self,
+        socketio,
+        namespace: str = '/',
+        max_queue: int = 8,
+        max_jobs: int = 64,
+        catch_up_interval: float = 0.05,
+        emit_latency=None,
+        merge: Optional[Callable[[str, str, object, object], object]] = None
+    ):
+        """
+        Args:
+            socketio: flask_socketio.SocketIO 인스턴스
+            namespace: 전송할 네임스페이스
+            max_queue: 클라이언트 하나의 Engine.IO 전송 대기 패킷 수 상한 (넘으면 최신 틱만 보관)
+            max_jobs: 전송을 기다리는 틱 수 상한 (넘으면 가장 오래된 틱부터 버림)
+            catch_up_interval: 밀린 클라이언트의 대기열을 다시 확인하는 주기 (초)
+            emit_latency: 틱 하나의 인코딩 + 전송 시간을 기록할 LatencyHistogram (선택)
+            merge: merge(이벤트, 방, 건너뛴 첫 데이터, 최신 데이터) → 밀린 클라이언트에 보낼 데이터
+                   (선택, 없으면 최신 데이터, 따라잡을 때 방마다 한 번 호출)
+        """
+        self.socketio = socketio
+        self.namespace = namespace
+        self.max_queue = max_queue
+        self.catch_up_interval = catch_up_interval
+        self.emit_latency = emit_latency
+        self.merge = merge
+
+        self._clients: Dict[str, _Client] = {}
+        self._jobs = deque(maxlen=max_jobs)
+        self._cond = threading.Condition()
+        self._running = False
+        self._stats = {'published': 0, 'dispatched': 0, 'dropped_jobs': 0, 'conflated': 0, 'caught_up': 0}
+
+    def start(self):
+        """전송 작업 시작 (async_mode에 맞는 스레드/그린 스레드)"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self.socketio.start_background_task(self._run)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def add_client(self, sid: str, room: Optional[str] = None):
+        """클라이언트 등록 후 전송 방에 추가 (connect 핸들러에서 호출, room이 None이면 subscribe로 추가)"""
+        server = self.socketio.server
+        eio_sid = server.manager.eio_sid_from_sid(sid, self.namespace)
+        with self._cond:
+            self._clients[sid] = _Client(sid, eio_sid, set())
+        if room is not None:
+            self.subscribe(sid, room)
+
+    def subscribe(self, sid: str, room: str):
+        """클라이언트를 방에 추가 (밀린 상태면 따라잡을 때 들어감)"""
+        with self._cond:
+            client = self._clients.get(sid)
+            if client is None or room in client.rooms:
+                return
+            client.rooms.add(room)
+            if not client.lagging:
+                self.socketio.server.enter_room(sid, room, namespace=self.namespace)
+
+    def unsubscribe(self, sid: str, room: str):
+        """클라이언트를 방에서 제거 (보관 중인 그 방의 틱도 버림)"""
+        with self._cond:
+            client = self._clients.get(sid)
+            if client is None or room not in client.rooms:
+                return
+            client.rooms.discard(room)
+            client.latest.pop(room, None)
+            if not client.lagging:
+                self.socketio.server.leave_room(sid, room, namespace=self.namespace)
+
+    def remove_client(self, sid: str):
+        """클라이언트 제거 (disconnect 핸들러에서 호출, 방은 Socket.IO가 정리)"""
+        with self._cond:
+            client = self._clients.pop(sid, None)
+            if client is not None:
+                self._stats['conflated'] += client.conflated
+
+    def publish(self, event: str, build: Callable[[], Dict[str, object]]):
+        """
+        틱 전송 요청 (대기 없이 바로 반환)
+
+        Args:
+            event: Socket.IO 이벤트 이름
+            build: {방: 데이터}를 만드는 함수 (인코딩까지 전송 작업에서 실행)
+        """
+        with self._cond:
+            if len(self._jobs) == self._jobs.maxlen:
+                self._stats['dropped_jobs'] += 1
+            self._jobs.append((event, build))
+            self._stats['published'] += 1
+            self._cond.notify()
+
+    def _queue_depth(self, client: _Client) -> int:
+        """클라이언트의 Engine.IO 전송 대기 패킷 수"""
+        socket = self.socketio.server.eio.sockets.get(client.eio_sid)
+        queue = getattr(socket, 'queue', None)
+        return queue.qsize() if queue is not None else 0
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and not self._jobs:
+                    self._cond.wait(timeout=self.catch_up_interval)
+                if not self._running:
+                    return
+                jobs = list(self._jobs)
+                self._jobs.clear()
+                clients = list(self._clients.values())
+
+            for event, build in jobs:
+                try:
+                    self._dispatch(event, build, clients)
+                except Exception as e:
+                    print(f"브로드캐스트 오류 ({event}): {e}")
+            try:
+                self._catch_up(clients)
+            except Exception as e:
+                print(f"밀린 클라이언트 전송 오류: {e}")
+
+    def _dispatch(self, event: str, build: Callable, clients):
+        """밀린 클라이언트를 방에서 뺀 뒤 방마다 한 번씩 전송하고, 밀린 클라이언트에는 방별 최신 틱만 보관"""
+        started = time.perf_counter()
+        payloads = build()
+
+        server = self.socketio.server
+        with self._cond:
+            for client in clients:
+                if not client.lagging and self._queue_depth(client) >= self.max_queue:
+                    client.lagging = True
+                    client.lagged += 1
+                    for room in client.rooms:
+                        server.leave_room(client.sid, room, namespace=self.namespace)
+
+        for room, data in payloads.items():
+            self.socketio.emit(event, data, to=room, namespace=self.namespace)
+
+        with self._cond:
+            for client in clients:
+                if not client.lagging:
+                    continue
+                for room in client.rooms:
+                    data = payloads.get(room)
+                    if data is not None:
+                        held = client.latest.get(room)
+                        if held is not None:
+                            client.conflated += 1
+                        client.latest[room] = (event, data if held is None else held[1], data)
+
+        if self.emit_latency is not None:
+            self.emit_latency.record(time.perf_counter() - started)
+        self._stats['dispatched'] += 1
+
+    def _catch_up(self, clients):
+        """대기열이 절반 이하로 줄어든 밀린 클라이언트에 보관한 방별 최신 틱을 보내고 방에 복귀"""
+        server = self.socketio.server
+        for client in clients:
+            if not client.lagging or self._queue_depth(client) > self.max_queue // 2:
+                continue
+            with self._cond:
+                if client.sid not in self._clients:
+                    continue  # 연결 해제됨
+                latest, client.latest = client.latest, {}
+            for room, (event, first, data) in latest.items():
+                if self.merge is not None and first is not data:
+                    try:
+                        data = self.merge(event, room, first, data)
+                    except Exception as e:
+                        print(f"밀린 틱 병합 오류 ({room}): {e}")
+                self.socketio.emit(event, data, to=client.sid, namespace=self.namespace)
+            # 전송은 이 작업에서만 하므로 복귀 전에 새 틱이 먼저 나가지 않음 (구독 변경만 락으로 보호)
+            with self._cond:
+                client.lagging = False
+                for room in client.rooms:
+                    server.enter_room(client.sid, room, namespace=self.namespace)
+            self._stats['caught_up'] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        전송 통계
+
+        Returns:
+            {'clients', 'lagging', 'pending_jobs', 'published', 'dispatched', 'dropped_jobs', 'conflated', 'caught_up'}
+        """
+        with self._cond:
+            clients = list(self._clients.values())
+            stats = dict(self._stats, pending_jobs=len(self._jobs))
+        stats['clients'] = len(clients)
+        stats['lagging'] = sum(1 for client in clients if client.lagging)
+        stats['conflated'] += sum(client.conflated for client in clients)
+        return stats
+
+
+if __name__ == '__main__':
+    # 테스트: 느린 클라이언트는 방에서 빠져 최신 틱 하나만 받고, 다른 클라이언트와 틱 처리는 막히지 않음
+    import queue
+    from types import SimpleNamespace
+
+    class FakeServer:
+        """Engine.IO 대기열과 방만 흉내 내는 서버 (전송은 대기열에 쌓기만 함)"""
+
+        def __init__(self):
+            self.rooms = {}
+            self.eio = SimpleNamespace(sockets={})
+            self.manager = SimpleNamespace(eio_sid_from_sid=lambda sid, namespace: f'eio-{sid}')
+
+        def connect(self, sid):
+            self.eio.sockets[f'eio-{sid}'] = SimpleNamespace(queue=queue.Queue())
+
+        def enter_room(self, sid, room, namespace=None):
+            self.rooms.setdefault(room, set()).add(sid)
+
+        def leave_room(self, sid, room, namespace=None):
+            self.rooms.get(room, set()).discard(sid)
+
+    class FakeSocketIO:
+        def __init__(self):
+            self.server = FakeServer()
+
+        def start_background_task(self, target):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            return thread
+
+        def emit(self, event, data, to=None, namespace=None):
+            sids = self.server.rooms.get(to, {to})
+            for sid in sids:
+                self.server.eio.sockets[f'eio-{sid}'].queue.put((event, data))
+
+    socketio = FakeSocketIO()
+    broadcaster = Broadcaster(socketio, max_queue=4, catch_up_interval=0.01)
+    broadcaster.start()
+    for sid in ('fast', 'slow'):
+        socketio.server.connect(sid)
+        broadcaster.add_client(sid, 'history_full')
+
+    fast_queue = socketio.server.eio.sockets['eio-fast'].queue
+    slow_queue = socketio.server.eio.sockets['eio-slow'].queue
+    received = []
+    publish_cost = 0.0
+    for tick in range(100):
+        started = time.perf_counter()
+        broadcaster.publish('price_update', lambda tick=tick: {'history_full': tick})
+        publish_cost += time.perf_counter() - started
+        time.sleep(0.002)
+        while not fast_queue.empty():  # 빠른 클라이언트는 바로 소비
+            received.append(fast_queue.get()[1])
+    time.sleep(0.05)
+    while not fast_queue.empty():
+        received.append(fast_queue.get()[1])
+
+    assert received == list(range(100)), received[-5:]
+    assert slow_queue.qsize() == 4, slow_queue.qsize()  # 느린 클라이언트는 max_queue개에서 멈춤
+    stats = broadcaster.get_stats()
+    assert stats['lagging'] == 1 and stats['conflated'] == 95, stats
+
+    # 느린 클라이언트가 대기열을 비우면 최신 틱 하나만 받고 방에 복귀
+    while not slow_queue.empty():
+        slow_queue.get()
+    time.sleep(0.05)
+    assert slow_queue.get_nowait()[1] == 99 and broadcaster.get_stats()['lagging'] == 0
+
+    # 여러 토픽 방을 구독한 클라이언트: 밀리면 방별 최신 틱을 하나씩 받고, 구독 해제한 방은 받지 않음
+    socketio.server.connect('topics')
+    broadcaster.add_client('topics')
+    broadcaster.subscribe('topics', 'topic:median')
+    broadcaster.subscribe('topics', 'topic:venues')
+    topic_queue = socketio.server.eio.sockets['eio-topics'].queue
+    for tick in range(20):
+        broadcaster.publish('topic_update', lambda tick=tick: {'topic:median': ('median', tick), 'topic:venues': ('venues', tick)})
+        time.sleep(0.002)
+    assert topic_queue.qsize() == 4 and broadcaster.get_stats()['lagging'] >= 1
+    broadcaster.unsubscribe('topics', 'topic:venues')
+    broadcaster.publish('topic_update', lambda: {'topic:median': ('median', 20), 'topic:venues': ('venues', 20)})
+    time.sleep(0.02)
+    while not topic_queue.empty():
+        topic_queue.get()
+    time.sleep(0.05)
+    assert [topic_queue.get_nowait()[1] for _ in range(topic_queue.qsize())] == [('median', 20)]
+    broadcaster.stop()
+
+    # merge 함수: 건너뛴 첫 틱과 최신 틱으로 보낼 데이터를 만듦 (변경분 방은 건너뛴 구간 전체)
+    socketio = FakeSocketIO()
+    merged = Broadcaster(socketio, max_queue=4, catch_up_interval=0.01,
+                         merge=lambda event, room, first, latest: list(range(first, latest + 1)))
+    merged.start()
+    socketio.server.connect('slow')
+    merged.add_client('slow', 'history_delta')
+    slow_queue = socketio.server.eio.sockets['eio-slow'].queue
+    for tick in range(20):
+        merged.publish('price_update', lambda tick=tick: {'history_delta': tick})
+        time.sleep(0.002)
+    while not slow_queue.empty():
+        slow_queue.get()
+    time.sleep(0.05)
+    assert slow_queue.get_nowait()[1] == list(range(4, 20))
+    merged.stop()
+    print(broadcaster.get_stats(), f"publish 호출당 {publish_cost / 100 * 1e6:.1f} µs")
@@ -0,0 +1,35 @@
+"""
+시계
+오라클이 현재 시간을 직접 읽지 않고 주입된 시계를 사용하도록 합니다.
+실서비스는 SystemClock, 재생(replay)과 테스트는 수동으로 시간을 옮기는 ManualClock을 사용합니다.
+"""
+import time
+
+
+class SystemClock:
+    """시스템 시계 클래스 (time.time)"""
+
+    def time(self) -> float:
+        return time.time()
+
+
+class ManualClock:
+    """수동 시계 클래스 (set/advance로만 시간이 흐름)"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def time(self) -> float:
+        return self._now
+
+    def set(self, timestamp: float):
+        """시각 설정 (과거로 되돌리지 않음)"""
+        if timestamp > self._now:
+            self._now = timestamp
+
+    def advance(self, seconds: float):
+        """시각을 seconds만큼 진행"""
+        self._now += seconds
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,147 @@
+"""
+공유 asyncio 수집 루프
+모든 거래소 웹소켓 코루틴을 소수의 이벤트 루프 스레드에서 실행합니다.
+거래소마다 스레드와 이벤트 루프를 따로 만들지 않으므로 거래소가 늘어나도 스레드 수가 늘지 않습니다.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, List, Optional
+
+
+class IngestLoopPool:
+    """공유 이벤트 루프 풀 클래스"""
+
+    def __init__(self, num_loops: int = 1, name: str = 'ingest'):
+        """
+        Args:
+            num_loops: 이벤트 루프(스레드) 수
+            name: 스레드 이름 접두사
+        """
+        if num_loops < 1:
+            raise ValueError("num_loops는 1 이상이어야 합니다")
+
+        self.num_loops = num_loops
+        self.name = name
+        self.loops: List[asyncio.AbstractEventLoop] = []
+        self.threads: List[threading.Thread] = []
+        self._futures: List[Future] = []
+        self._futures_lock = threading.Lock()
+        self._next_loop = 0
+        self._started = False
+
+    def start(self):
+        """루프 스레드 시작"""
+        if self._started:
+            return
+
+        for index in range(self.num_loops):
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(
+                target=self._run_loop,
+                args=(loop, ready),
+                name=f'{self.name}-{index}',
+                daemon=True
+            )
+            thread.start()
+            ready.wait()
+            self.loops.append(loop)
+            self.threads.append(thread)
+        self._started = True
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def pick_loop(self) -> int:
+        """다음 코루틴을 배치할 루프 인덱스 (라운드 로빈)"""
+        index = self._next_loop
+        self._next_loop = (self._next_loop + 1) % self.num_loops
+        return index
+
+    def submit(self, coro: Coroutine, loop_index: Optional[int] = None) -> Future:
+        """
+        코루틴을 루프에서 실행 (다른 스레드에서 호출 가능)
+        반환된 Future는 stop() 시 취소됩니다.
+        """
+        if not self._started:
+            self.start()
+        if loop_index is None:
+            loop_index = self.pick_loop()
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loops[loop_index % self.num_loops])
+        with self._futures_lock:
+            self._futures = [f for f in self._futures if not f.done()]
+            self._futures.append(future)
+        return future
+
+    def run(self, coro: Coroutine, loop_index: Optional[int] = None, timeout: Optional[float] = None) -> Any:
+        """코루틴을 루프에서 실행하고 결과를 기다림 (루프 스레드가 아닌 곳에서 호출)"""
+        if not self._started:
+            self.start()
+        if loop_index is None:
+            loop_index = self.pick_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loops[loop_index % self.num_loops])
+        return future.result(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """실행 중인 코루틴을 모두 취소하고 루프 스레드 종료"""
+        if not self._started:
+            return
+
+        with self._futures_lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+
+        async def cancel_remaining():
+            current = asyncio.current_task()
+            tasks = [task for task in asyncio.all_tasks() if task is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for loop in self.loops:
+            if loop.is_running():
+                try:
+                    asyncio.run_coroutine_threadsafe(cancel_remaining(), loop).result(timeout)
+                except Exception as e:
+                    print(f"수집 루프 태스크 취소 실패: {e}")
+                loop.call_soon_threadsafe(loop.stop)
+
+        for thread in self.threads:
+            thread.join(timeout)
+
+        self.loops = []
+        self.threads = []
+        self._started = False
+
+    @property
+    def thread_count(self) -> int:
+        return sum(1 for thread in self.threads if thread.is_alive())
+
+
+if __name__ == '__main__':
+    # 테스트
+    import time
+
+    async def ticker(name: str, interval: float, counts: dict):
+        while True:
+            counts[name] = counts.get(name, 0) + 1
+            await asyncio.sleep(interval)
+
+    before = threading.active_count()
+    pool = IngestLoopPool(num_loops=1)
+    counts = {}
+    for exchange_name in ('binance', 'okx', 'bybit', 'coinbase', 'kraken', 'upbit'):
+        pool.submit(ticker(exchange_name, 0.01, counts))
+    time.sleep(0.2)
+    print(f"스레드: {before} → {threading.active_count()}, 수신: {counts}")
+    pool.stop()
+    print(f"종료 후 스레드: {threading.active_count()}")
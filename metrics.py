@@ -0,0 +1,229 @@
+"""
+지연 히스토그램과 Prometheus 메트릭
+거래소 타임스탬프 → 수신 → 오라클 계산 → Socket.IO 전송 구간별, 소스별 지연을
+HDR 스타일 로그-선형 히스토그램으로 기록하고 /metrics에서 Prometheus 텍스트 형식으로 내보냅니다.
+
+기록 경로는 리스트 append 한 번이며, 값은 조회 시(또는 flush_size개가 쌓이면) NumPy로 한 번에 버킷에 반영하므로
+버킷 계산 비용은 대부분 수신 스레드가 아닌 /metrics 조회 스레드가 부담합니다.
+"""
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# 옥타브(2배 구간)당 선형 하위 버킷 수 = 2^PRECISION_BITS (상대 오차 1/32 ≈ 3%)
+PRECISION_BITS = 5
+SUB_BUCKETS = 1 << PRECISION_BITS
+
+# 조회 시 계산하는 분위수
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _bucket_index(values_ns: np.ndarray) -> np.ndarray:
+    """
+    나노초 값의 버킷 인덱스
+    2 × SUB_BUCKETS ns 미만은 1ns 단위 그대로, 그 이상은 옥타브마다 SUB_BUCKETS개의 선형 버킷
+    """
+    bit_length = np.frexp(values_ns.astype(np.float64))[1]  # 2^53 미만 정수에서 int.bit_length()와 같음
+    shift = np.maximum(bit_length - (PRECISION_BITS + 1), 0)
+    return shift * SUB_BUCKETS + (values_ns >> shift)
+
+
+def _bucket_value_ns(index: int) -> float:
+    """버킷 대표값 (버킷 구간의 중앙, ns)"""
+    if index < 2 * SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    lower = (index - shift * SUB_BUCKETS) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """
+    HDR 스타일 지연 히스토그램 클래스 (초 단위 기록)
+    record()는 락 없이 대기 리스트에 추가만 하므로 여러 스레드에서 호출해도 값이 빠지지 않습니다.
+    """
+
+    def __init__(self, max_seconds: float = 3600.0, flush_size: int = 8192):
+        """
+        Args:
+            max_seconds: 기록할 최대값 (초, 넘는 값은 이 값으로 기록)
+            flush_size: 조회가 없어도 대기 값이 이만큼 쌓이면 버킷에 반영 (메모리 상한)
+        """
+        self.max_ns = int(max_seconds * 1e9)
+        self.flush_size = flush_size
+        self._counts = np.zeros(int(_bucket_index(np.array([self.max_ns]))[0]) + 1, dtype=np.int64)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._pending: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """지연 기록 (음수는 0으로 기록)"""
+        pending = self._pending
+        pending.append(seconds)
+        if len(pending) >= self.flush_size:
+            self._fold()
+
+    def _fold(self):
+        """대기 값을 버킷에 반영 (같은 리스트 앞부분만 잘라내므로 동시에 추가된 값은 남음)"""
+        with self._lock:
+            pending = self._pending
+            size = len(pending)
+            if not size:
+                return
+            values = np.clip(np.array(pending[:size], dtype=np.float64), 0.0, self.max_ns / 1e9)
+            del pending[:size]
+            self._counts += np.bincount(_bucket_index((values * 1e9).astype(np.int64)), minlength=self._counts.size)
+            self._count += size
+            self._sum += float(values.sum())
+            self._max = max(self._max, float(values.max()))
+
+    def snapshot(self) -> Dict:
+        """
+        현재까지의 통계
+
+        Returns:
+            {'count', 'sum', 'max', 'mean', 'quantiles': {q: 초}}  # 기록이 없으면 분위수는 None
+        """
+        self._fold()
+        with self._lock:
+            counts = self._counts.copy()
+            count, total, maximum = self._count, self._sum, self._max
+
+        quantiles = {}
+        if count:
+            cumulative = np.cumsum(counts)
+            for q in QUANTILES:
+                index = int(np.searchsorted(cumulative, max(math.ceil(q * count), 1)))
+                quantiles[q] = min(_bucket_value_ns(index) / 1e9, maximum)
+        else:
+            quantiles = {q: None for q in QUANTILES}
+        return {
+            'count': count,
+            'sum': total,
+            'max': maximum,
+            'mean': total / count if count else None,
+            'quantiles': quantiles,
+        }
+
+
+def _escape(value) -> str:
+    """레이블 값 이스케이프 (역슬래시, 큰따옴표, 줄바꿈)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value is None or value != value:
+        return 'NaN'
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    메트릭 등록 클래스
+    히스토그램은 (이름, 레이블)마다 하나씩 만들어 재사용하고,
+    카운터/게이지는 조회 시 호출되는 수집 함수로 등록합니다.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict] = {}  # {이름: {'help': str, 'series': {레이블: 히스토그램}}}
+        self._collectors: List[Tuple[str, str, str, Callable]] = []  # (이름, 종류, 설명, 수집 함수)
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, **labels) -> LatencyHistogram:
+        """레이블 조합별 히스토그램 (없으면 생성, 수신 경로에서는 반환값을 보관해 재사용)"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._histograms.setdefault(name, {'help': help_text, 'series': {}})
+            histogram = family['series'].get(key)
+            if histogram is None:
+                histogram = family['series'][key] = LatencyHistogram()
+            return histogram
+
+    def add_collector(self, name: str, metric_type: str, help_text: str, collect: Callable):
+        """
+        카운터/게이지 수집 함수 등록
+
+        Args:
+            metric_type: 'counter' 또는 'gauge'
+            collect: 조회 시 호출, 값 하나 또는 [(레이블 dict, 값), ...] 반환
+        """
+        with self._lock:
+            self._collectors.append((name, metric_type, help_text, collect))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (히스토그램은 분위수 summary로 내보냄)"""
+        with self._lock:
+            histograms = [(name, family['help'], list(family['series'].items()))
+                          for name, family in self._histograms.items()]
+            collectors = list(self._collectors)
+
+        lines = []
+        for name, help_text, series in histograms:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} summary')
+            for labels, histogram in series:
+                stats = histogram.snapshot()
+                for q, value in stats['quantiles'].items():
+                    lines.append(f'{name}{_format_labels(labels + (("quantile", q),))} {_format_value(value)}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(stats["sum"])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {stats["count"]}')
+
+        for name, metric_type, help_text, collect in collectors:
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"메트릭 수집 오류 ({name}): {e}")
+                continue
+            if not isinstance(samples, list):
+                samples = [({}, samples)]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 기본 레지스트리
+METRICS = MetricsRegistry()
+
+
+if __name__ == '__main__':
+    # 테스트: 분위수가 정확한 값과 상대 오차 1/SUB_BUCKETS 이내인지 확인
+    import random
+    import time
+
+    random.seed(3)
+    histogram = LatencyHistogram()
+    values = [random.lognormvariate(math.log(0.002), 1.0) for _ in range(100000)]
+    for value in values:
+        histogram.record(value)
+    stats = histogram.snapshot()
+    values.sort()
+    for q, estimate in stats['quantiles'].items():
+        exact = values[math.ceil(q * len(values)) - 1]
+        assert abs(estimate - exact) / exact <= 1 / SUB_BUCKETS, (q, estimate, exact)
+    assert stats['count'] == len(values)
+
+    started = time.perf_counter()
+    for _ in range(1000000):
+        histogram.record(0.001)
+    print(f"기록 비용: {(time.perf_counter() - started) * 1000:.0f} ns/회, p99 {stats['quantiles'][0.99] * 1000:.3f} ms")
+
+    registry = MetricsRegistry()
+    registry.histogram('oracle_stage_seconds', '구간별 처리 시간', stage='collect').record(0.0012)
+    registry.add_collector('oracle_connected_clients', 'gauge', '접속 클라이언트 수', lambda: [({'codec': 'json'}, 3)])
+    print(registry.render())
@@ -5,24 +5,29 @@
 import statistics
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
-from collections import deque
-import time
+import math
+from clock import SYSTEM_CLOCK
+from twap import IncrementalTWAP
+from asset_matrix import compute_krw_prices
 
 
 class Oracle:
     """가격 오라클 클래스"""
     
-    def __init__(self, twap_window_seconds: int = 300, volatility_threshold: float = 0.05):
+    def __init__(self, twap_window_seconds: int = 300, volatility_threshold: float = 0.05, clock=None):
         """
         Args:
             twap_window_seconds: TWAP 계산을 위한 시간 윈도우 (초)
             volatility_threshold: USDT/KRW 변동성 임계값 (5% 기본값)
+            clock: 현재 시간을 제공하는 시계 (기본값: 시스템 시계, 재생 시 ManualClock)
         """
         self.twap_window_seconds = twap_window_seconds
         self.volatility_threshold = volatility_threshold
+        self.clock = clock or SYSTEM_CLOCK
         
-        # USDT/KRW 가격 히스토리 (TWAP 계산용)
-        self.usdt_krw_history = deque()  # [(timestamp, price), ...]
+        # USDT/KRW 가격 히스토리 (TWAP 계산용, 시간 가중 합계를 증분 관리)
+        self.usdt_krw_twap = IncrementalTWAP()
+        self.usdt_krw_history = self.usdt_krw_twap.history  # [(timestamp, price), ...]
         
         # 조작된 USDT/KRW 가격 (테스트용)
         self.manual_usdt_krw_override: Optional[float] = None
@@ -33,47 +38,17 @@ class Oracle:
     def add_usdt_krw_price(self, price: float, timestamp: Optional[float] = None):
         """USDT/KRW 가격 히스토리 추가"""
         if timestamp is None:
-            timestamp = time.time()
+            timestamp = self.clock.time()
         
-        self.usdt_krw_history.append((timestamp, price))
+        self.usdt_krw_twap.append(timestamp, price)
         
         # 오래된 데이터 제거
         cutoff_time = timestamp - self.twap_window_seconds
-        while self.usdt_krw_history and self.usdt_krw_history[0][0] < cutoff_time:
-            self.usdt_krw_history.popleft()
+        self.usdt_krw_twap.evict_before(cutoff_time)
     
     def calculate_twap(self) -> Optional[float]:
-        """USDT/KRW의 TWAP (Time-Weighted Average Price) 계산"""
-        if not self.usdt_krw_history:
-            return None
-        
-        if len(self.usdt_krw_history) == 1:
-            return self.usdt_krw_history[0][1]
-        
-        # 시간 가중 평균 계산
-        total_weight = 0
-        weighted_sum = 0
-        
-        for i, (timestamp, price) in enumerate(self.usdt_krw_history):
-            if i == 0:
-                # 첫 번째 데이터는 다음 데이터까지의 시간 간격을 가중치로 사용
-                if len(self.usdt_krw_history) > 1:
-                    weight = self.usdt_krw_history[1][0] - timestamp
-                else:
-                    weight = 1
-            elif i == len(self.usdt_krw_history) - 1:
-                # 마지막 데이터는 현재 시간까지의 간격
-                weight = time.time() - timestamp
-            else:
-                # 중간 데이터는 양쪽 간격의 평균
-                prev_time = self.usdt_krw_history[i-1][0]
-                next_time = self.usdt_krw_history[i+1][0]
-                weight = (timestamp - prev_time + next_time - timestamp) / 2
-            
-            weighted_sum += price * weight
-            total_weight += weight
-        
-        return weighted_sum / total_weight if total_weight > 0 else None
+        """USDT/KRW의 TWAP (Time-Weighted Average Price) 계산 (윈도우 크기와 무관하게 O(1))"""
+        return self.usdt_krw_twap.value(self.clock.time())
     
     def check_usdt_krw_volatility(self, current_price: float) -> bool:
         """USDT/KRW 가격 변동성 체크"""
@@ -108,11 +83,15 @@ class Oracle:
         upbit_usdt_krw: Optional[float],
         overseas_eth_usdt: Dict[str, Optional[float]],
         use_manual_usdt_krw: bool = False,
-        use_manual_eth_krw: bool = False
+        use_manual_eth_krw: bool = False,
+        source_ages: Optional[Dict[str, Optional[float]]] = None
     ) -> Dict:
         """
         ETH/KRW 중앙값 가격 계산
         
+        Args:
+            source_ages: 소스별 마지막 가격의 나이 (초, 키는 'upbit_eth_krw', 'upbit_usdt_krw', '<거래소>_eth_usdt')
+        
         Returns:
             {
                 'median_price': float,
@@ -121,15 +100,21 @@ class Oracle:
                 'usdt_krw_used': float,
                 'is_volatile': bool,
                 'twap': float,
+                'source_ages': Dict[str, float],  # 입력 그대로
+                'max_source_age': float,  # 계산에 사용한 소스 중 가장 오래된 나이 (나이 정보가 없으면 None)
             }
         """
         prices = []
+        source_ages = source_ages or {}
+        used_ages = []
         
         # 조작된 USDT/KRW 사용 여부
         if use_manual_usdt_krw and self.manual_usdt_krw_override is not None:
             usdt_krw_price = self.manual_usdt_krw_override
         else:
             usdt_krw_price = upbit_usdt_krw
+            if usdt_krw_price is not None:
+                used_ages.append(source_ages.get('upbit_usdt_krw'))
         
         # USDT/KRW 가격 히스토리 업데이트 (수동 ETH/KRW 사용 여부와 관계없이)
         if usdt_krw_price is not None:
@@ -150,6 +135,7 @@ class Oracle:
         elif upbit_eth_krw is not None:
             # 실제 Upbit ETH/KRW 가격 사용
             prices.append(('upbit', upbit_eth_krw))
+            used_ages.append(source_ages.get('upbit_eth_krw'))
         
         # 역산된 USDT/KRW 가격 (역산 모드에서 사용)
         inverse_usdt_krw_avg = None
@@ -164,6 +150,7 @@ class Oracle:
                             eth_usdt_price, usdt_krw_price
                         )
                         prices.append((f'{exchange_name} (Converted)', eth_krw_price))
+                        used_ages.append(source_ages.get(f'{exchange_name}_eth_usdt'))
         else:
             # 변동성이 큰 경우: 역산 모드
             # 1. 각 해외 거래소의 ETH/USDT로부터 역산된 USDT/KRW 계산
@@ -198,6 +185,10 @@ class Oracle:
                                 eth_usdt_price, inverse_usdt_krw_avg
                             )
                             prices.append((f'{exchange_name} (inverse)', eth_krw_price))
+                            used_ages.append(source_ages.get(f'{exchange_name}_eth_usdt'))
+        
+        used_ages = [age for age in used_ages if age is not None]
+        max_source_age = max(used_ages) if used_ages else None
         
         # 중앙값 계산
         if not prices:
@@ -211,6 +202,8 @@ class Oracle:
                 'is_volatile': is_volatile,
                 'twap': twap,
                 'price_details': [],
+                'source_ages': source_ages,
+                'max_source_age': max_source_age,
             }
         
         price_values = [p[1] for p in prices]
@@ -226,6 +219,65 @@ class Oracle:
             'is_volatile': is_volatile,
             'twap': twap,
             'price_details': prices,
+            'source_ages': source_ages,
+            'max_source_age': max_source_age,
+        }
+    
+    def calculate_median_krw_prices(
+        self,
+        snapshot: Dict,
+        upbit_usdt_krw: Optional[float],
+        use_manual_usdt_krw: bool = False
+    ) -> Dict:
+        """
+        다중 자산 KRW 중앙값 가격 계산 (AssetPriceMatrix 스냅샷 기준, 모든 심볼을 배열 연산 한 번으로)
+        변동성 판단은 calculate_median_eth_krw_price가 갱신한 USDT/KRW TWAP을 읽기만 합니다.
+        
+        Returns:
+            {
+                'calculation_method': str,
+                'usdt_krw_original': float,
+                'is_volatile': bool,
+                'twap': float,
+                'version': int,
+                'assets': {
+                    symbol: {'median_price': float, 'usdt_krw_used': float, 'sources': int},
+                },
+            }
+        """
+        if use_manual_usdt_krw and self.manual_usdt_krw_override is not None:
+            usdt_krw_price = self.manual_usdt_krw_override
+        else:
+            usdt_krw_price = upbit_usdt_krw
+        
+        twap = self.calculate_twap()
+        is_volatile = usdt_krw_price is not None and self.check_usdt_krw_volatility(usdt_krw_price)
+        
+        result = compute_krw_prices(
+            snapshot['domestic_krw'], snapshot['overseas_usdt'], usdt_krw_price, inverse=is_volatile
+        )
+        
+        # JSON 응답용 변환 (NaN은 None)
+        assets = {}
+        for symbol, median, usdt_used, count in zip(
+            snapshot['symbols'],
+            result['median_krw'].tolist(),
+            result['usdt_krw_used'].tolist(),
+            result['source_count'].tolist()
+        ):
+            assets[symbol] = {
+                'median_price': None if math.isnan(median) else median,
+                'usdt_krw_used': None if math.isnan(usdt_used) else usdt_used,
+                'sources': count,
+            }
+        
+        return {
+            'calculation_method': 'inverse' if is_volatile else 'normal',
+            'usdt_krw_original': usdt_krw_price,
+            'is_volatile': is_volatile,
+            'twap': twap,
+            'version': snapshot['version'],
+            'assets': assets,
         }
     
     def set_manual_usdt_krw(self, price: Optional[float]):
@@ -257,7 +309,9 @@ if __name__ == '__main__':
             'binance': 3000,
             'okx': 3001,
             'coinbase': 2999,
-        }
+        },
+        source_ages={'upbit_eth_krw': 0.4, 'upbit_usdt_krw': 1.2, 'binance_eth_usdt': 0.1,
+                     'okx_eth_usdt': 7.5, 'coinbase_eth_usdt': 0.3}
     )
     
     print(result)
@@ -0,0 +1,297 @@
+"""
+호가창 (L2 오더북)과 호가 기준 가격
+거래소가 보내는 스냅샷과 증분(delta)을 가격순으로 정렬된 구조에 제자리 반영하고,
+시퀀스 번호로 누락을 감지해 스냅샷 재요청이 필요한지 알려줍니다.
+
+가격 계산 함수는 최우선 호가부터 순회 가능한 (가격, 수량) 목록이면 모두 받으므로
+OrderBook뿐 아니라 ccxt.pro watch_order_book 결과와 업비트 호가 스냅샷에도 그대로 사용합니다.
+    mid: (최우선 매수 + 최우선 매도) / 2
+    microprice: 반대편 잔량으로 가중한 최우선 호가 평균 (잔량이 적은 쪽으로 기움)
+    depth: 명목 금액만큼 매수/매도했을 때의 평균 체결가(VWAP) 두 개의 평균
+"""
+import bisect
+from collections import namedtuple
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+try:
+    from sortedcontainers import SortedDict
+    SORTEDCONTAINERS_AVAILABLE = True
+except ImportError:
+    SORTEDCONTAINERS_AVAILABLE = False
+
+# 오라클 입력 가격 방식 ('last'는 티커 최종 체결가, 나머지는 호가 기준)
+PRICING_METHODS = ('last', 'mid', 'microprice', 'depth')
+
+# depth 방식의 호가 통화별 기본 명목 금액
+DEFAULT_BOOK_NOTIONAL = {'USDT': 50_000.0, 'KRW': 70_000_000.0}
+
+# 호가 스냅샷 (최우선 호가부터 정렬된 [(가격, 수량), ...], 거래소 기준 시각, 시퀀스)
+BookSnapshot = namedtuple('BookSnapshot', ['bids', 'asks', 'timestamp', 'sequence'])
+
+
+class _BookSide:
+    """
+    호가 한쪽 (가격 → 수량)
+    sortedcontainers가 있으면 SortedDict, 없으면 dict와 bisect로 정렬을 유지한 가격 리스트를 사용합니다.
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        if SORTEDCONTAINERS_AVAILABLE:
+            self._levels = SortedDict()
+            self._prices = self._levels.keys()  # 정렬된 키 뷰 (인덱스 접근 가능)
+        else:
+            self._levels = {}
+            self._prices = []
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def clear(self):
+        self._levels.clear()
+        if not SORTEDCONTAINERS_AVAILABLE:
+            self._prices.clear()
+
+    def set(self, price: float, size: float):
+        """가격 수준의 수량 갱신 (0 이하면 삭제)"""
+        levels = self._levels
+        if size > 0:
+            if not SORTEDCONTAINERS_AVAILABLE and price not in levels:
+                bisect.insort(self._prices, price)
+            levels[price] = size
+        elif price in levels:
+            del levels[price]
+            if not SORTEDCONTAINERS_AVAILABLE:
+                del self._prices[bisect.bisect_left(self._prices, price)]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """최우선 호가 (비어 있으면 None)"""
+        if not self._levels:
+            return None
+        price = self._prices[-1] if self.descending else self._prices[0]
+        return (price, self._levels[price])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        """최우선 호가부터 (가격, 수량) 순회"""
+        levels = self._levels
+        prices = reversed(self._prices) if self.descending else iter(self._prices)
+        return ((price, levels[price]) for price in prices)
+
+
+class OrderBook:
+    """시퀀스 누락을 감지하는 증분 L2 호가창 클래스 (한 스레드에서만 갱신)"""
+
+    def __init__(self):
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.sequence: Optional[int] = None  # 마지막으로 반영한 시퀀스 (None이면 스냅샷 필요)
+        self.timestamp: Optional[float] = None
+        self.updates = 0
+        self.gaps = 0
+
+    @property
+    def synced(self) -> bool:
+        """스냅샷을 받아 증분을 반영할 수 있는 상태인지 여부"""
+        return self.sequence is not None
+
+    def reset(self):
+        """호가 비우기 (다음 스냅샷까지 증분을 받지 않음)"""
+        self.bids.clear()
+        self.asks.clear()
+        self.sequence = None
+
+    def apply_snapshot(
+        self,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        sequence: Optional[int] = 0,
+        timestamp: Optional[float] = None
+    ):
+        """전체 호가로 교체 (가격/수량은 문자열도 가능)"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, size, *_ in bids:
+            self.bids.set(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.set(float(price), float(size))
+        self.sequence = sequence if sequence is not None else 0
+        self.timestamp = timestamp
+        self.updates += 1
+
+    def apply_delta(
+        self,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        sequence: int,
+        first_sequence: Optional[int] = None,
+        timestamp: Optional[float] = None
+    ) -> bool:
+        """
+        증분 반영 (수량 0은 삭제)
+        이벤트가 [first_sequence, sequence] 구간을 덮는 형식(Binance U/u)이면
+        first_sequence ≤ 마지막 시퀀스 + 1 ≤ sequence일 때 연속으로 보고,
+        first_sequence가 없으면 sequence가 마지막 시퀀스 + 1이어야 연속입니다.
+        이미 반영한 구간(sequence ≤ 마지막 시퀀스)의 이벤트는 무시합니다.
+
+        Returns:
+            반영(또는 무시) 여부 (False면 누락으로 호가를 비웠으므로 스냅샷을 다시 받아야 함)
+        """
+        if self.sequence is None:
+            return False
+        if sequence <= self.sequence:
+            return True
+        if (sequence if first_sequence is None else first_sequence) > self.sequence + 1:
+            self.gaps += 1
+            self.reset()
+            return False
+
+        side = self.bids
+        for price, size, *_ in bids:
+            side.set(float(price), float(size))
+        side = self.asks
+        for price, size, *_ in asks:
+            side.set(float(price), float(size))
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.updates += 1
+        return True
+
+    def snapshot(self, depth: int = 20) -> BookSnapshot:
+        """최우선 호가부터 depth개씩 복사"""
+        return BookSnapshot(list(islice(self.bids, depth)), list(islice(self.asks, depth)),
+                            self.timestamp, self.sequence)
+
+
+def _best(levels: Iterable[Sequence]) -> Optional[Sequence]:
+    return next(iter(levels), None)
+
+
+def mid_price(bids: Iterable[Sequence], asks: Iterable[Sequence]) -> Optional[float]:
+    """최우선 매수/매도 호가의 중간 가격"""
+    bid, ask = _best(bids), _best(asks)
+    if bid is None or ask is None:
+        return None
+    return (bid[0] + ask[0]) / 2
+
+
+def microprice(bids: Iterable[Sequence], asks: Iterable[Sequence]) -> Optional[float]:
+    """잔량 가중 중간 가격: (매도호가 × 매수잔량 + 매수호가 × 매도잔량) / (매수잔량 + 매도잔량)"""
+    bid, ask = _best(bids), _best(asks)
+    if bid is None or ask is None:
+        return None
+    bid_price, bid_size = bid[0], bid[1]
+    ask_price, ask_size = ask[0], ask[1]
+    total = bid_size + ask_size
+    if total <= 0:
+        return (bid_price + ask_price) / 2
+    return (ask_price * bid_size + bid_price * ask_size) / total
+
+
+def _vwap(levels: Iterable[Sequence], notional: float) -> Optional[float]:
+    """최우선 호가부터 명목 금액만큼 체결했을 때의 평균가 (호가가 부족하면 있는 만큼)"""
+    cost = quantity = 0.0
+    for level in levels:
+        price, size = level[0], level[1]
+        level_cost = price * size
+        if cost + level_cost >= notional:
+            quantity += (notional - cost) / price
+            cost = notional
+            break
+        cost += level_cost
+        quantity += size
+    return cost / quantity if quantity > 0 else None
+
+
+def depth_weighted_price(bids: Iterable[Sequence], asks: Iterable[Sequence], notional: float) -> Optional[float]:
+    """명목 금액만큼 매수(매도 호가 소진)와 매도(매수 호가 소진)했을 때 평균 체결가의 평균"""
+    buy = _vwap(asks, notional)
+    sell = _vwap(bids, notional)
+    if buy is None or sell is None:
+        return None
+    return (buy + sell) / 2
+
+
+def book_price(
+    bids: Iterable[Sequence],
+    asks: Iterable[Sequence],
+    method: str,
+    notional: Optional[float] = None
+) -> Optional[float]:
+    """
+    호가 기준 가격 (한쪽이 비었거나 매수/매도 호가가 교차하면 None)
+
+    Args:
+        method: 'mid', 'microprice', 'depth'
+        notional: depth 방식의 명목 금액 (호가 통화 기준)
+    """
+    bid, ask = _best(bids), _best(asks)
+    if bid is None or ask is None or bid[0] >= ask[0]:
+        return None
+    if method == 'mid':
+        return mid_price(bids, asks)
+    if method == 'microprice':
+        return microprice(bids, asks)
+    if method == 'depth':
+        if not notional:
+            raise ValueError("depth 방식에는 명목 금액(notional)이 필요합니다")
+        return depth_weighted_price(bids, asks, notional)
+    raise ValueError(f"지원하지 않는 호가 가격 방식: {method}")
+
+
+def book_summary(bids: Sequence[Sequence], asks: Sequence[Sequence], notional: Optional[float] = None) -> dict:
+    """
+    호가 요약 (API 응답용)
+
+    Returns:
+        {'best_bid', 'best_ask', 'spread_bps', 'mid', 'microprice', 'depth'}  # 값이 없으면 None
+    """
+    bid, ask = _best(bids), _best(asks)
+    mid = mid_price(bids, asks)
+    return {
+        'best_bid': bid[0] if bid is not None else None,
+        'best_ask': ask[0] if ask is not None else None,
+        'spread_bps': round((ask[0] - bid[0]) / mid * 1e4, 3) if mid else None,
+        'mid': mid,
+        'microprice': microprice(bids, asks),
+        'depth': depth_weighted_price(bids, asks, notional) if notional else None,
+    }
+
+
+if __name__ == '__main__':
+    # 테스트: 스냅샷 + 증분 반영, 누락 감지, 가격 계산, 갱신 비용
+    import random
+    import time
+
+    book = OrderBook()
+    book.apply_snapshot([('3000.0', '2'), ('2999.5', '5')], [('3000.5', '1'), ('3001.0', '4')], sequence=100)
+    assert book.apply_delta([('3000.0', '0'), ('2999.8', '3')], [('3000.2', '1')], sequence=103, first_sequence=99)
+    assert book.bids.best() == (2999.8, 3.0) and book.asks.best() == (3000.2, 1.0)
+    assert book.apply_delta([], [('3000.2', '9')], sequence=102, first_sequence=101)  # 이미 반영한 구간 → 무시
+    assert book.asks.best() == (3000.2, 1.0)
+    assert not book.apply_delta([], [], sequence=110, first_sequence=105) and not book.synced and book.gaps == 1
+
+    bids, asks = [(2999.0, 1.0), (2998.0, 10.0)], [(3001.0, 3.0), (3002.0, 10.0)]
+    assert mid_price(bids, asks) == 3000.0
+    assert microprice(bids, asks) == (3001.0 * 1 + 2999.0 * 3) / 4  # 매수 잔량이 적어 매수호가 쪽으로 기움
+    sell_vwap = 9003.0 / (1 + (9003.0 - 2999.0) / 2998.0)  # 매수 호가 1개를 다 먹고 나머지는 2998에서 체결
+    assert abs(book_price(bids, asks, 'depth', 3001.0 * 3) - (3001.0 + sell_vwap) / 2) < 1e-9
+    assert book_price([(3001.0, 1.0)], [(3000.0, 1.0)], 'mid') is None  # 교차 호가
+    print(book_summary(bids, asks, 10_000.0))
+
+    # Binance 전체 갱신 속도 기준 (100ms마다 수백 개 가격 수준 변경)
+    random.seed(1)
+    book.apply_snapshot([(3000 - i * 0.01, 1.0) for i in range(5000)],
+                        [(3000.01 + i * 0.01, 1.0) for i in range(5000)], sequence=0)
+    events = []
+    for sequence in range(1, 201):
+        changes = [(round(3000 + random.gauss(0, 5), 2), random.choice((0.0, random.random() * 5)))
+                   for _ in range(200)]
+        events.append(([c for c in changes if c[0] <= 3000], [c for c in changes if c[0] > 3000], sequence))
+    started = time.perf_counter()
+    for event_bids, event_asks, sequence in events:
+        book.apply_delta(event_bids, event_asks, sequence)
+        book_price(book.bids, book.asks, 'depth', 50_000.0)
+    elapsed = time.perf_counter() - started
+    print(f"증분 200개 × 가격 수준 200개: 이벤트당 {elapsed / len(events) * 1e6:.0f} µs "
+          f"(sortedcontainers: {SORTEDCONTAINERS_AVAILABLE})")
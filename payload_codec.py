@@ -0,0 +1,264 @@
+"""
+페이로드 인코딩
+틱마다 만든 페이로드를 코덱(JSON, MessagePack)별로 한 번만 인코딩하고,
+같은 바이트를 모든 웹소켓 클라이언트와 HTTP 요청에 재사용합니다.
+HTTP 응답용 gzip/brotli 압축 결과도 페이로드마다 한 번만 만들어 재사용합니다.
+orjson이 있으면 JSON 인코딩에 사용하고, 없으면 표준 json으로 동작합니다.
+"""
+import gzip
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+CODEC_JSON = 'json'
+CODEC_MSGPACK = 'msgpack'
+
+CONTENT_TYPES = {
+    CODEC_JSON: 'application/json',
+    CODEC_MSGPACK: 'application/msgpack',
+}
+
+
+def available_codecs() -> tuple:
+    """사용 가능한 코덱 목록"""
+    return (CODEC_JSON, CODEC_MSGPACK) if MSGPACK_AVAILABLE else (CODEC_JSON,)
+
+
+def negotiate_codec(requested: Optional[str]) -> str:
+    """클라이언트가 요청한 코덱 (지원하지 않으면 JSON)"""
+    return requested if requested in available_codecs() else CODEC_JSON
+
+
+# Content-Encoding (선호 순서)
+ENCODING_BROTLI = 'br'
+ENCODING_GZIP = 'gzip'
+
+COMPRESSORS = {
+    ENCODING_GZIP: lambda data: gzip.compress(data, compresslevel=6),
+}
+if BROTLI_AVAILABLE:
+    COMPRESSORS[ENCODING_BROTLI] = lambda data: brotli.compress(data, quality=5)
+
+
+def available_encodings() -> tuple:
+    """사용 가능한 압축 방식 목록 (선호 순서)"""
+    return tuple(encoding for encoding in (ENCODING_BROTLI, ENCODING_GZIP) if encoding in COMPRESSORS)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Accept-Encoding 헤더로 압축 방식 선택 (q=0은 제외, 같은 가중치면 brotli 우선)
+
+    Returns:
+        'br', 'gzip' 또는 None (압축하지 않음)
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best = None
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (encoding, weight)
+    return best[0] if best is not None else None
+
+
+def _replace_non_finite(obj: Any) -> Any:
+    """NaN/Infinity를 None으로 바꾼 사본 (표준 json 폴백용, orjson과 같은 결과)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _replace_non_finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_replace_non_finite(value) for value in obj]
+    return obj
+
+
+def encode_json(obj: Any) -> bytes:
+    """JSON 인코딩 (orjson 우선, NaN/Infinity는 null)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    # 표준 json은 NaN 토큰을 그대로 쓰므로 (브라우저 JSON.parse 실패) 미리 null로 바꾸고 allow_nan=False로 확인
+    return json.dumps(_replace_non_finite(obj), separators=(',', ':'), ensure_ascii=False,
+                      allow_nan=False).encode('utf-8')
+
+
+def encode_msgpack(obj: Any) -> bytes:
+    """MessagePack 인코딩"""
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+ENCODERS = {
+    CODEC_JSON: encode_json,
+    CODEC_MSGPACK: encode_msgpack,
+}
+
+
+def decode_payload(data: bytes, codec: str = CODEC_JSON) -> Any:
+    """인코딩된 페이로드 복원 (encode_json/encode_msgpack의 역)"""
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(data, raw=False)
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+class JsonModule:
+    """
+    Socket.IO 패킷 인코딩용 json 모듈 대체 (orjson 사용)
+    SocketIO(json=JsonModule)로 넘기면 미리 인코딩하지 않은 이벤트도 orjson으로 인코딩됩니다.
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        return encode_json(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        if ORJSON_AVAILABLE:
+            return orjson.loads(data)
+        return json.loads(data, *args, **kwargs)
+
+
+class CodecStats:
+    """코덱별 인코딩 시간과 바이트 수 통계 클래스"""
+
+    def __init__(self):
+        self._stats: Dict[str, list] = {}  # {이름: [횟수, 누적 ns, 누적 바이트, 최대 ns, 마지막 바이트]}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ns: int, size: int):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, elapsed_ns, size, elapsed_ns, size]
+                return
+            stats[0] += 1
+            stats[1] += elapsed_ns
+            stats[2] += size
+            stats[3] = max(stats[3], elapsed_ns)
+            stats[4] = size
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """이름별 인코딩 횟수, 평균/최대 인코딩 시간(µs), 평균/마지막 바이트 수"""
+        with self._lock:
+            return {
+                name: {
+                    'encodes': count,
+                    'avg_encode_us': round(total_ns / count / 1000, 2),
+                    'max_encode_us': round(max_ns / 1000, 2),
+                    'avg_bytes': round(total_bytes / count),
+                    'last_bytes': last_bytes,
+                }
+                for name, (count, total_ns, total_bytes, max_ns, last_bytes) in self._stats.items()
+            }
+
+
+class EncodedPayload:
+    """코덱별로 한 번만 인코딩하는 페이로드 클래스"""
+
+    def __init__(self, data: Dict, name: str, stats: Optional[CodecStats] = None):
+        """
+        Args:
+            data: 인코딩할 페이로드 (생성 후 수정하지 않음)
+            name: 통계에 사용할 페이로드 이름 (예: 'delta', 'full', 'api_data')
+            stats: 인코딩 통계 수집기
+        """
+        self.data = data
+        self.name = name
+        self.stats = stats
+        self._encoded: Dict[str, bytes] = {}
+        self._compressed: Dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, codec: str = CODEC_JSON) -> bytes:
+        """코덱별 인코딩 결과 (처음 요청 시 한 번만 인코딩)"""
+        encoded = self._encoded.get(codec)
+        if encoded is not None:
+            return encoded
+
+        with self._lock:
+            encoded = self._encoded.get(codec)
+            if encoded is None:
+                started_ns = time.perf_counter_ns()
+                encoded = ENCODERS[codec](self.data)
+                if self.stats is not None:
+                    self.stats.record(f'{self.name}.{codec}', time.perf_counter_ns() - started_ns, len(encoded))
+                self._encoded[codec] = encoded
+        return encoded
+
+    def compress(self, codec: str, encoding: str) -> bytes:
+        """코덱별 인코딩 결과를 encoding('gzip', 'br')으로 압축 (처음 요청 시 한 번만 압축)"""
+        key = (codec, encoding)
+        compressed = self._compressed.get(key)
+        if compressed is not None:
+            return compressed
+
+        encoded = self.encode(codec)
+        with self._lock:
+            compressed = self._compressed.get(key)
+            if compressed is None:
+                started_ns = time.perf_counter_ns()
+                compressed = COMPRESSORS[encoding](encoded)
+                if self.stats is not None:
+                    self.stats.record(f'{self.name}.{codec}.{encoding}', time.perf_counter_ns() - started_ns,
+                                      len(compressed))
+                self._compressed[key] = compressed
+        return compressed
+
+
+if __name__ == '__main__':
+    # 테스트
+    stats = CodecStats()
+    payload = EncodedPayload({
+        'prices': {'upbit_eth_krw': 5_000_000.0, 'overseas_eth_usdt': {'binance': 3500.0, 'okx': None}},
+        'oracle_result': {'median_price': 4_900_000.0, 'price_details': [('upbit', 5_000_000.0)]},
+        'price_history_delta': {'timestamps': [1_700_000_000.5], 'evicted': 0},
+    }, 'delta', stats)
+    for codec in available_codecs():
+        assert payload.encode(codec) is payload.encode(codec)
+        print(codec, len(payload.encode(codec)), 'bytes')
+        for encoding in available_encodings():
+            assert payload.compress(codec, encoding) is payload.compress(codec, encoding)
+    assert gzip.decompress(payload.compress(CODEC_JSON, ENCODING_GZIP)) == payload.encode(CODEC_JSON)
+
+    # NaN/Infinity는 orjson 유무와 관계없이 null (브라우저 JSON.parse가 읽을 수 있어야 함)
+    ORJSON_AVAILABLE, orjson_available = False, ORJSON_AVAILABLE
+    non_finite = {'a': math.nan, 'b': [1.5, math.inf, (-math.inf,)], 'c': {'d': 'NaN'}}
+    assert encode_json(non_finite) == b'{"a":null,"b":[1.5,null,[null]],"c":{"d":"NaN"}}'
+    ORJSON_AVAILABLE = orjson_available
+    if ORJSON_AVAILABLE:
+        assert json.loads(encode_json(non_finite)) == json.loads(b'{"a":null,"b":[1.5,null,[null]],"c":{"d":"NaN"}}')
+
+    assert negotiate_encoding('gzip, deflate, br') == (ENCODING_BROTLI if BROTLI_AVAILABLE else ENCODING_GZIP)
+    assert negotiate_encoding('br;q=0.5, gzip') == ENCODING_GZIP
+    assert negotiate_encoding('gzip;q=0, identity') is None
+    assert negotiate_encoding(None) is None
+    print(stats.get_stats())
@@ -0,0 +1,95 @@
+"""
+버전 관리 가격 장부
+소스별 최신 가격을 불변 스냅샷으로 보관합니다.
+쓰기는 짧은 락 안에서 새 스냅샷으로 교체하고, 읽기는 락 없이 현재 스냅샷 참조 하나만 가져옵니다.
+"""
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
+
+# 소스별 가격 슬롯
+# price: 가격, timestamp: 거래소 기준 시각 (없으면 수신 시각), received_at: 수신 시각
+PriceSlot = namedtuple('PriceSlot', ['price', 'timestamp', 'received_at'])
+
+# 장부 스냅샷: 버전과 읽기 전용 {소스: PriceSlot}
+PriceBookSnapshot = namedtuple('PriceBookSnapshot', ['version', 'slots'])
+
+
+class PriceBook:
+    """버전 관리 가격 장부 클래스"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._snapshot = PriceBookSnapshot(0, MappingProxyType({}))
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self) -> PriceBookSnapshot:
+        """모든 소스의 일관된 스냅샷 (락 없음, 참조 하나만 읽음)"""
+        return self._snapshot
+
+    def get(self, source: str) -> Optional[PriceSlot]:
+        """소스의 최신 슬롯"""
+        return self._snapshot.slots.get(source)
+
+    def update(self, source: str, price: float, timestamp: Optional[float] = None) -> bool:
+        """
+        소스 가격 갱신
+
+        Returns:
+            이전 가격과 달라졌는지 여부
+        """
+        return bool(self.update_many(((source, price, timestamp),)))
+
+    def update_many(self, updates: Iterable[Tuple[str, float, Optional[float]]]) -> Tuple[str, ...]:
+        """
+        여러 소스 가격을 한 번에 갱신 (버전은 한 번만 증가)
+
+        Returns:
+            가격이 바뀐 소스 목록
+        """
+        received_at = time.time()
+        with self._cond:
+            current = self._snapshot
+            slots = dict(current.slots)
+            changed = []
+            for source, price, timestamp in updates:
+                previous = slots.get(source)
+                if previous is None or previous.price != price:
+                    changed.append(source)
+                slots[source] = PriceSlot(price, timestamp if timestamp is not None else received_at, received_at)
+            self._snapshot = PriceBookSnapshot(current.version + 1, MappingProxyType(slots))
+            self._cond.notify_all()
+        return tuple(changed)
+
+    def wait_for_change(self, since_version: int, timeout: Optional[float] = None) -> PriceBookSnapshot:
+        """
+        since_version보다 새로운 스냅샷이 생길 때까지 대기
+
+        Returns:
+            최신 스냅샷 (시간 초과 시 버전이 그대로일 수 있음)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._snapshot.version > since_version, timeout)
+            return self._snapshot
+
+
+def slot_prices(slots: Mapping[str, PriceSlot]) -> dict:
+    """{소스: 가격} 변환"""
+    return {source: slot.price for source, slot in slots.items()}
+
+
+if __name__ == '__main__':
+    # 테스트
+    book = PriceBook()
+    print(book.update('upbit_eth_krw', 5_000_000, 1_700_000_000.0))
+    print(book.update('upbit_eth_krw', 5_000_000, 1_700_000_000.5))  # 같은 가격
+    snapshot = book.snapshot()
+
+    threading.Timer(0.05, lambda: book.update_many([('binance_eth_usdt', 3500.0, None)])).start()
+    latest = book.wait_for_change(snapshot.version, timeout=1)
+    print(snapshot.version, '→', latest.version, slot_prices(latest.slots))
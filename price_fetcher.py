@@ -1,7 +1,8 @@
 """
 거래소 가격 데이터 수집 모듈
 업비트와 해외 거래소 모두 웹소켓을 사용합니다.
-업비트는 직접 웹소켓을 사용하고, 해외 거래소는 CCXT Pro를 사용합니다.
+업비트는 aiohttp 웹소켓을 직접 사용하고, 해외 거래소는 CCXT Pro를 사용합니다.
+모든 웹소켓 코루틴은 공유 asyncio 수집 루프(IngestLoopPool)에서 실행됩니다.
 """
 import ccxt
 import time
@@ -9,15 +10,30 @@ import json
 import threading
 import uuid
 import asyncio
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Sequence, Tuple, Callable
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from asset_matrix import AssetPriceMatrix, DEFAULT_SYMBOLS, QUOTE
+from ingest_loop import IngestLoopPool
+from metrics import METRICS, LatencyHistogram, MetricsRegistry
+from order_book import (
+    DEFAULT_BOOK_NOTIONAL, PRICING_METHODS, BookSnapshot, OrderBook, book_price, book_summary,
+)
+from price_book import PriceBook
+from rest_pool import RestFallbackPool
+from source_health import STATES, SourceHealthRegistry, backoff_delay
 try:
-    import websocket
-    WEBSOCKET_AVAILABLE = True
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
 except ImportError:
-    WEBSOCKET_AVAILABLE = False
-    print("경고: websocket-client가 설치되지 않았습니다. 업비트 웹소켓을 사용하려면 'pip install websocket-client'를 실행하세요.")
+    AIOHTTP_AVAILABLE = False
+    print("경고: aiohttp가 설치되지 않았습니다. 업비트 웹소켓을 사용하려면 'pip install aiohttp'를 실행하세요.")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 try:
     import ccxt.pro as ccxtpro
@@ -27,15 +43,112 @@ except ImportError:
     print("경고: ccxt-pro가 설치되지 않았습니다. 해외 거래소 웹소켓을 사용하려면 'pip install ccxt-pro'를 실행하세요.")
 
 
+# 업비트 프레임 디코더 (orjson이 있으면 bytes를 그대로 파싱)
+_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# 호가 방식에서 호가창을 받는 업비트 코드 (ETH 오라클 입력만)
+UPBIT_BOOK_CODES = ('KRW-ETH', 'KRW-USDT')
+
+# 소스별로 보관하는 최근 호가 수준 수 (API 응답과 depth 요약용)
+BOOK_SNAPSHOT_DEPTH = 50
+
+
+def parse_upbit_frame(message, orderbooks: Optional[list] = None) -> List[Tuple[str, float, Optional[float]]]:
+    """
+    업비트 웹소켓 프레임에서 티커의 (코드, 가격, 타임스탬프 초)만 추출
+    SIMPLE 포맷(축약 필드명)을 우선 처리하고, DEFAULT 포맷(긴 필드명)도 지원합니다.
+    단일 객체 또는 배열 형식 모두 가능하며, 티커가 아닌 항목은 건너뜁니다.
+    
+    Args:
+        orderbooks: 주어지면 호가 항목을 (코드, 매수 호가, 매도 호가, 타임스탬프 초)로 추가
+                    (호가는 최우선부터 [(가격, 수량), ...])
+    
+    Raises:
+        ValueError: JSON 파싱 실패
+    """
+    data = _loads(message)
+    ticks = []
+    for item in (data if isinstance(data, list) else (data,)):
+        if not isinstance(item, dict):
+            continue
+        code = item.get('cd')
+        if code is not None:
+            # SIMPLE 포맷
+            kind = item.get('ty')
+            if kind != 'ticker':
+                if kind == 'orderbook' and orderbooks is not None:
+                    units = item.get('obu') or ()
+                    timestamp_ms = item.get('tms')
+                    orderbooks.append((
+                        code,
+                        [(unit['bp'], unit['bs']) for unit in units],
+                        [(unit['ap'], unit['as']) for unit in units],
+                        timestamp_ms / 1000.0 if timestamp_ms else None,
+                    ))
+                continue
+            price = item.get('tp')
+            timestamp_ms = item.get('tms')
+        else:
+            # DEFAULT 포맷
+            kind = item.get('type')
+            if kind != 'ticker':
+                if kind == 'orderbook' and orderbooks is not None:
+                    units = item.get('orderbook_units') or ()
+                    timestamp_ms = item.get('timestamp')
+                    orderbooks.append((
+                        item.get('code'),
+                        [(unit['bid_price'], unit['bid_size']) for unit in units],
+                        [(unit['ask_price'], unit['ask_size']) for unit in units],
+                        timestamp_ms / 1000.0 if timestamp_ms else None,
+                    ))
+                continue
+            code = item.get('code')
+            price = item.get('trade_price')
+            timestamp_ms = item.get('timestamp')
+        if code is None or price is None:
+            continue
+        ticks.append((code, float(price), timestamp_ms / 1000.0 if timestamp_ms else None))
+    return ticks
+
+
 class PriceFetcher:
     """거래소 가격 수집 클래스"""
     
-    def __init__(self):
-        """거래소 초기화"""
-        # 업비트 (국내)
-        self.upbit = ccxt.upbit({
-            'enableRateLimit': True,
-        })
+    def __init__(
+        self,
+        num_ingest_loops: int = 1,
+        symbols: Optional[Sequence[str]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        max_source_age: float = 30.0,
+        pricing: str = 'last',
+        book_notional: Optional[Dict[str, float]] = None
+    ):
+        """
+        거래소 초기화
+        
+        Args:
+            num_ingest_loops: 웹소켓 수집에 사용할 이벤트 루프(스레드) 수
+            symbols: 다중 자산 가격 행렬의 심볼 유니버스 (ETH는 항상 포함)
+            metrics: 지연 히스토그램을 등록할 메트릭 레지스트리 (기본값: 프로세스 기본 레지스트리)
+            max_source_age: 이보다 오래된 소스 가격은 오라클 입력에서 제외 (초)
+            pricing: 오라클 입력 가격 방식 ('last': 티커 최종 체결가, 'mid'/'microprice'/'depth': 호가창 기준)
+            book_notional: depth 방식의 호가 통화별 명목 금액 (예: {'USDT': 50000, 'KRW': 70000000})
+        """
+        if pricing not in PRICING_METHODS:
+            raise ValueError(f"pricing은 {PRICING_METHODS} 중 하나여야 합니다")
+        
+        # 티커 변경 리스너 (웹소켓 초기화 전에 준비)
+        self.tick_listeners: List[Callable[[str, float, float], None]] = []
+        
+        # 오라클 입력 가격 방식 (호가 방식이면 ETH/USDT와 업비트 ETH·USDT/KRW는 호가창에서 계산)
+        self.pricing = pricing
+        self.book_notional = dict(DEFAULT_BOOK_NOTIONAL, **(book_notional or {}))
+        self.order_books: Dict[str, BookSnapshot] = {}  # 장부 키 → 최근 호가 (최우선 BOOK_SNAPSHOT_DEPTH개)
+        self.depth_books: Dict[str, OrderBook] = {}  # 증분을 직접 반영하는 호가창 (Binance)
+        
+        # 심볼 유니버스 (ETH 오라클과 대시보드는 항상 ETH를 사용)
+        symbols = tuple(symbols or DEFAULT_SYMBOLS)
+        self.symbols = symbols if 'ETH' in symbols else ('ETH',) + symbols
         
         # 해외 거래소들 (CCXT Pro 사용)
         self.overseas_exchanges_pro = {}  # CCXT Pro 인스턴스
@@ -141,38 +254,183 @@ class PriceFetcher:
             except Exception as e:
                 print(f"경고: Kraken 초기화 실패: {e}")
         
+        # 호가창을 받는 거래소 (이 거래소들의 ETH 티커는 가격 장부 대신 가격 행렬에만 반영)
+        self.book_venues = set()
+        if pricing != 'last' and CCXT_PRO_AVAILABLE:
+            for exchange_name, exchange in self.overseas_exchanges:
+                if (exchange_name == 'binance' and AIOHTTP_AVAILABLE) or \
+                        getattr(exchange, 'has', {}).get('watchOrderBook'):
+                    self.book_venues.add(exchange_name)
+        self.upbit_books = pricing != 'last' and AIOHTTP_AVAILABLE
+        
+        # 가격 장부 (소스별 최근 가격, 웹소켓 스레드 시작 전에 준비)
+        self.price_book = PriceBook()
+        self.cache_max_age = 5  # 이보다 오래된 가격은 백그라운드 REST 폴백으로 갱신 요청 (초)
+        self.max_source_age = max_source_age  # 갱신되지 않은 채 이보다 오래되면 제외 (초)
+        
+        # 다중 자산 가격 행렬 (심볼 × 해외 거래소, 수신 스레드가 제자리 갱신)
+        self.asset_matrix = AssetPriceMatrix(self.symbols, [name for name, _ in self.overseas_exchanges])
+        
+        # 수신 메시지 라우팅 테이블 (심볼 추가/제거 시 통째로 교체)
+        self.subscription_lock = threading.Lock()
+        self._build_routes()
+        
+        # 소스별 메시지 처리 비용과 거래소 타임스탬프 → 수신 지연 히스토그램 (수신 경로에서 재사용)
+        self.metrics = metrics or METRICS
+        self.ingest_histograms: Dict[str, LatencyHistogram] = {}
+        self.lag_histograms: Dict[str, LatencyHistogram] = {}
+        self._register_metrics()
+        
+        # 거래소별 상태 (웹소켓과 REST 폴백의 성공/실패로 회로 차단, 차단된 거래소는 중앙값에서 제외)
+        self.health = SourceHealthRegistry()
+        self.upbit_health = self.health.get('upbit')
+        
+        # 공유 수집 루프 (모든 웹소켓 코루틴을 소수의 스레드에서 실행)
+        self.ingest = IngestLoopPool(num_loops=num_ingest_loops)
+        self.ingest.start()
+        
+        # REST 폴백 클라이언트 풀 (거래소별 클라이언트 1개를 재사용, 수집 루프 0에서 실행)
+        self.rest_pool = RestFallbackPool(self.ingest, loop_index=0, metrics=self.metrics, health=self.health)
+        self.rest_pool.register('upbit')
+        for exchange_name, exchange in self.overseas_exchanges:
+            self.rest_pool.register(exchange_name, getattr(exchange, 'id', exchange_name))
+            self.health.get(exchange_name)
+        # 호가창으로 채우는 슬롯은 REST 폴백도 호가 기준 가격으로 갱신 (체결가와 섞이지 않도록)
+        for exchange_name in self.book_venues:
+            self.rest_pool.register_book(exchange_name, f'ETH/{QUOTE}', self._rest_book_pricer(QUOTE))
+        if self.upbit_books:
+            for code in UPBIT_BOOK_CODES:
+                base = code.split('-')[1]
+                self.rest_pool.register_book('upbit', f'{base}/KRW', self._rest_book_pricer('KRW'))
+        
         # 해외 거래소 WebSocket 관련 변수
-        self.overseas_ws_tasks = {}  # asyncio 태스크 저장
-        self.overseas_ws_loops = {}  # 각 거래소별 이벤트 루프
-        self.overseas_ws_threads = {}  # 각 거래소별 스레드
+        self.overseas_ws_futures = {}  # 거래소별 일괄 수신 코루틴 Future (watch_tickers 미지원 시 (거래소, 마켓)별)
+        self.overseas_ws_loop_index = {}  # 각 거래소가 배치된 수집 루프 인덱스
         self.overseas_ws_running = {}  # 실행 상태
-        self.overseas_ws_lock = threading.Lock()
         
         # 해외 거래소 WebSocket 초기화
         if CCXT_PRO_AVAILABLE:
             self._init_overseas_websockets()
         
-        # 가격 캐시 (최근 가격 저장)
-        self.price_cache = {}
-        self.cache_timestamp = {}
-        self.cache_ttl = 1  # 1초 캐시
-        
         # 업비트 웹소켓 관련 변수
-        self.upbit_ws = None
-        self.upbit_ws_thread = None
+        self.upbit_ws_future = None
         self.upbit_ws_running = False
-        self.upbit_ws_lock = threading.Lock()
+        self.upbit_ws = None  # 연결된 웹소켓 (구독 변경 요청 전송용)
+        self.upbit_pending = []  # 가격 장부 반영 대기 중인 업비트 틱 (수집 루프 0에서만 접근)
+        self.upbit_flush_scheduled = False
         
-        # 업비트 웹소켓 초기화 (websocket-client가 있는 경우)
-        if WEBSOCKET_AVAILABLE:
+        # 업비트 웹소켓 초기화 (aiohttp가 있는 경우)
+        if AIOHTTP_AVAILABLE:
             self._init_upbit_websocket()
     
-    def _process_overseas_ticker(self, exchange_name: str, ticker: dict):
-        """해외 거래소 티커 데이터 처리"""
+    def add_tick_listener(self, listener: Callable[[str, float, float], None]):
+        """
+        티커 변경 리스너 등록
+        가격이 바뀐 틱마다 listener(cache_key, price, timestamp)가 수신 스레드에서 호출됩니다.
+        """
+        self.tick_listeners.append(listener)
+    
+    def _notify_tick(self, cache_key: str, price: float, timestamp: float):
+        """등록된 리스너에 티커 변경 알림"""
+        for listener in self.tick_listeners:
+            try:
+                listener(cache_key, price, timestamp)
+            except Exception as e:
+                print(f"티커 리스너 오류 ({cache_key}): {e}")
+    
+    def _build_routes(self):
+        """
+        수신 메시지 라우팅 테이블 생성
+        마켓(또는 업비트 코드) → (심볼, 장부 키, 가격 장부 기록 여부)를 dict 조회 한 번으로 찾습니다.
+        호가창이 가격 장부를 갱신하는 소스는 티커를 가격 행렬에만 반영합니다.
+        수신 루프는 락 없이 현재 테이블을 읽으므로 항상 새 dict로 교체합니다.
+        """
+        overseas_routes = {}
+        for exchange_name, _ in self.overseas_exchanges:
+            ticker_in_book = exchange_name not in self.book_venues
+            overseas_routes[exchange_name] = {
+                f'{symbol}/{QUOTE}': (symbol, f'{exchange_name}_{symbol.lower()}_usdt', symbol == 'ETH' and ticker_in_book)
+                for symbol in self.symbols
+            }
+        upbit_routes = {
+            f'KRW-{symbol}': (symbol, f'upbit_{symbol.lower()}_krw', symbol == 'ETH' and not self.upbit_books)
+            for symbol in self.symbols
+        }
+        upbit_routes['KRW-USDT'] = ('USDT', 'upbit_usdt_krw', not self.upbit_books)
+        
+        self.overseas_routes = overseas_routes
+        self.upbit_routes = upbit_routes
+    
+    def add_symbol(self, symbol: str) -> bool:
+        """
+        심볼 구독 추가 (재연결 없이 기존 연결에서 구독)
+        
+        Returns:
+            추가 여부 (이미 구독 중이면 False)
+        """
+        symbol = symbol.strip().upper()
+        with self.subscription_lock:
+            if not symbol or symbol in self.symbols:
+                return False
+            self.symbols = self.symbols + (symbol,)
+            self.asset_matrix.add_symbol(symbol)
+            self._build_routes()
+            self._sync_subscriptions()
+        print(f"✅ {symbol} 구독 추가")
+        return True
+    
+    def remove_symbol(self, symbol: str) -> bool:
+        """
+        심볼 구독 제거 (ETH는 오라클 기본 자산이므로 제거 불가)
+        
+        Returns:
+            제거 여부
+        """
+        symbol = symbol.strip().upper()
+        if symbol == 'ETH':
+            print("ETH 구독은 제거할 수 없습니다")
+            return False
+        with self.subscription_lock:
+            if symbol not in self.symbols:
+                return False
+            self.symbols = tuple(name for name in self.symbols if name != symbol)
+            self._build_routes()
+            self.asset_matrix.remove_symbol(symbol)
+            self._sync_subscriptions()
+        print(f"✅ {symbol} 구독 제거")
+        return True
+    
+    def _sync_subscriptions(self):
+        """라우팅 테이블 변경을 웹소켓 구독에 반영 (subscription_lock 안에서 호출)"""
+        # watch_tickers 거래소는 수신 루프가 다음 메시지에서 새 마켓 목록으로 구독을 갱신
+        # watch_tickers 미지원 거래소는 마켓별 수신 코루틴을 추가/취소
+        for exchange_name, exchange in self.overseas_exchanges:
+            if not self.overseas_ws_running.get(exchange_name) or self._supports_watch_tickers(exchange):
+                continue
+            routes = self.overseas_routes[exchange_name]
+            removed = [key for key in self.overseas_ws_futures
+                       if isinstance(key, tuple) and key[0] == exchange_name and key[1] not in routes]
+            for key in removed:
+                self.overseas_ws_futures.pop(key).cancel()
+            for market in routes:
+                if (exchange_name, market) not in self.overseas_ws_futures:
+                    self._submit_watch_ticker(exchange_name, exchange, market)
+        
+        # 업비트는 같은 연결에서 전체 코드 목록으로 구독 요청을 다시 보냄
+        if self.upbit_ws_running:
+            self.ingest.submit(self._send_upbit_subscription(), 0)
+    
+    def _process_overseas_ticker(self, exchange_name: str, ticker: dict, route: Optional[Tuple[str, str, bool]] = None):
+        """해외 거래소 티커 데이터 처리 (route가 없으면 티커의 마켓으로 조회)"""
         try:
             if ticker is None:
                 return
             
+            if route is None:
+                route = self.overseas_routes.get(exchange_name, {}).get(ticker.get('symbol'))
+                if route is None:
+                    return  # 구독하지 않은 마켓
+            
             # CCXT Pro 티커 형식에서 가격 추출
             price = ticker.get('last') or ticker.get('close')
             if price is None:
@@ -180,282 +438,596 @@ class PriceFetcher:
             
             price = float(price)
             
+            symbol, cache_key, in_book = route
+            
             # 타임스탬프 추출
             timestamp = ticker.get('timestamp')
             if timestamp is None:
                 timestamp = time.time()
-            elif timestamp > 1e10:
-                timestamp = timestamp / 1000.0  # ms를 초로 변환
-            
-            cache_key = f'{exchange_name}_eth_usdt'
-            with self.overseas_ws_lock:
-                self.price_cache[cache_key] = price
-                self.cache_timestamp[cache_key] = timestamp
+            else:
+                if timestamp > 1e10:
+                    timestamp = timestamp / 1000.0  # ms를 초로 변환
+                self._lag_histogram(exchange_name).record(time.time() - timestamp)
+            changed = self.asset_matrix.update_overseas(symbol, exchange_name, price, timestamp)
+            if in_book:
+                changed = self.price_book.update(cache_key, price, timestamp)
+            if changed:
+                self._notify_tick(cache_key, price, timestamp)
         except (KeyError, ValueError, TypeError) as e:
             print(f"{exchange_name} 티커 데이터 처리 오류: {e}, 데이터: {ticker}")
     
+    def _record_ingest(self, source: str, started_ns: int):
+        """메시지 처리 비용 기록 (수집 루프 스레드에서 호출)"""
+        histogram = self.ingest_histograms.get(source)
+        if histogram is None:
+            histogram = self.ingest_histograms[source] = self.metrics.histogram(
+                'oracle_ingest_seconds', '수신 메시지 하나의 처리 시간', source=source
+            )
+        histogram.record((time.perf_counter_ns() - started_ns) / 1e9)
+    
+    def _lag_histogram(self, venue: str) -> LatencyHistogram:
+        """거래소별 거래소 타임스탬프 → 수신 지연 히스토그램"""
+        histogram = self.lag_histograms.get(venue)
+        if histogram is None:
+            histogram = self.lag_histograms[venue] = self.metrics.histogram(
+                'oracle_exchange_lag_seconds', '거래소 타임스탬프부터 가격 장부 반영까지의 지연', venue=venue
+            )
+        return histogram
+    
+    def _register_metrics(self):
+        """소스 신선도, 메시지 수, 거래소 상태, REST 폴백 오류 수 수집 함수 등록"""
+        def source_ages():
+            now = time.time()
+            return [({'source': source}, now - slot.timestamp)
+                    for source, slot in self.price_book.snapshot().slots.items()]
+        
+        def stale_sources():
+            return sum(1 for _, age in source_ages() if age >= self.cache_max_age)
+        
+        def messages():
+            return [({'source': source}, histogram.snapshot()['count'])
+                    for source, histogram in list(self.ingest_histograms.items())]
+        
+        def source_health():
+            return [({'venue': venue, 'state': state}, int(current == state))
+                    for venue, current in self.health.states().items() for state in STATES]
+        
+        def rest_errors():
+            return [({'venue': venue}, stats['errors']) for venue, stats in self.rest_pool.get_stats().items()]
+        
+        self.metrics.add_collector('oracle_source_age_seconds', 'gauge', '소스별 마지막 가격의 나이', source_ages)
+        self.metrics.add_collector('oracle_stale_sources', 'gauge',
+                                   '캐시 기준(cache_max_age)보다 오래된 소스 수', stale_sources)
+        self.metrics.add_collector('oracle_rest_refreshing', 'gauge', '백그라운드에서 조회 중인 REST 폴백 요청 수',
+                                   lambda: self.rest_pool.refreshing())
+        self.metrics.add_collector('oracle_source_health', 'gauge', '거래소별 현재 상태 (해당 상태만 1)',
+                                   source_health)
+        self.metrics.add_collector('oracle_circuit_trips_total', 'counter', '거래소별 회로 차단 횟수',
+                                   lambda: [({'venue': venue}, stats['trips'])
+                                            for venue, stats in self.health.snapshot().items()])
+        self.metrics.add_collector('oracle_source_messages_total', 'counter', '소스별 수신 메시지 수', messages)
+        self.metrics.add_collector('oracle_rest_fallback_errors_total', 'counter', '거래소별 REST 폴백 실패 수',
+                                   rest_errors)
+    
+    def get_ingest_stats(self) -> Dict:
+        """수집 스레드 수와 소스별 메시지당 처리 비용"""
+        sources = {}
+        for source, histogram in list(self.ingest_histograms.items()):
+            stats = histogram.snapshot()
+            sources[source] = {
+                'messages': stats['count'],
+                'avg_ingest_us': round(stats['mean'] * 1e6, 2) if stats['count'] else None,
+                'p99_ingest_us': round(stats['quantiles'][0.99] * 1e6, 2) if stats['count'] else None,
+            }
+        return {
+            'ingest_loops': self.ingest.num_loops,
+            'ingest_threads': self.ingest.thread_count,
+            'process_threads': threading.active_count(),
+            'sources': sources,
+        }
+    
+    @staticmethod
+    def _supports_watch_tickers(exchange) -> bool:
+        """여러 마켓을 한 구독으로 받는 watch_tickers 지원 여부"""
+        return bool(getattr(exchange, 'has', {}).get('watchTickers'))
+    
+    async def _watch_tickers_loop(self, exchange_name: str, exchange):
+        """
+        거래소별 일괄 티커 수신 루프
+        구독 중인 모든 마켓을 watch_tickers 하나로 받고, 라우팅 테이블이 바뀌면 다음 호출부터
+        새 마켓 목록으로 같은 연결에서 구독을 추가합니다 (제거된 마켓은 지원 시 구독 해지).
+        """
+        subscribed_routes = None
+        markets = []
+        health = self.health.get(exchange_name)
+        attempt = 0  # 연속 오류 수 (재시도 백오프용, 웹소켓만 따로 계산)
+        try:
+            while self.overseas_ws_running.get(exchange_name, False):
+                try:
+                    routes = self.overseas_routes[exchange_name]
+                    if routes is not subscribed_routes:
+                        if not exchange.markets:
+                            await exchange.load_markets()
+                        removed = [market for market in markets if market not in routes]
+                        markets = [market for market in routes if market in exchange.markets]
+                        unlisted = [market for market in routes if market not in exchange.markets]
+                        if unlisted:
+                            print(f"{exchange_name} 미상장 마켓 제외: {', '.join(unlisted)}")
+                        if removed and exchange.has.get('unWatchTickers'):
+                            await exchange.un_watch_tickers(removed)
+                        subscribed_routes = routes
+                    
+                    if not markets:
+                        await asyncio.sleep(1)
+                        continue
+                    
+                    tickers = await exchange.watch_tickers(markets)
+                    started_ns = time.perf_counter_ns()
+                    routes = self.overseas_routes[exchange_name]
+                    for market, ticker in tickers.items():
+                        route = routes.get(market)
+                        if route is not None:
+                            self._process_overseas_ticker(exchange_name, ticker, route)
+                    self._record_ingest(exchange_name, started_ns)
+                    health.record_success()
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    health.record_failure(e)
+                    delay = backoff_delay(attempt)
+                    print(f"{exchange_name} WebSocket 티커 수신 오류 ({delay:.1f}초 후 재시도): {e}")
+                    await asyncio.sleep(delay)  # 지터를 섞은 지수 백오프 후 재시도
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"{exchange_name} WebSocket 루프 오류: {e}")
+        finally:
+            self.overseas_ws_running[exchange_name] = False
+    
+    async def _watch_ticker_loop(self, exchange_name: str, exchange, market: str):
+        """watch_tickers 미지원 거래소의 마켓별 티커 수신 루프 (구독이 제거되면 종료)"""
+        health = self.health.get(exchange_name)
+        attempt = 0
+        try:
+            while self.overseas_ws_running.get(exchange_name, False):
+                route = self.overseas_routes[exchange_name].get(market)
+                if route is None:
+                    break
+                try:
+                    ticker = await exchange.watch_ticker(market)
+                    started_ns = time.perf_counter_ns()
+                    self._process_overseas_ticker(exchange_name, ticker, route)
+                    self._record_ingest(exchange_name, started_ns)
+                    health.record_success()
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    health.record_failure(e)
+                    delay = backoff_delay(attempt)
+                    print(f"{exchange_name} {market} WebSocket 티커 수신 오류 ({delay:.1f}초 후 재시도): {e}")
+                    await asyncio.sleep(delay)  # 지터를 섞은 지수 백오프 후 재시도
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"{exchange_name} {market} WebSocket 루프 오류: {e}")
+    
+    def _submit_watch_ticker(self, exchange_name: str, exchange, market: str):
+        loop_index = self.overseas_ws_loop_index[exchange_name]
+        self.overseas_ws_futures[(exchange_name, market)] = self.ingest.submit(
+            self._watch_ticker_loop(exchange_name, exchange, market), loop_index
+        )
+    
     def _init_overseas_websockets(self):
-        """해외 거래소 WebSocket 초기화 및 연결"""
+        """해외 거래소 WebSocket 초기화 및 연결 (공유 수집 루프에 코루틴 배치)"""
         if not CCXT_PRO_AVAILABLE:
             return
         
-        async def watch_ticker_loop(exchange_name: str, exchange):
-            """각 거래소별 티커 수신 루프"""
-            try:
-                while self.overseas_ws_running.get(exchange_name, False):
-                    try:
-                        # CCXT Pro의 watch_ticker 사용
-                        ticker = await exchange.watch_ticker('ETH/USDT')
-                        self._process_overseas_ticker(exchange_name, ticker)
-                    except Exception as e:
-                        print(f"{exchange_name} WebSocket 티커 수신 오류: {e}")
-                        await asyncio.sleep(1)  # 오류 시 1초 대기 후 재시도
-            except Exception as e:
-                print(f"{exchange_name} WebSocket 루프 오류: {e}")
-            finally:
-                self.overseas_ws_running[exchange_name] = False
-        
-        def run_async_loop(exchange_name: str, exchange):
-            """각 거래소별 이벤트 루프 실행"""
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            self.overseas_ws_loops[exchange_name] = loop
-            
-            try:
-                self.overseas_ws_running[exchange_name] = True
-                loop.run_until_complete(watch_ticker_loop(exchange_name, exchange))
-            except Exception as e:
-                print(f"{exchange_name} 이벤트 루프 오류: {e}")
-            finally:
-                loop.close()
-        
-        # 각 거래소별로 WebSocket 스레드 시작
+        # 거래소별 수신 코루틴을 공유 루프에 배치 (거래소 인스턴스는 항상 같은 루프에서 사용)
         for exchange_name, exchange in self.overseas_exchanges:
-            if exchange_name in self.overseas_exchanges_pro:
-                thread = threading.Thread(
-                    target=run_async_loop,
-                    args=(exchange_name, exchange),
-                    daemon=True
+            if exchange_name not in self.overseas_exchanges_pro:
+                continue
+            loop_index = self.ingest.pick_loop()
+            self.overseas_ws_loop_index[exchange_name] = loop_index
+            self.overseas_ws_running[exchange_name] = True
+            if self._supports_watch_tickers(exchange):
+                # 모든 마켓을 구독 하나로 수신
+                self.overseas_ws_futures[exchange_name] = self.ingest.submit(
+                    self._watch_tickers_loop(exchange_name, exchange), loop_index
                 )
-                thread.start()
-                self.overseas_ws_threads[exchange_name] = thread
-                print(f"✅ {exchange_name} WebSocket 스레드 시작")
-    
-    def _process_upbit_ticker(self, data: dict):
-        """업비트 티커 데이터 처리"""
-        try:
-            # 레퍼런스에 따라 필드명 확인 (trade_price 또는 tp)
-            code = data.get('code') or data.get('cd')
-            if not code:
-                return
-            
-            # trade_price 또는 tp 필드에서 가격 가져오기
-            price = data.get('trade_price') or data.get('tp')
-            if price is None:
-                return
-            
-            price = float(price)
-            
-            # 타임스탬프는 tms (ms) 또는 timestamp 사용, 없으면 현재 시간
-            timestamp_ms = data.get('timestamp') or data.get('tms')
-            if timestamp_ms:
-                timestamp = float(timestamp_ms) / 1000.0  # ms를 초로 변환
+                mode = 'watch_tickers'
             else:
-                timestamp = time.time()
-            
-            # stream_type 확인 (SNAPSHOT 또는 REALTIME)
-            stream_type = data.get('stream_type') or data.get('st', 'REALTIME')
+                for market in self.overseas_routes[exchange_name]:
+                    self._submit_watch_ticker(exchange_name, exchange, market)
+                mode = 'watch_ticker'
+            print(f"✅ {exchange_name} WebSocket 수신 시작 (수집 루프 {loop_index}, {mode}, 심볼 {len(self.symbols)}개)")
             
-            with self.upbit_ws_lock:
-                if code == 'KRW-ETH':
-                    self.price_cache['upbit_eth_krw'] = price
-                    self.cache_timestamp['upbit_eth_krw'] = timestamp
-                elif code == 'KRW-USDT':
-                    self.price_cache['upbit_usdt_krw'] = price
-                    self.cache_timestamp['upbit_usdt_krw'] = timestamp
-        except (KeyError, ValueError, TypeError) as e:
-            print(f"업비트 티커 데이터 처리 오류: {e}, 데이터: {data}")
+            if exchange_name in self.book_venues:
+                self._init_order_book(exchange_name, exchange, loop_index)
     
-    def _init_upbit_websocket(self):
-        """업비트 웹소켓 초기화 및 연결"""
-        if not WEBSOCKET_AVAILABLE:
+    def _init_order_book(self, exchange_name: str, exchange, loop_index: int):
+        """ETH/USDT 호가창 수신 시작 (Binance는 증분 스트림을 직접 구독, 나머지는 ccxt.pro watch_order_book)"""
+        market = f'ETH/{QUOTE}'
+        if exchange_name == 'binance' and AIOHTTP_AVAILABLE:
+            coro = self._binance_depth_loop(market)
+            mode = 'depth@100ms'
+        else:
+            coro = self._watch_order_book_loop(exchange_name, exchange, market)
+            mode = 'watch_order_book'
+        self.overseas_ws_futures[f'{exchange_name}:book'] = self.ingest.submit(coro, loop_index)
+        print(f"✅ {exchange_name} 호가창 수신 시작 ({mode}, 가격 방식 {self.pricing})")
+    
+    def _rest_book_pricer(self, quote: str) -> Callable[[list, list], Optional[float]]:
+        """REST 폴백으로 받은 호가창의 기준 가격 계산 함수 (웹소켓 호가창과 같은 방식과 명목 금액)"""
+        return lambda bids, asks: book_price(bids, asks, self.pricing, self.book_notional.get(quote))
+    
+    def _publish_book_price(
+        self,
+        cache_key: str,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        timestamp: Optional[float],
+        sequence: Optional[int],
+        quote: str
+    ):
+        """호가창 갱신을 가격 장부에 반영 (호가는 최우선부터 순회 가능한 목록, 기준 가격이 바뀌면 리스너에 알림)"""
+        if timestamp is None:
+            timestamp = time.time()
+        self.order_books[cache_key] = BookSnapshot(
+            list(islice(bids, BOOK_SNAPSHOT_DEPTH)), list(islice(asks, BOOK_SNAPSHOT_DEPTH)), timestamp, sequence
+        )
+        price = book_price(bids, asks, self.pricing, self.book_notional.get(quote))
+        if price is not None and self.price_book.update(cache_key, price, timestamp):
+            self._notify_tick(cache_key, price, timestamp)
+    
+    async def _watch_order_book_loop(self, exchange_name: str, exchange, market: str):
+        """ccxt.pro 호가창 수신 루프 (스냅샷과 증분 병합, 시퀀스 누락 시 재동기화는 ccxt가 처리)"""
+        cache_key = f"{exchange_name}_{market.split('/')[0].lower()}_usdt"
+        health = self.health.get(exchange_name)
+        attempt = 0
+        try:
+            while self.overseas_ws_running.get(exchange_name, False):
+                try:
+                    book = await exchange.watch_order_book(market)
+                    started_ns = time.perf_counter_ns()
+                    timestamp = book.get('timestamp')
+                    self._publish_book_price(cache_key, book['bids'], book['asks'],
+                                             timestamp / 1000.0 if timestamp else None, book.get('nonce'), QUOTE)
+                    self._record_ingest(f'{exchange_name}_book', started_ns)
+                    health.record_success()
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    health.record_failure(e)
+                    delay = backoff_delay(attempt)
+                    print(f"{exchange_name} 호가창 수신 오류 ({delay:.1f}초 후 재시도): {e}")
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            pass
+    
+    async def _fetch_json(self, session, url: str):
+        """REST 조회 (REST 폴백과 같은 제한 시간)"""
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.rest_pool.timeout)) as response:
+            response.raise_for_status()
+            return _loads(await response.read())
+    
+    async def _binance_depth_loop(self, market: str):
+        """
+        Binance 증분 호가 스트림 수신 루프 (<심볼>@depth@100ms)
+        스트림을 먼저 열어 이벤트를 모아 두고 REST 스냅샷(lastUpdateId)을 받은 뒤 이어지는 이벤트부터 반영하며,
+        이벤트의 U/u 구간이 끊기면 호가를 비우고 스냅샷을 다시 받습니다.
+        """
+        stream = market.replace('/', '').lower()
+        ws_url = f"wss://stream.binance.com:9443/ws/{stream}@depth@100ms"
+        snapshot_url = f"https://api.binance.com/api/v3/depth?symbol={stream.upper()}&limit=1000"
+        cache_key = f"binance_{market.split('/')[0].lower()}_usdt"
+        book = self.depth_books[cache_key] = OrderBook()
+        health = self.health.get('binance')
+        attempt = 0
+        try:
+            while self.overseas_ws_running.get('binance', False):
+                received = False
+                try:
+                    async with aiohttp.ClientSession() as session:
+                        async with session.ws_connect(ws_url, heartbeat=60) as ws:
+                            book.reset()
+                            pending = []  # 스냅샷을 기다리는 동안 받은 이벤트
+                            snapshot_task = asyncio.ensure_future(self._fetch_json(session, snapshot_url))
+                            try:
+                                async for msg in ws:
+                                    if msg.type == aiohttp.WSMsgType.ERROR:
+                                        print(f"binance 호가 스트림 오류: {ws.exception()}")
+                                        break
+                                    if msg.type not in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                                        continue
+                                    started_ns = time.perf_counter_ns()
+                                    event = _loads(msg.data)
+                                    if book.synced:
+                                        events = (event,)
+                                    else:
+                                        pending.append(event)
+                                        if not snapshot_task.done():
+                                            continue
+                                        snapshot = snapshot_task.result()
+                                        book.apply_snapshot(snapshot['bids'], snapshot['asks'],
+                                                            sequence=snapshot['lastUpdateId'])
+                                        events, pending = pending, []
+                                    
+                                    for index, event in enumerate(events):
+                                        if not book.apply_delta(event['b'], event['a'], event['u'], event['U'],
+                                                                event['E'] / 1000.0):
+                                            print(f"binance 호가 시퀀스 누락 (U={event['U']}), 스냅샷 재요청")
+                                            health.record_failure('호가 시퀀스 누락')
+                                            pending = list(events[index:])
+                                            snapshot_task = asyncio.ensure_future(
+                                                self._fetch_json(session, snapshot_url)
+                                            )
+                                            break
+                                    if book.synced:
+                                        self._publish_book_price(cache_key, book.bids, book.asks,
+                                                                 book.timestamp, book.sequence, QUOTE)
+                                        health.record_success()
+                                        received = True
+                                    self._record_ingest('binance_book', started_ns)
+                            finally:
+                                snapshot_task.cancel()
+                            print(f"binance 호가 스트림 연결 종료 (코드: {ws.close_code})")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    health.record_failure(e)
+                    print(f"binance 호가 스트림 오류: {e}")
+                
+                if self.overseas_ws_running.get('binance', False):
+                    attempt = 1 if received else attempt + 1
+                    await asyncio.sleep(backoff_delay(attempt))
+        except asyncio.CancelledError:
+            pass
+    
+    def _apply_upbit_ticks(self, ticks: List[Tuple[str, float, Optional[float]]]):
+        """
+        업비트 틱 묶음을 가격 행렬과 가격 장부에 한 번에 반영
+        같은 코드가 여러 번 있으면 마지막 가격을 사용하고, 가격이 바뀐 소스마다 리스너에 한 번 알립니다.
+        """
+        routes = self.upbit_routes
+        latest = {}
+        for code, price, timestamp in ticks:
+            route = routes.get(code)
+            if route is not None:  # 구독을 해지한 코드는 무시
+                latest[route[1]] = (route, price, timestamp)
+        if not latest:
             return
         
-        def on_message(ws, message):
-            """웹소켓 메시지 수신 핸들러"""
-            try:
-                # 업비트 웹소켓은 JSON 문자열을 보냄
-                # 레퍼런스에 따르면 단일 객체 또는 배열 형식 가능
-                data = json.loads(message)
-                
-                # 배열 형식인 경우
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            # type이 ticker인 경우만 처리
-                            item_type = item.get('type') or item.get('ty')
-                            if item_type == 'ticker':
-                                self._process_upbit_ticker(item)
-                # 단일 객체인 경우
-                elif isinstance(data, dict):
-                    data_type = data.get('type') or data.get('ty')
-                    if data_type == 'ticker':
-                        self._process_upbit_ticker(data)
-            except json.JSONDecodeError as e:
-                print(f"업비트 웹소켓 JSON 파싱 오류: {e}")
-            except Exception as e:
-                print(f"업비트 웹소켓 메시지 처리 오류: {e}")
+        # 수신 지연은 묶음마다 가장 최근 틱 하나만 기록 (부하가 클수록 묶음이 커져 메시지당 비용이 줄어듦)
+        self.upbit_health.record_success()
+        now = time.time()
+        if ticks[-1][2] is not None:
+            self._lag_histogram('upbit').record(now - ticks[-1][2])
         
-        def on_error(ws, error):
-            """웹소켓 오류 핸들러"""
-            print(f"업비트 웹소켓 오류: {error}")
+        changed_symbols = self.asset_matrix.update_domestic_many(
+            [(route[0], price, timestamp) for route, price, timestamp in latest.values()]
+        )
+        book_updates = [(cache_key, price, timestamp)
+                        for cache_key, (route, price, timestamp) in latest.items() if route[2]]
+        changed_book = set(self.price_book.update_many(book_updates)) if book_updates else ()
         
-        def on_close(ws, close_status_code, close_msg):
-            """웹소켓 연결 종료 핸들러"""
-            print(f"업비트 웹소켓 연결 종료 (코드: {close_status_code}, 메시지: {close_msg})")
-            was_running = self.upbit_ws_running
-            self.upbit_ws_running = False
-            
-            # 재연결 시도 (의도적으로 종료한 경우가 아닐 때)
-            # close_status_code가 None이 아니고 정상 종료가 아닌 경우에만 재연결
-            if was_running and close_status_code != 1000:
-                print("업비트 웹소켓 재연결 시도 중...")
-                time.sleep(5)
-                # 재연결 시도 (무한 루프 방지를 위해 한 번만)
-                if not self.upbit_ws_running:
-                    self._init_upbit_websocket()
-        
-        def on_open(ws):
-            """웹소켓 연결 성공 핸들러"""
-            print("업비트 웹소켓 연결 성공")
-            # 티커 구독 요청 (레퍼런스 형식에 맞춤)
-            ticket = str(uuid.uuid4())
-            subscribe_message = [
-                {"ticket": ticket},
-                {
-                    "type": "ticker",
-                    "codes": ["KRW-ETH", "KRW-USDT"]  # 대문자로 요청 (레퍼런스 요구사항)
-                },
-                {
-                    "format": "DEFAULT"  # 레퍼런스에 따라 format 추가
-                }
-            ]
+        for cache_key, ((symbol, _, in_book), price, timestamp) in latest.items():
+            if (cache_key in changed_book) if in_book else (symbol in changed_symbols):
+                self._notify_tick(cache_key, price, timestamp if timestamp is not None else now)
+    
+    def _queue_upbit_message(self, message):
+        """
+        업비트 메시지를 파싱해 대기열에 추가 (수집 루프 0에서 호출)
+        같은 소켓 읽기로 도착한 프레임들은 이벤트 루프가 다음으로 넘어갈 때 한 번에 반영됩니다.
+        """
+        started_ns = time.perf_counter_ns()
+        books = [] if self.upbit_books else None
+        try:
+            ticks = parse_upbit_frame(message, books)
+        except ValueError as e:
+            print(f"업비트 웹소켓 JSON 파싱 오류: {e}")
+            return
+        if books:
+            self._apply_upbit_books(books)
+        if ticks:
+            self.upbit_pending.extend(ticks)
+            if not self.upbit_flush_scheduled:
+                self.upbit_flush_scheduled = True
+                asyncio.get_running_loop().call_soon(self._flush_upbit_ticks)
+        self._record_ingest('upbit', started_ns)
+    
+    def _apply_upbit_books(self, books: List[Tuple[str, list, list, Optional[float]]]):
+        """업비트 호가 반영 (메시지마다 코드별 전체 호가이므로 같은 코드는 마지막 것만 사용)"""
+        latest = {code: (bids, asks, timestamp) for code, bids, asks, timestamp in books}
+        for code, (bids, asks, timestamp) in latest.items():
+            route = self.upbit_routes.get(code)
+            if route is None or code not in UPBIT_BOOK_CODES:
+                continue
+            previous = self.order_books.get(route[1])
+            if previous is not None and timestamp is not None and timestamp < previous.timestamp:
+                continue  # 순서가 뒤바뀐 호가
             try:
-                ws.send(json.dumps(subscribe_message))
-                print("업비트 티커 구독 요청 전송 완료")
+                self._publish_book_price(route[1], bids, asks, timestamp, None, 'KRW')
             except Exception as e:
-                print(f"업비트 티커 구독 요청 전송 실패: {e}")
-        
-        def run_websocket():
-            """웹소켓 실행 함수"""
-            ws_url = "wss://api.upbit.com/websocket/v1"
-            self.upbit_ws = websocket.WebSocketApp(
-                ws_url,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-                on_open=on_open
-            )
-            self.upbit_ws_running = True
-            self.upbit_ws.run_forever()
-        
-        # 웹소켓을 별도 스레드에서 실행
-        self.upbit_ws_thread = threading.Thread(target=run_websocket, daemon=True)
-        self.upbit_ws_thread.start()
+                print(f"업비트 호가 반영 오류 ({code}): {e}")
     
-    def _fetch_upbit_eth_krw(self) -> Tuple[str, Optional[float], float]:
-        """업비트 ETH/KRW 가격 수집 (웹소켓 캐시 사용 또는 폴백)"""
-        timestamp = time.time()
-        
-        # 웹소켓 캐시에서 가격 가져오기
-        with self.upbit_ws_lock:
-            cached_price = self.price_cache.get('upbit_eth_krw')
-            cached_timestamp = self.cache_timestamp.get('upbit_eth_krw', 0)
-            
-            # 캐시된 가격이 있고 최근 것(5초 이내)이면 사용
-            if cached_price is not None and (timestamp - cached_timestamp) < 5:
-                return ('upbit_eth_krw', cached_price, cached_timestamp)
-        
-        # 웹소켓이 없거나 캐시가 오래된 경우 REST API 폴백
+    def _flush_upbit_ticks(self):
+        """대기 중인 업비트 틱을 한 번에 반영"""
+        ticks, self.upbit_pending = self.upbit_pending, []
+        self.upbit_flush_scheduled = False
         try:
-            ticker = self.upbit.fetch_ticker('ETH/KRW')
-            price = float(ticker['last'])
-            with self.upbit_ws_lock:
-                self.price_cache['upbit_eth_krw'] = price
-                self.cache_timestamp['upbit_eth_krw'] = timestamp
-            return ('upbit_eth_krw', price, timestamp)
+            self._apply_upbit_ticks(ticks)
         except Exception as e:
-            print(f"업비트 ETH/KRW 가격 수집 실패: {e}")
-            return ('upbit_eth_krw', cached_price, timestamp)
+            print(f"업비트 틱 반영 오류: {e}")
     
-    def _fetch_upbit_usdt_krw(self) -> Tuple[str, Optional[float], float]:
-        """업비트 USDT/KRW 가격 수집 (웹소켓 캐시 사용 또는 폴백)"""
-        timestamp = time.time()
-        
-        # 웹소켓 캐시에서 가격 가져오기
-        with self.upbit_ws_lock:
-            cached_price = self.price_cache.get('upbit_usdt_krw')
-            cached_timestamp = self.cache_timestamp.get('upbit_usdt_krw', 0)
-            
-            # 캐시된 가격이 있고 최근 것(5초 이내)이면 사용
-            if cached_price is not None and (timestamp - cached_timestamp) < 5:
-                return ('upbit_usdt_krw', cached_price, cached_timestamp)
-        
-        # 웹소켓이 없거나 캐시가 오래된 경우 REST API 폴백
+    def _upbit_subscription_message(self) -> str:
+        """현재 구독 코드 전체를 담은 업비트 구독 요청 (티켓 하나에 모든 코드)"""
+        # 티커 구독 요청 (레퍼런스 형식에 맞춤)
+        request = [
+            {"ticket": str(uuid.uuid4())},
+            {
+                "type": "ticker",
+                "codes": list(self.upbit_routes)  # 대문자로 요청 (레퍼런스 요구사항)
+            },
+        ]
+        if self.upbit_books:
+            # 호가 방식이면 오라클 입력 코드의 호가창도 같은 연결로 구독
+            request.append({"type": "orderbook", "codes": list(UPBIT_BOOK_CODES)})
+        request.append({
+            "format": "SIMPLE"  # 축약 필드명 (ty, cd, tp, tms)으로 프레임 크기와 파싱 비용 절감
+        })
+        return json.dumps(request)
+    
+    async def _send_upbit_subscription(self):
+        """연결된 업비트 웹소켓에 구독 요청 재전송 (같은 연결의 이전 구독을 대체, 수집 루프 0에서 실행)"""
+        ws = self.upbit_ws
+        if ws is None or ws.closed:
+            return  # 재연결 시 최신 코드 목록으로 구독
         try:
-            ticker = self.upbit.fetch_ticker('USDT/KRW')
-            price = float(ticker['last'])
-            with self.upbit_ws_lock:
-                self.price_cache['upbit_usdt_krw'] = price
-                self.cache_timestamp['upbit_usdt_krw'] = timestamp
-            return ('upbit_usdt_krw', price, timestamp)
+            await ws.send_str(self._upbit_subscription_message())
+            print(f"업비트 구독 변경 전송 완료 (코드 {len(self.upbit_routes)}개)")
         except Exception as e:
-            print(f"업비트 USDT/KRW 가격 수집 실패: {e}")
-            return ('upbit_usdt_krw', cached_price, timestamp)
+            print(f"업비트 구독 변경 실패: {e}")
     
-    def _fetch_overseas_price(self, exchange_name: str, exchange) -> Tuple[str, Optional[float], float]:
-        """해외 거래소 ETH/USDT 가격 수집 (WebSocket 캐시 사용 또는 폴백)"""
-        timestamp = time.time()
-        cache_key = f'{exchange_name}_eth_usdt'
-        
-        # WebSocket 캐시에서 가격 가져오기
-        with self.overseas_ws_lock:
-            cached_price = self.price_cache.get(cache_key)
-            cached_timestamp = self.cache_timestamp.get(cache_key, 0)
-            
-            # 캐시된 가격이 있고 최근 것(5초 이내)이면 사용
-            if cached_price is not None and (timestamp - cached_timestamp) < 5:
-                return (exchange_name, cached_price, cached_timestamp)
+    def _init_upbit_websocket(self):
+        """업비트 웹소켓 초기화 및 연결 (공유 수집 루프의 asyncio 클라이언트)"""
+        if not AIOHTTP_AVAILABLE:
+            return
         
-        # WebSocket이 없거나 캐시가 오래된 경우 REST API 폴백
-        if CCXT_PRO_AVAILABLE and exchange_name in self.overseas_exchanges_pro:
-            # CCXT Pro는 일반 CCXT 인스턴스도 필요할 수 있음
+        async def upbit_ws_loop():
+            """업비트 웹소켓 수신 루프 (연결이 끊기면 지터를 섞은 지수 백오프 후 재연결)"""
+            ws_url = "wss://api.upbit.com/websocket/v1"
+            attempt = 0  # 데이터 없이 끊긴 연속 연결 수
             try:
-                # 일반 CCXT로 폴백 시도
-                if hasattr(ccxt, exchange_name):
-                    fallback_exchange = getattr(ccxt, exchange_name)({'enableRateLimit': True})
-                    ticker = fallback_exchange.fetch_ticker('ETH/USDT')
-                    price = float(ticker['last'])
-                    with self.overseas_ws_lock:
-                        self.price_cache[cache_key] = price
-                        self.cache_timestamp[cache_key] = timestamp
-                    return (exchange_name, price, timestamp)
-            except Exception as e:
-                print(f"{exchange_name} REST API 폴백 실패: {e}")
-        else:
-            # 일반 CCXT 사용
+                while self.upbit_ws_running:
+                    received = False
+                    try:
+                        async with aiohttp.ClientSession() as session:
+                            async with session.ws_connect(ws_url, heartbeat=60) as ws:
+                                print("업비트 웹소켓 연결 성공")
+                                self.upbit_ws = ws
+                                await ws.send_str(self._upbit_subscription_message())
+                                print(f"업비트 티커 구독 요청 전송 완료 (코드 {len(self.upbit_routes)}개)")
+                                
+                                async for msg in ws:
+                                    if msg.type in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                                        received = True
+                                        self._queue_upbit_message(msg.data)
+                                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                                        print(f"업비트 웹소켓 오류: {ws.exception()}")
+                                        break
+                                print(f"업비트 웹소켓 연결 종료 (코드: {ws.close_code})")
+                                if not received:
+                                    self.upbit_health.record_failure(f"데이터 없이 연결 종료 (코드: {ws.close_code})")
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.upbit_health.record_failure(e)
+                        print(f"업비트 웹소켓 오류: {e}")
+                    finally:
+                        self.upbit_ws = None
+                    
+                    if self.upbit_ws_running:
+                        attempt = 1 if received else attempt + 1
+                        delay = backoff_delay(attempt)
+                        print(f"업비트 웹소켓 재연결 시도 중... ({delay:.1f}초 후)")
+                        await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self.upbit_ws_running = False
+        
+        self.upbit_ws_running = True
+        self.upbit_ws_future = self.ingest.submit(upbit_ws_loop(), 0)
+    
+    def close(self, timeout: float = 5.0):
+        """모든 웹소켓 수신을 취소하고 거래소 연결 및 수집 루프 종료"""
+        self.upbit_ws_running = False
+        for exchange_name in list(self.overseas_ws_running):
+            self.overseas_ws_running[exchange_name] = False
+        
+        # 수신 코루틴 취소
+        futures = list(self.overseas_ws_futures.values())
+        if self.upbit_ws_future is not None:
+            futures.append(self.upbit_ws_future)
+        for future in futures:
+            future.cancel()
+        
+        # CCXT Pro 거래소 연결 종료 (각 거래소가 사용하던 루프에서 실행)
+        for exchange_name, exchange in self.overseas_exchanges_pro.items():
+            loop_index = self.overseas_ws_loop_index.get(exchange_name, 0)
             try:
-                ticker = exchange.fetch_ticker('ETH/USDT')
-                price = float(ticker['last'])
-                with self.overseas_ws_lock:
-                    self.price_cache[cache_key] = price
-                    self.cache_timestamp[cache_key] = timestamp
-                return (exchange_name, price, timestamp)
+                self.ingest.run(exchange.close(), loop_index, timeout=timeout)
             except Exception as e:
-                print(f"{exchange_name} ETH/USDT 가격 수집 실패: {e}")
+                print(f"{exchange_name} 연결 종료 실패: {e}")
         
-        # 모든 방법 실패 시 캐시된 값 반환
-        return (exchange_name, cached_price, timestamp)
+        self.rest_pool.close(timeout)
+        self.ingest.stop(timeout)
+    
+    def _collect(self, requests: List[Tuple[str, str, str]]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """
+        가격 장부 스냅샷 하나에서 여러 소스를 읽음 (네트워크 응답을 기다리지 않음)
+        cache_max_age보다 오래된 소스는 백그라운드 REST 갱신만 요청하고 마지막 가격을 그대로 사용하며,
+        max_source_age보다 오래된 소스는 가격을 None으로 제외합니다.
+        
+        Args:
+            requests: (장부 키, 폴백 거래소 이름, 심볼) 목록
+        
+        Returns:
+            {장부 키: (가격, 타임스탬프)} (받은 적 없는 소스는 (None, None), 제외된 소스는 (None, 타임스탬프))
+        """
+        now = time.time()
+        slots = self.price_book.snapshot().slots
+        results = {}
+        stale = {}
+        for cache_key, venue, symbol in requests:
+            slot = slots.get(cache_key)
+            if slot is None:
+                results[cache_key] = (None, None)
+                stale[(venue, symbol)] = cache_key
+                continue
+            age = now - slot.timestamp
+            if age >= self.cache_max_age:
+                stale[(venue, symbol)] = cache_key
+            results[cache_key] = (slot.price if age <= self.max_source_age else None, slot.timestamp)
+        
+        if stale:
+            # 웹소켓이 없거나 캐시가 오래된 경우 REST API 폴백 (응답은 다음 틱부터 반영)
+            self.rest_pool.refresh(list(stale), lambda prices: self._apply_rest_prices(prices, stale))
+        return results
+    
+    def _apply_rest_prices(self, prices: List[Tuple[str, str, float]], cache_keys: Dict[Tuple[str, str], str]):
+        """백그라운드 REST 폴백 결과를 가격 장부에 반영 (수집 루프에서 호출, 가격이 바뀐 소스는 리스너에 알림)"""
+        updates = [(cache_keys[(venue, symbol)], price, None) for venue, symbol, price in prices]
+        changed = set(self.price_book.update_many(updates))
+        now = time.time()
+        for cache_key, price, _ in updates:
+            if cache_key in changed:
+                self._notify_tick(cache_key, price, now)
+    
+    def _fetch_upbit_price(self, cache_key: str, symbol: str) -> Tuple[str, Optional[float], Optional[float]]:
+        """업비트 가격 수집 (웹소켓 캐시 사용, 오래되면 백그라운드 REST 폴백 요청)"""
+        price, timestamp = self._collect([(cache_key, 'upbit', symbol)])[cache_key]
+        return (cache_key, price, timestamp)
+    
+    def _fetch_upbit_eth_krw(self) -> Tuple[str, Optional[float], Optional[float]]:
+        """업비트 ETH/KRW 가격 수집 (웹소켓 캐시 사용 또는 폴백)"""
+        return self._fetch_upbit_price('upbit_eth_krw', 'ETH/KRW')
+    
+    def _fetch_upbit_usdt_krw(self) -> Tuple[str, Optional[float], Optional[float]]:
+        """업비트 USDT/KRW 가격 수집 (웹소켓 캐시 사용 또는 폴백)"""
+        return self._fetch_upbit_price('upbit_usdt_krw', 'USDT/KRW')
+    
+    def _fetch_overseas_price(self, exchange_name: str, exchange) -> Tuple[str, Optional[float], Optional[float]]:
+        """해외 거래소 ETH/USDT 가격 수집 (WebSocket 캐시 사용, 오래되면 백그라운드 REST 폴백 요청)"""
+        cache_key = f'{exchange_name}_eth_usdt'
+        price, timestamp = self._collect([(cache_key, exchange_name, 'ETH/USDT')])[cache_key]
+        return (exchange_name, price, timestamp)
     
     def get_upbit_eth_krw(self) -> Optional[float]:
         """업비트에서 ETH/KRW 가격 가져오기 (하위 호환성)"""
@@ -468,66 +1040,103 @@ class PriceFetcher:
         return price
     
     def get_overseas_eth_usdt(self) -> Dict[str, Optional[float]]:
-        """해외 거래소에서 ETH/USDT 가격 가져오기 (하위 호환성)"""
-        prices = {}
-        for exchange_name, exchange in self.overseas_exchanges:
-            _, price, _ = self._fetch_overseas_price(exchange_name, exchange)
-            prices[exchange_name] = price
-        return prices
+        """해외 거래소에서 ETH/USDT 가격 가져오기 (하위 호환성, 오래된 거래소는 백그라운드 REST 갱신 요청)"""
+        results = self._collect([
+            (f'{exchange_name}_eth_usdt', exchange_name, 'ETH/USDT')
+            for exchange_name, _ in self.overseas_exchanges
+        ])
+        return {
+            exchange_name: results[f'{exchange_name}_eth_usdt'][0]
+            for exchange_name, _ in self.overseas_exchanges
+        }
+    
+    def get_asset_snapshot(self) -> Dict:
+        """다중 자산 가격 행렬 스냅샷 (cache_max_age보다 오래되거나 회로가 차단된 거래소의 가격은 제외, REST 폴백 없음)"""
+        snapshot = self.asset_matrix.snapshot(max_age=self.cache_max_age)
+        unavailable = self.health.unavailable()
+        if unavailable:
+            for index, venue in enumerate(snapshot['venues']):
+                if venue in unavailable:
+                    snapshot['overseas_usdt'][:, index] = float('nan')
+            if 'upbit' in unavailable:
+                snapshot['domestic_krw'][:] = float('nan')
+        return snapshot
+    
+    def get_source_health(self) -> Dict[str, Dict]:
+        """거래소별 상태 (healthy/degraded/open/half_open), 연속 실패 수, 재시도까지 남은 시간"""
+        return self.health.snapshot()
+    
+    def get_order_books(self) -> Dict:
+        """
+        소스별 최근 호가 요약 (호가 방식일 때만 채워짐, 최우선 BOOK_SNAPSHOT_DEPTH개 기준)
+        
+        Returns:
+            {'pricing', 'notional', 'books': {장부 키: {'best_bid', 'best_ask', 'spread_bps', 'mid', 'microprice',
+                                                        'depth', 'timestamp', 'sequence', 'levels', ['updates', 'gaps']}}}
+        """
+        books = {}
+        for cache_key, snapshot in list(self.order_books.items()):
+            quote = 'KRW' if cache_key.startswith('upbit_') else QUOTE
+            summary = book_summary(snapshot.bids, snapshot.asks, self.book_notional.get(quote))
+            summary['timestamp'] = snapshot.timestamp
+            summary['sequence'] = snapshot.sequence
+            summary['levels'] = [len(snapshot.bids), len(snapshot.asks)]
+            depth_book = self.depth_books.get(cache_key)
+            if depth_book is not None:
+                summary['updates'] = depth_book.updates
+                summary['gaps'] = depth_book.gaps
+            books[cache_key] = summary
+        return {'pricing': self.pricing, 'notional': self.book_notional, 'books': books}
+    
+    def get_rest_fallback_stats(self) -> Dict[str, Dict]:
+        """거래소별 REST 폴백 지연 통계"""
+        return self.rest_pool.get_stats()
     
     def get_all_prices(self) -> Dict:
         """
-        모든 가격 정보를 병렬로 수집
-        모든 거래소 API를 동시에 호출하여 시간 동기화 문제를 해결합니다.
+        모든 가격 정보를 한 번에 수집
+        가격 장부의 스냅샷 하나에서 모든 소스를 읽어 같은 시점의 가격을 사용합니다.
+        오래된 소스는 백그라운드 REST 갱신만 요청하므로 네트워크 응답을 기다리지 않고,
+        소스별 나이(초)를 source_ages로, 거래소별 상태를 source_health로 함께 반환합니다
+        (max_source_age를 넘었거나 회로가 차단된 소스는 가격이 None).
         """
         # 수집 시작 시간 기록
         collection_start_time = time.time()
         
-        # 모든 작업을 동시에 실행
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = []
-            
-            # 업비트 가격 수집 작업
-            futures.append(executor.submit(self._fetch_upbit_eth_krw))
-            futures.append(executor.submit(self._fetch_upbit_usdt_krw))
-            
-            # 해외 거래소 가격 수집 작업
-            for exchange_name, exchange in self.overseas_exchanges:
-                futures.append(executor.submit(
-                    self._fetch_overseas_price, 
-                    exchange_name, 
-                    exchange
-                ))
-            
-            # 결과 수집
-            results = {}
-            timestamps = {}
-            overseas_prices = {}
-            
-            for future in as_completed(futures):
-                try:
-                    key, price, timestamp = future.result()
-                    
-                    if key == 'upbit_eth_krw':
-                        results['upbit_eth_krw'] = price
-                        timestamps['upbit_eth_krw'] = timestamp
-                    elif key == 'upbit_usdt_krw':
-                        results['upbit_usdt_krw'] = price
-                        timestamps['upbit_usdt_krw'] = timestamp
-                    else:
-                        # 해외 거래소
-                        overseas_prices[key] = price
-                        timestamps[f'{key}_eth_usdt'] = timestamp
-                        
-                except Exception as e:
-                    print(f"가격 수집 중 오류 발생: {e}")
+        requests = [
+            ('upbit_eth_krw', 'upbit', 'ETH/KRW'),
+            ('upbit_usdt_krw', 'upbit', 'USDT/KRW'),
+        ]
+        for exchange_name, _ in self.overseas_exchanges:
+            requests.append((f'{exchange_name}_eth_usdt', exchange_name, 'ETH/USDT'))
+        collected = self._collect(requests)
+        version = self.price_book.version
+        
+        # 회로가 차단된 거래소는 중앙값에서 제외 (나이는 그대로 보고)
+        unavailable = self.health.unavailable()
+        if unavailable:
+            for cache_key, venue, _ in requests:
+                if venue in unavailable:
+                    collected[cache_key] = (None, collected[cache_key][1])
+        
+        source_ages = {
+            cache_key: round(collection_start_time - timestamp, 3) if timestamp is not None else None
+            for cache_key, (_, timestamp) in collected.items()
+        }
+        overseas_prices = {
+            exchange_name: collected[f'{exchange_name}_eth_usdt'][0]
+            for exchange_name, _ in self.overseas_exchanges
+        }
         
         # 수집 완료 시간
         collection_end_time = time.time()
         collection_duration = collection_end_time - collection_start_time
         
-        # 타임스탬프 동기화 정보 계산
-        valid_timestamps = [ts for ts in timestamps.values() if ts is not None]
+        # 타임스탬프 동기화 정보 계산 (캐시 기준 안의 소스만, 오래된 소스는 source_ages로 따로 보고)
+        valid_timestamps = [
+            timestamp for price, timestamp in collected.values()
+            if price is not None and collection_start_time - timestamp < self.cache_max_age
+        ]
         if valid_timestamps:
             max_timestamp = max(valid_timestamps)
             min_timestamp = min(valid_timestamps)
@@ -540,15 +1149,18 @@ class PriceFetcher:
             print(f"⚠️ 경고: 거래소 간 타임스탬프 차이가 큼 ({time_diff*1000:.1f}ms)")
         
         return {
-            'upbit_eth_krw': results.get('upbit_eth_krw'),
-            'upbit_usdt_krw': results.get('upbit_usdt_krw'),
+            'upbit_eth_krw': collected['upbit_eth_krw'][0],
+            'upbit_usdt_krw': collected['upbit_usdt_krw'][0],
             'overseas_eth_usdt': overseas_prices,
+            'source_ages': source_ages,
+            'source_health': self.health.states(),
             'timestamp': datetime.now().isoformat(),
             'collection_metadata': {
                 'collection_start': collection_start_time,
                 'collection_end': collection_end_time,
                 'collection_duration_ms': round(collection_duration * 1000, 2),
                 'max_timestamp_diff_ms': round(time_diff * 1000, 2),
+                'price_book_version': version,
             }
         }
 
@@ -556,6 +1168,7 @@ class PriceFetcher:
 if __name__ == '__main__':
     # 테스트
     fetcher = PriceFetcher()
-    prices = fetcher.get_all_prices()
-    print(prices)
+    print(fetcher.get_all_prices())  # 웹소켓 수신 전이면 REST 폴백만 요청하고 None 반환
+    time.sleep(3)
+    print(fetcher.get_all_prices())
 
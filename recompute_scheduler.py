@@ -0,0 +1,240 @@
+"""
+오라클 재계산 스케줄러
+거래소 티커 변경 알림을 받아 오라클 재계산 시점을 결정합니다.
+짧은 시간에 몰리는 틱은 하나의 재계산으로 병합하고, 연결된 클라이언트(또는 keep_alive() 임대)가 없으면
+하트비트 주기로만 재계산합니다.
+(대기 상태에서도 HTTP 응답, 틱 로그, TWAP, 히스토리가 하트비트 주기로 계속 갱신됩니다.)
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RecomputeScheduler:
+    """틱 기반 재계산 스케줄러 클래스"""
+
+    def __init__(
+        self,
+        min_interval: float = 0.05,
+        max_delay: float = 0.2,
+        heartbeat_interval: float = 5.0,
+        idle_without_clients: bool = True
+    ):
+        """
+        Args:
+            min_interval: 마지막 틱 이후 추가 틱을 기다리는 병합 구간 (초)
+                          재계산 간 최소 간격으로도 동작합니다.
+            max_delay: 첫 번째 대기 틱이 재계산되기까지의 최대 지연 (초)
+            heartbeat_interval: 틱이 없어도 재계산하는 주기 (초, TWAP/캐시 만료 처리용)
+            idle_without_clients: 연결된 클라이언트가 없으면 틱마다 재계산하지 않고 하트비트 주기로만 재계산할지 여부
+        """
+        if max_delay < min_interval:
+            raise ValueError("max_delay는 min_interval보다 작을 수 없습니다")
+
+        self.min_interval = min_interval
+        self.max_delay = max_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_without_clients = idle_without_clients
+
+        self._cond = threading.Condition()
+        self._running = True
+        self._client_count = 0
+        self._active_until = 0.0  # keep_alive() 임대 만료 시각 (monotonic)
+        self._wake_now = True  # 시작 직후 한 번은 즉시 계산
+
+        # 대기 중인 틱 정보 (monotonic 시간)
+        self._pending_sources = set()
+        self._pending_ticks = 0
+        self._first_pending = None
+        self._last_tick = None
+        self._last_fire = time.monotonic()
+
+        # 통계
+        self._stats = {
+            'ticks': 0,
+            'recomputes': 0,
+            'heartbeats': 0,
+            'latency_count': 0,
+            'latency_sum_ms': 0.0,
+            'latency_max_ms': 0.0,
+            'latency_last_ms': None,
+        }
+
+    def notify(self, source: str):
+        """티커 변경 알림 (웹소켓 수신 스레드에서 호출)"""
+        now = time.monotonic()
+        with self._cond:
+            if self._first_pending is None:
+                self._first_pending = now
+            self._last_tick = now
+            self._pending_sources.add(source)
+            self._pending_ticks += 1
+            self._stats['ticks'] += 1
+            self._cond.notify()
+
+    def client_connected(self):
+        """Socket.IO 클라이언트 연결 알림"""
+        with self._cond:
+            self._client_count += 1
+            # 대기 상태에서 깨어나면 최신 데이터를 바로 계산
+            self._wake_now = True
+            self._cond.notify()
+
+    def client_disconnected(self):
+        """Socket.IO 클라이언트 연결 해제 알림"""
+        with self._cond:
+            self._client_count = max(0, self._client_count - 1)
+
+    def keep_alive(self, seconds: float):
+        """
+        소켓 연결 없이 폴링하는 클라이언트용 임대: seconds 동안 연결된 클라이언트가 있는 것처럼 틱마다 재계산
+        (대기 상태에서 임대가 시작되면 최신 데이터를 바로 계산)
+        """
+        now = time.monotonic()
+        with self._cond:
+            if not self._is_active(now):
+                self._wake_now = True
+                self._cond.notify()
+            self._active_until = max(self._active_until, now + seconds)
+
+    def request_recompute(self):
+        """다음 대기 시점과 관계없이 즉시 재계산 요청"""
+        with self._cond:
+            self._wake_now = True
+            self._cond.notify()
+
+    def stop(self):
+        """스케줄러 종료 (대기 중인 wait()는 None을 반환)"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _is_active(self, now: Optional[float] = None) -> bool:
+        """틱마다 재계산하는 상태인지 여부 (아니면 하트비트 주기로만 재계산)"""
+        if not self.idle_without_clients or self._client_count > 0:
+            return True
+        return (time.monotonic() if now is None else now) < self._active_until
+
+    def wait(self) -> Optional[Dict]:
+        """
+        다음 재계산 시점까지 대기
+
+        Returns:
+            {
+                'reason': str,  # 'tick', 'heartbeat', 'wake'
+                'sources': List[str],
+                'tick_count': int,
+                'first_tick_at': float,  # monotonic 시간 (틱이 없으면 None)
+            }
+            종료된 경우 None
+        """
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                if self._wake_now:
+                    return self._fire(now, 'wake')
+
+                if self._pending_sources and self._is_active(now):
+                    # 버스트가 잠잠해지거나 최대 지연에 도달하면 재계산
+                    fire_at = min(
+                        self._last_tick + self.min_interval,
+                        self._first_pending + self.max_delay
+                    )
+                    reason = 'tick'
+                else:
+                    # 틱이 없거나 대기 상태면 하트비트 주기로 재계산 (대기 상태의 틱은 다음 하트비트에 병합)
+                    fire_at = self._last_fire + self.heartbeat_interval
+                    reason = 'heartbeat'
+
+                if now >= fire_at:
+                    return self._fire(now, reason)
+
+                self._cond.wait(fire_at - now)
+        return None
+
+    def _fire(self, now: float, reason: str) -> Dict:
+        """대기 중인 틱을 하나의 재계산 배치로 묶음 (락 안에서 호출)"""
+        batch = {
+            'reason': reason,
+            'sources': sorted(self._pending_sources),
+            'tick_count': self._pending_ticks,
+            'first_tick_at': self._first_pending,
+        }
+        self._pending_sources = set()
+        self._pending_ticks = 0
+        self._first_pending = None
+        self._wake_now = False
+        self._last_fire = now
+        self._stats['recomputes'] += 1
+        if reason == 'heartbeat':
+            self._stats['heartbeats'] += 1
+        return batch
+
+    def record_emit(self, batch: Dict) -> Optional[float]:
+        """브로드캐스트 완료 시점 기록, 틱 수신부터 전송까지의 지연(ms) 반환"""
+        if batch.get('first_tick_at') is None:
+            return None
+
+        latency_ms = (time.monotonic() - batch['first_tick_at']) * 1000
+        with self._cond:
+            self._stats['latency_count'] += 1
+            self._stats['latency_sum_ms'] += latency_ms
+            self._stats['latency_max_ms'] = max(self._stats['latency_max_ms'], latency_ms)
+            self._stats['latency_last_ms'] = latency_ms
+        return latency_ms
+
+    def get_stats(self) -> Dict:
+        """스케줄러 통계 (틱 수, 재계산 수, 틱→전송 지연)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['clients'] = self._client_count
+            stats['active'] = self._is_active()
+            stats['pending_ticks'] = self._pending_ticks
+
+        count = stats.pop('latency_count')
+        latency_sum = stats.pop('latency_sum_ms')
+        stats['latency_avg_ms'] = round(latency_sum / count, 2) if count else None
+        stats['latency_max_ms'] = round(stats['latency_max_ms'], 2)
+        if stats['latency_last_ms'] is not None:
+            stats['latency_last_ms'] = round(stats['latency_last_ms'], 2)
+        # 병합률: 재계산 한 번당 평균 틱 수
+        tick_recomputes = stats['recomputes'] - stats['heartbeats']
+        stats['ticks_per_recompute'] = round(stats['ticks'] / tick_recomputes, 2) if tick_recomputes > 0 else None
+        return stats
+
+
+if __name__ == '__main__':
+    # 테스트
+    scheduler = RecomputeScheduler(min_interval=0.05, max_delay=0.2, idle_without_clients=False)
+    print(scheduler.wait())  # 시작 직후 즉시 계산
+
+    def burst():
+        for _ in range(20):
+            scheduler.notify('binance_eth_usdt')
+            time.sleep(0.02)
+
+    threading.Thread(target=burst, daemon=True).start()
+    for _ in range(3):
+        batch = scheduler.wait()
+        scheduler.record_emit(batch)
+        print(batch)
+
+    print(scheduler.get_stats())
+
+    # 클라이언트가 없으면 틱이 와도 하트비트 주기로만 재계산
+    idle = RecomputeScheduler(min_interval=0.01, max_delay=0.02, heartbeat_interval=0.2)
+    assert idle.wait()['reason'] == 'wake'
+    started = time.monotonic()
+    idle.notify('binance_eth_usdt')
+    batch = idle.wait()
+    assert batch['reason'] == 'heartbeat' and batch['tick_count'] == 1
+    assert time.monotonic() - started >= 0.15
+    assert idle.get_stats()['active'] is False
+
+    # 폴링 임대 중에는 틱마다 재계산, 만료되면 다시 하트비트 주기로
+    idle.keep_alive(0.3)
+    assert idle.wait()['reason'] == 'wake'
+    idle.notify('binance_eth_usdt')
+    assert idle.wait()['reason'] == 'tick'
+    time.sleep(0.3)
+    assert idle.get_stats()['active'] is False
@@ -0,0 +1,225 @@
+"""
+틱 재생 엔진
+틱 로그에 기록된 거래소 원본 가격을 시간순으로 오라클에 흘려보내 오라클 출력 시계열을 다시 만듭니다.
+오라클은 ManualClock으로 기록 시각을 따라가므로 결과가 결정적이며,
+N배속 또는 최대 속도로 재생해 장애 재현과 집계 로직 변경의 회귀 테스트에 사용합니다.
+
+    python replay.py data/ticks --speed 0 --output replay.jsonl
+    python replay.py data/ticks --since 1700000000 --until 1700003600 --speed 60 --evaluate tick
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from clock import ManualClock
+from oracle import Oracle
+from tick_log import KIND_ORACLE, KIND_SOURCE, TickLog
+
+EVALUATE_MODES = ('recorded', 'tick')
+
+
+class ReplayState:
+    """재생 중 소스별 마지막 가격 상태 클래스"""
+
+    def __init__(self):
+        self.upbit_eth_krw: Optional[Tuple[float, float]] = None  # (가격, 수신 시각)
+        self.upbit_usdt_krw: Optional[Tuple[float, float]] = None
+        self.overseas_eth_usdt: Dict[str, Tuple[float, float]] = {}
+
+    def apply(self, timestamp: float, name: str, price: float) -> bool:
+        """소스 레코드 반영 (ETH 오라클 입력이 아니면 False)"""
+        if name == 'upbit_eth_krw':
+            self.upbit_eth_krw = (price, timestamp)
+        elif name == 'upbit_usdt_krw':
+            self.upbit_usdt_krw = (price, timestamp)
+        elif name.endswith('_eth_usdt'):
+            self.overseas_eth_usdt[name[:-len('_eth_usdt')]] = (price, timestamp)
+        else:
+            return False
+        return True
+
+    def prices(self, now: float, max_source_age: Optional[float] = None) -> Dict:
+        """get_all_prices와 같은 형식의 가격 (max_source_age보다 오래된 소스는 None)"""
+        def fresh(entry):
+            if entry is None:
+                return None
+            price, timestamp = entry
+            if max_source_age is not None and now - timestamp > max_source_age:
+                return None
+            return price
+
+        return {
+            'upbit_eth_krw': fresh(self.upbit_eth_krw),
+            'upbit_usdt_krw': fresh(self.upbit_usdt_krw),
+            'overseas_eth_usdt': {venue: fresh(entry) for venue, entry in self.overseas_eth_usdt.items()},
+        }
+
+
+def replay(
+    records: Iterable[Tuple],
+    oracle: Optional[Oracle] = None,
+    speed: Optional[float] = None,
+    evaluate: str = 'recorded',
+    max_source_age: Optional[float] = None,
+    emit_since: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep
+) -> Iterator[Dict]:
+    """
+    틱 로그 레코드를 오라클에 재생
+
+    Args:
+        records: TickLog.read() 형식의 레코드 (timestamp, kind, name, v0, v1, v2, v3), 시간순
+        oracle: 재생에 사용할 오라클 (ManualClock을 주입한 인스턴스, 없으면 기본 설정으로 생성)
+        speed: 재생 배속 (None 또는 0이면 최대 속도)
+        evaluate: 'recorded' (기록된 오라클 출력 시점마다 계산, 기록값과 비교) 또는 'tick' (소스 틱마다 계산)
+        max_source_age: 이보다 오래된 소스 가격은 제외 (초, None이면 마지막 가격 사용)
+        emit_since: 이 시각 이전 레코드는 상태와 TWAP 윈도우만 채우고 결과를 내보내지 않음 (대기 없이 처리)
+        sleep: 배속 재생용 대기 함수
+
+    Yields:
+        {'timestamp', 'median_price', 'calculation_method', 'usdt_krw_used', 'usdt_krw_original',
+         'inverse_usdt_krw', 'is_volatile', 'twap', 'sources', 'recorded_median', 'recorded_method'}
+    """
+    if evaluate not in EVALUATE_MODES:
+        raise ValueError(f"evaluate는 {EVALUATE_MODES} 중 하나여야 합니다")
+    if oracle is None:
+        oracle = Oracle(clock=ManualClock())
+    clock = oracle.clock
+    if not isinstance(clock, ManualClock):
+        raise ValueError("재생에는 ManualClock을 주입한 오라클이 필요합니다")
+
+    state = ReplayState()
+    first_timestamp = None
+    wall_start = time.monotonic()
+
+    for timestamp, kind, name, v0, v1, v2, v3 in records:
+        warming_up = emit_since is not None and timestamp < emit_since
+        if speed and not warming_up:
+            # 기록 시간 간격을 배속으로 나눈 만큼 대기
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            delay = wall_start + (timestamp - first_timestamp) / speed - time.monotonic()
+            if delay > 0:
+                sleep(delay)
+
+        clock.set(timestamp)
+        if kind == KIND_SOURCE:
+            if v0 != v0 or not state.apply(timestamp, name, v0):
+                continue
+            if evaluate != 'tick':
+                continue
+            recorded_median = recorded_method = None
+        elif kind == KIND_ORACLE:
+            if evaluate != 'recorded':
+                continue
+            recorded_median = None if v0 != v0 else v0
+            recorded_method = name.split(':', 1)[-1]
+        else:
+            continue
+
+        prices = state.prices(timestamp, max_source_age)
+        result = oracle.calculate_median_eth_krw_price(
+            upbit_eth_krw=prices['upbit_eth_krw'],
+            upbit_usdt_krw=prices['upbit_usdt_krw'],
+            overseas_eth_usdt=prices['overseas_eth_usdt'],
+        )
+        if warming_up:
+            continue
+        yield {
+            'timestamp': timestamp,
+            'median_price': result['median_price'],
+            'calculation_method': result['calculation_method'],
+            'usdt_krw_used': result['usdt_krw_used'],
+            'usdt_krw_original': result['usdt_krw_original'],
+            'inverse_usdt_krw': result['inverse_usdt_krw'],
+            'is_volatile': result['is_volatile'],
+            'twap': result['twap'],
+            'sources': len(result['prices_used']),
+            'recorded_median': recorded_median,
+            'recorded_method': recorded_method,
+        }
+
+
+def summarize(results: Iterable[Dict]) -> Dict:
+    """
+    재생 결과 요약
+
+    Returns:
+        {'evaluations', 'methods', 'inverse_ratio', 'inverse_switches',
+         'compared', 'method_mismatches', 'max_abs_diff', 'mean_abs_diff'}
+    """
+    evaluations = inverse_switches = compared = method_mismatches = 0
+    methods: Dict[str, int] = {}
+    total_diff = max_diff = 0.0
+    previous_method = None
+
+    for result in results:
+        evaluations += 1
+        method = result['calculation_method']
+        methods[method] = methods.get(method, 0) + 1
+        if method == 'inverse' and previous_method not in (None, 'inverse'):
+            inverse_switches += 1
+        previous_method = method
+
+        if result['recorded_method'] is not None:
+            if result['recorded_method'] != method:
+                method_mismatches += 1
+            if result['recorded_median'] is not None and result['median_price'] is not None:
+                diff = abs(result['median_price'] - result['recorded_median'])
+                compared += 1
+                total_diff += diff
+                max_diff = max(max_diff, diff)
+
+    return {
+        'evaluations': evaluations,
+        'methods': methods,
+        'inverse_ratio': round(methods.get('inverse', 0) / evaluations, 6) if evaluations else None,
+        'inverse_switches': inverse_switches,
+        'compared': compared,
+        'method_mismatches': method_mismatches,
+        'max_abs_diff': max_diff if compared else None,
+        'mean_abs_diff': total_diff / compared if compared else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='틱 로그 디렉터리')
+    parser.add_argument('--since', type=float, help='시작 시각 (epoch 초)')
+    parser.add_argument('--until', type=float, help='종료 시각 (epoch 초)')
+    parser.add_argument('--speed', type=float, default=0, help='재생 배속 (0이면 최대 속도)')
+    parser.add_argument('--evaluate', choices=EVALUATE_MODES, default='recorded')
+    parser.add_argument('--max-source-age', type=float, help='이보다 오래된 소스 가격 제외 (초)')
+    parser.add_argument('--twap-window', type=int, default=300, help='TWAP 윈도우 (초)')
+    parser.add_argument('--volatility-threshold', type=float, default=0.05, help='USDT/KRW 변동성 임계값')
+    parser.add_argument('--output', help='오라클 출력 시계열 저장 경로 (JSON Lines)')
+    args = parser.parse_args()
+
+    tick_log = TickLog(args.directory)
+    oracle = Oracle(args.twap_window, args.volatility_threshold, clock=ManualClock())
+    # 시작 시각 이전 TWAP 윈도우만큼 먼저 읽어 오라클 상태를 채움
+    read_since = args.since - args.twap_window if args.since is not None else None
+    started = time.perf_counter()
+    results = []
+    output = open(args.output, 'w') if args.output else None
+    try:
+        for result in replay(tick_log.read(read_since, args.until), oracle, args.speed, args.evaluate,
+                             args.max_source_age, emit_since=args.since):
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result) + '\n')
+    finally:
+        if output is not None:
+            output.close()
+        tick_log.close()
+
+    summary = summarize(results)
+    summary['duration_s'] = round(time.perf_counter() - started, 3)
+    if results:
+        summary['data_span_s'] = round(results[-1]['timestamp'] - results[0]['timestamp'], 3)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
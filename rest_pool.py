@@ -0,0 +1,235 @@
+"""
+REST 폴백 클라이언트 풀
+웹소켓 캐시가 오래되었을 때 사용하는 거래소 REST 클라이언트를 거래소마다 한 번만 생성해 재사용합니다.
+클라이언트는 공유 수집 루프에서 실행되는 ccxt 비동기 인스턴스이며,
+HTTP 연결(keep-alive)과 마켓 정보를 유지하고 여러 거래소를 동시에 조회합니다.
+오라클 틱에서는 refresh()로 백그라운드 갱신만 요청하므로 틱이 네트워크 응답을 기다리지 않습니다.
+호가 기준 가격을 쓰는 (거래소, 심볼)은 register_book()으로 등록하면 티커 대신 호가창을 조회해 같은 방식으로 계산합니다.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ccxt.async_support as ccxt_async
+
+from ingest_loop import IngestLoopPool
+from metrics import METRICS, MetricsRegistry
+from source_health import SourceHealthRegistry
+
+REST_BOOK_LIMIT = 50  # 호가 기준 가격 조회 시 요청할 호가 단계 수
+
+
+class RestFallbackPool:
+    """REST 폴백 클라이언트 풀 클래스"""
+
+    def __init__(
+        self,
+        ingest: IngestLoopPool,
+        loop_index: int = 0,
+        timeout: float = 5.0,
+        markets_ttl: float = 3600.0,
+        refresh_interval: float = 1.0,
+        metrics: Optional[MetricsRegistry] = None,
+        health: Optional[SourceHealthRegistry] = None
+    ):
+        """
+        Args:
+            ingest: 클라이언트를 실행할 공유 수집 루프
+            loop_index: 사용할 수집 루프 인덱스 (클라이언트는 항상 같은 루프에서 사용)
+            timeout: 요청당 제한 시간 (초)
+            markets_ttl: 마켓 정보 재조회 주기 (초)
+            refresh_interval: 같은 (거래소, 심볼)의 백그라운드 갱신 최소 간격 (초)
+            metrics: 폴백 지연 히스토그램을 등록할 메트릭 레지스트리
+            health: 요청 성공/실패를 기록하고 차단된 거래소의 갱신을 막을 소스 상태 모음
+        """
+        self.ingest = ingest
+        self.loop_index = loop_index
+        self.timeout = timeout
+        self.markets_ttl = markets_ttl
+        self.refresh_interval = refresh_interval
+
+        self._exchange_ids: Dict[str, str] = {}  # 이름 -> ccxt 거래소 ID
+        self._book_pricers: Dict[Tuple[str, str], Callable[[list, list], Optional[float]]] = {}
+        self._clients = {}  # 이름 -> ccxt 비동기 인스턴스 (수집 루프에서만 접근)
+        self._markets_loaded_at: Dict[str, float] = {}
+
+        # 백그라운드 갱신 상태 (조회 중인 요청과 마지막 시작 시각, 틱 스레드와 수집 루프에서 접근)
+        self._refreshing = set()
+        self._refreshed_at: Dict[Tuple[str, str], float] = {}
+        self._refresh_lock = threading.Lock()
+
+        # 거래소별 폴백 지연 통계
+        self._stats: Dict[str, Dict] = {}
+        self._stats_lock = threading.Lock()
+        self.metrics = metrics or METRICS
+        self.health = health or SourceHealthRegistry()
+
+    def register(self, name: str, exchange_id: Optional[str] = None):
+        """폴백 대상 거래소 등록 (클라이언트는 첫 요청 시 생성)"""
+        self._exchange_ids[name] = exchange_id or name
+
+    def register_book(self, name: str, symbol: str, pricer: Callable[[list, list], Optional[float]]):
+        """
+        호가 기준 가격을 쓰는 (거래소, 심볼) 등록
+        이 요청은 티커 최종 체결가 대신 호가창을 조회해 pricer(bids, asks)로 계산하므로
+        웹소켓 호가창으로 채우는 가격 장부 슬롯에 다른 방식의 가격이 섞이지 않습니다.
+        """
+        self._book_pricers[(name, symbol)] = pricer
+
+    async def _get_client(self, name: str):
+        """거래소 클라이언트 (없으면 생성, 마켓 정보가 오래되면 재조회)"""
+        client = self._clients.get(name)
+        if client is None:
+            exchange_id = self._exchange_ids.get(name, name)
+            client = getattr(ccxt_async, exchange_id)({
+                'enableRateLimit': True,
+                'timeout': int(self.timeout * 1000),
+            })
+            self._clients[name] = client
+
+        loaded_at = self._markets_loaded_at.get(name)
+        now = time.monotonic()
+        if loaded_at is None or now - loaded_at > self.markets_ttl:
+            await client.load_markets(reload=loaded_at is not None)
+            self._markets_loaded_at[name] = now
+        return client
+
+    async def fetch_price_async(self, name: str, symbol: str) -> Optional[float]:
+        """티커 최종 가격 (호가 기준으로 등록된 요청은 호가 기준 가격) 조회 (수집 루프에서 실행, 실패 시 None)"""
+        started = time.perf_counter()
+        try:
+            client = await self._get_client(name)
+            pricer = self._book_pricers.get((name, symbol))
+            if pricer is None:
+                ticker = await asyncio.wait_for(client.fetch_ticker(symbol), self.timeout)
+                price = float(ticker['last'])
+            else:
+                book = await asyncio.wait_for(client.fetch_order_book(symbol, REST_BOOK_LIMIT), self.timeout)
+                price = pricer(book['bids'], book['asks'])  # 한쪽이 비었거나 교차하면 None (갱신하지 않음)
+            self._record(name, started, ok=True)
+            self.health.get(name).record_success()
+            return price
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record(name, started, ok=False)
+            self.health.get(name).record_failure(e)
+            print(f"{name} {symbol} REST 폴백 실패: {e}")
+            return None
+
+    async def fetch_many_async(self, requests: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[float]]:
+        """여러 (거래소, 심볼)을 동시에 조회"""
+        prices = await asyncio.gather(*(self.fetch_price_async(name, symbol) for name, symbol in requests))
+        return dict(zip(requests, prices))
+
+    def fetch_price(self, name: str, symbol: str) -> Optional[float]:
+        """티커 최종 가격 조회 (수집 루프 밖에서 호출, 완료까지 대기)"""
+        return self.fetch_many([(name, symbol)])[(name, symbol)]
+
+    def fetch_many(self, requests: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[float]]:
+        """여러 (거래소, 심볼)을 동시에 조회 (수집 루프 밖에서 호출, 가장 느린 요청까지 대기)"""
+        if not requests:
+            return {}
+        try:
+            return self.ingest.run(self.fetch_many_async(requests), self.loop_index, timeout=self.timeout + 1)
+        except Exception as e:
+            print(f"REST 폴백 조회 실패: {e}")
+            return {request: None for request in requests}
+
+    def refresh(
+        self,
+        requests: List[Tuple[str, str]],
+        callback: Callable[[List[Tuple[str, str, float]]], None]
+    ) -> int:
+        """
+        여러 (거래소, 심볼)을 백그라운드에서 동시에 조회 (대기하지 않음)
+        이미 조회 중이거나 refresh_interval 안에 조회를 시작한 요청, 백오프 중인 거래소의 요청은 건너뛰고,
+        성공한 가격은 수집 루프에서 callback([(거래소, 심볼, 가격), ...])으로 전달합니다.
+
+        Returns:
+            새로 시작한 요청 수
+        """
+        now = time.monotonic()
+        with self._refresh_lock:
+            due = [
+                request for request in dict.fromkeys(requests)
+                if request not in self._refreshing
+                and now - self._refreshed_at.get(request, -self.refresh_interval) >= self.refresh_interval
+                and self.health.get(request[0]).allow_request()
+            ]
+            self._refreshing.update(due)
+            for request in due:
+                self._refreshed_at[request] = now
+        if not due:
+            return 0
+
+        async def refresh_async():
+            try:
+                prices = await self.fetch_many_async(due)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update(due)
+            fresh = [(name, symbol, price) for (name, symbol), price in prices.items() if price is not None]
+            if fresh:
+                try:
+                    callback(fresh)
+                except Exception as e:
+                    print(f"REST 폴백 갱신 반영 실패: {e}")
+
+        try:
+            self.ingest.submit(refresh_async(), self.loop_index)
+        except Exception as e:
+            with self._refresh_lock:
+                self._refreshing.difference_update(due)
+            print(f"REST 폴백 갱신 요청 실패: {e}")
+            return 0
+        return len(due)
+
+    def refreshing(self) -> int:
+        """백그라운드에서 조회 중인 요청 수"""
+        with self._refresh_lock:
+            return len(self._refreshing)
+
+    def _record(self, name: str, started: float, ok: bool):
+        elapsed = time.perf_counter() - started
+        self.metrics.histogram('oracle_rest_fallback_seconds', 'REST 폴백 요청 시간', venue=name).record(elapsed)
+        elapsed_ms = elapsed * 1000
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {
+                    'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': None,
+                }
+            stats['requests'] += 1
+            if not ok:
+                stats['errors'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['last_ms'] = elapsed_ms
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """거래소별 폴백 요청 수, 오류 수, 지연(ms)"""
+        with self._stats_lock:
+            result = {}
+            for name, stats in self._stats.items():
+                result[name] = {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total_ms'] / stats['requests'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'last_ms': round(stats['last_ms'], 2),
+                }
+            return result
+
+    def close(self, timeout: float = 5.0):
+        """모든 클라이언트의 HTTP 세션 종료"""
+        async def close_all():
+            clients, self._clients = list(self._clients.values()), {}
+            self._markets_loaded_at = {}
+            await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+        try:
+            self.ingest.run(close_all(), self.loop_index, timeout=timeout)
+        except Exception as e:
+            print(f"REST 폴백 클라이언트 종료 실패: {e}")
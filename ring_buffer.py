@@ -0,0 +1,215 @@
+"""
+고정 용량 컬럼형 링 버퍼
+차트 히스토리처럼 시간순으로 쌓이는 숫자 시계열을 array('d') 기반으로 저장합니다.
+추가/제거는 O(1), 시간 범위 탐색은 이진 탐색이며 메모리 사용량은 용량으로 고정됩니다.
+"""
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class ColumnarRingBuffer:
+    """
+    컬럼형 링 버퍼 클래스
+
+    첫 번째 컬럼은 정렬 키(보통 epoch 초 타임스탬프)로 사용되며,
+    값은 오름차순으로 추가된다고 가정합니다.
+    """
+
+    def __init__(self, columns: Sequence[str], capacity: int, buffer=None):
+        """
+        Args:
+            columns: 컬럼 이름 목록 (첫 번째 컬럼이 정렬 키)
+            capacity: 최대 행 수 (가득 차면 가장 오래된 행을 덮어씀)
+            buffer: 컬럼 배열을 둘 외부 버퍼 (예: 공유 메모리, 8 × capacity × 컬럼 수 바이트 이상)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity는 1 이상이어야 합니다")
+
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        if buffer is None:
+            # 미리 할당된 배열 (크기가 바뀌지 않으므로 memoryview를 안전하게 내보낼 수 있음)
+            self._arrays = [array('d', bytes(8 * capacity)) for _ in self.columns]
+            self._views = [memoryview(arr) for arr in self._arrays]
+        else:
+            view = memoryview(buffer).cast('B')
+            if len(view) < self.memory_bytes:
+                raise ValueError(f"buffer는 {self.memory_bytes}바이트 이상이어야 합니다")
+            # 컬럼별로 연속된 float64 구간 (memoryview도 인덱스 읽기/쓰기를 지원하므로 그대로 사용)
+            self._views = [view[8 * capacity * i:8 * capacity * (i + 1)].cast('d')
+                           for i in range(len(self.columns))]
+            self._arrays = self._views
+        self._head = 0  # 가장 오래된 행의 물리 인덱스
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def memory_bytes(self) -> int:
+        """버퍼가 차지하는 데이터 메모리 (바이트, 고정값)"""
+        return 8 * self.capacity * len(self.columns)
+
+    def _physical(self, index: int) -> int:
+        return (self._head + index) % self.capacity
+
+    def append(self, values: Sequence[float]) -> int:
+        """
+        행 추가
+
+        Returns:
+            용량 초과로 제거된 행 수 (0 또는 1)
+        """
+        evicted = 0
+        if self._size == self.capacity:
+            # 가득 찬 경우 가장 오래된 행 위치에 덮어쓰기
+            position = self._head
+            self._head = (self._head + 1) % self.capacity
+            evicted = 1
+        else:
+            position = self._physical(self._size)
+            self._size += 1
+
+        for arr, value in zip(self._arrays, values):
+            arr[position] = value
+        return evicted
+
+    def update_last(self, values: Sequence[float]):
+        """마지막 행을 제자리에서 갱신"""
+        if not self._size:
+            raise IndexError("빈 버퍼입니다")
+        position = self._physical(self._size - 1)
+        for arr, value in zip(self._arrays, values):
+            arr[position] = value
+
+    def pop_left(self, count: int = 1) -> int:
+        """가장 오래된 행부터 count개 제거 (O(1)), 실제 제거된 행 수 반환"""
+        count = min(count, self._size)
+        self._head = (self._head + count) % self.capacity
+        self._size -= count
+        if self._size == 0:
+            self._head = 0
+        return count
+
+    def bisect_left(self, key: float) -> int:
+        """정렬 키 컬럼에서 key 이상인 첫 번째 행의 논리 인덱스 (이진 탐색)"""
+        keys = self._arrays[0]
+        capacity = self.capacity
+        head = self._head
+        low, high = 0, self._size
+        while low < high:
+            mid = (low + high) // 2
+            if keys[(head + mid) % capacity] < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def bisect_right(self, key: float) -> int:
+        """정렬 키 컬럼에서 key보다 큰 첫 번째 행의 논리 인덱스 (이진 탐색)"""
+        keys = self._arrays[0]
+        capacity = self.capacity
+        head = self._head
+        low, high = 0, self._size
+        while low < high:
+            mid = (low + high) // 2
+            if key < keys[(head + mid) % capacity]:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def evict_before(self, cutoff: float) -> int:
+        """정렬 키가 cutoff보다 작은 행 제거, 제거된 행 수 반환"""
+        return self.pop_left(self.bisect_left(cutoff))
+
+    def get(self, column: str, index: int) -> float:
+        """논리 인덱스의 값 (음수 인덱스 지원)"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("인덱스 범위를 벗어났습니다")
+        return self._arrays[self._column_index[column]][self._physical(index)]
+
+    def last(self, column: str) -> Optional[float]:
+        """마지막 행의 값 (비어 있으면 None)"""
+        return self.get(column, -1) if self._size else None
+
+    def views(self, column: str, start: int = 0, end: Optional[int] = None) -> Tuple[memoryview, memoryview]:
+        """
+        컬럼의 [start, end) 구간을 복사 없이 가리키는 memoryview 두 조각
+        링이 배열 끝에서 감겨 있으면 두 번째 조각이 이어지는 부분입니다.
+        이후 append로 덮어써질 수 있으므로 락 안에서만 사용하세요.
+        """
+        if end is None or end > self._size:
+            end = self._size
+        start = max(0, min(start, end))
+        view = self._views[self._column_index[column]]
+
+        first = self._physical(start)
+        length = end - start
+        if first + length <= self.capacity:
+            return view[first:first + length], view[0:0]
+        return view[first:], view[:first + length - self.capacity]
+
+    def copy_columns(self, start: int = 0, end: Optional[int] = None) -> Dict[str, array]:
+        """[start, end) 구간의 컬럼별 배열 복사본 (memcpy 수준, 락 보유 시간 최소화용)"""
+        result = {}
+        for name in self.columns:
+            head, tail = self.views(name, start, end)
+            copied = array('d')
+            copied.frombytes(head.cast('B'))
+            copied.frombytes(tail.cast('B'))
+            result[name] = copied
+        return result
+
+    def snapshot(self, start: int = 0, end: Optional[int] = None) -> Dict[str, List[float]]:
+        """[start, end) 구간의 컬럼별 리스트 (JSON 직렬화용)"""
+        return {name: arr.tolist() for name, arr in self.copy_columns(start, end).items()}
+
+    def tail(self, count: int) -> Dict[str, List[float]]:
+        """마지막 count개 행의 컬럼별 리스트"""
+        return self.snapshot(max(0, self._size - count))
+
+    def clear(self):
+        """모든 행 제거"""
+        self._head = 0
+        self._size = 0
+
+    @property
+    def state(self) -> Tuple[int, int]:
+        """(가장 오래된 행의 물리 인덱스, 행 수), 외부 버퍼를 다른 프로세스와 공유할 때 함께 전달"""
+        return self._head, self._size
+
+    def set_state(self, head: int, size: int):
+        """외부 버퍼의 내용에 맞춰 (head, size) 지정"""
+        if not (0 <= head < self.capacity and 0 <= size <= self.capacity):
+            raise ValueError("head/size가 용량 범위를 벗어났습니다")
+        self._head = head
+        self._size = size
+
+    def release(self):
+        """외부 버퍼를 가리키는 memoryview 해제 (공유 메모리를 닫기 전에 호출, 이후 사용 불가)"""
+        for view in self._views:
+            view.release()
+
+
+if __name__ == '__main__':
+    # 테스트
+    buffer = ColumnarRingBuffer(('timestamps', 'values'), capacity=5)
+    for i in range(8):
+        evicted = buffer.append((1000.0 + i, i * 10.0))
+    print(buffer.snapshot())  # 가장 최근 5개
+    print(buffer.evict_before(1005.0), buffer.snapshot())
+    print(buffer.bisect_left(1006.5), buffer.last('values'), buffer.memory_bytes)
+    assert buffer.snapshot() == {'timestamps': [1005.0, 1006.0, 1007.0], 'values': [50.0, 60.0, 70.0]}
+
+    # 외부 버퍼 사용 (같은 버퍼를 가리키는 두 번째 버퍼가 state만 받아 같은 내용을 읽음)
+    shared = bytearray(8 * 5 * 2)
+    writer = ColumnarRingBuffer(('timestamps', 'values'), capacity=5, buffer=shared)
+    for i in range(7):
+        writer.append((1000.0 + i, i))
+    reader = ColumnarRingBuffer(('timestamps', 'values'), capacity=5, buffer=shared)
+    reader.set_state(*writer.state)
+    assert reader.snapshot() == writer.snapshot() and reader.bisect_right(1004.0) == 3
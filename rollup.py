@@ -0,0 +1,241 @@
+"""
+다중 해상도 롤업 히스토리
+원본 히스토리에 포인트가 추가될 때마다 1초/10초/1분/5분 버킷의 OHLC, 평균을 증분으로 갱신합니다.
+어떤 줌 레벨이든 원본 포인트 수가 아니라 버킷 수에 비례하는 비용으로 조회할 수 있습니다.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ring_buffer import ColumnarRingBuffer
+
+# 롤업 대상 시리즈
+ROLLUP_SERIES = ('median_prices', 'upbit_eth_krw', 'upbit_usdt_krw')
+
+# 버킷별 통계 (평균은 sum / count로 계산)
+BUCKET_STATS = ('open', 'high', 'low', 'close', 'sum', 'count')
+
+# (해상도 초, 보관 버킷 수): 1초 1시간, 10초 6시간, 1분 24시간, 5분 24시간
+DEFAULT_TIERS = ((1, 3600), (10, 2160), (60, 1440), (300, 288))
+
+NAN = float('nan')
+
+
+class RollupTier:
+    """단일 해상도 롤업 클래스"""
+
+    def __init__(self, resolution: int, capacity: int, series: Sequence[str] = ROLLUP_SERIES):
+        """
+        Args:
+            resolution: 버킷 크기 (초)
+            capacity: 보관할 최대 버킷 수
+            series: 롤업할 시리즈 이름 목록
+        """
+        self.resolution = resolution
+        self.series = tuple(series)
+        columns = ['bucket_start'] + [f'{name}_{stat}' for name in self.series for stat in BUCKET_STATS]
+        self.buffer = ColumnarRingBuffer(columns, capacity)
+        # 현재(마지막) 버킷의 행 값 (버퍼를 다시 읽지 않고 갱신하기 위해 보관)
+        self._current: Optional[List[float]] = None
+
+    def add(self, timestamp: float, values: Dict[str, Optional[float]]):
+        """포인트를 해당 버킷에 반영 (None 값은 해당 시리즈에서 제외)"""
+        bucket_start = math.floor(timestamp / self.resolution) * self.resolution
+        current = self._current
+
+        if current is not None and current[0] > bucket_start:
+            # 이미 지난 버킷의 늦은 데이터는 무시
+            return
+
+        if current is None or current[0] != bucket_start:
+            current = [bucket_start]
+            for name in self.series:
+                current.extend((NAN, NAN, NAN, NAN, 0.0, 0.0))
+            new_bucket = True
+        else:
+            new_bucket = False
+
+        stat_count = len(BUCKET_STATS)
+        for i, name in enumerate(self.series):
+            value = values.get(name)
+            if value is None:
+                continue
+            base = 1 + i * stat_count
+            if current[base + 5] == 0:
+                current[base] = value  # open
+                current[base + 1] = value  # high
+                current[base + 2] = value  # low
+            else:
+                if value > current[base + 1]:
+                    current[base + 1] = value
+                if value < current[base + 2]:
+                    current[base + 2] = value
+            current[base + 3] = value  # close
+            current[base + 4] += value
+            current[base + 5] += 1
+
+        if new_bucket:
+            self.buffer.append(current)
+        else:
+            self.buffer.update_last(current)
+        self._current = current
+
+    def evict_before(self, cutoff: float) -> int:
+        """cutoff 이전에 끝난 버킷 제거"""
+        evicted = self.buffer.evict_before(cutoff - self.resolution)
+        if not len(self.buffer):
+            self._current = None
+        return evicted
+
+    def oldest(self) -> Optional[float]:
+        """가장 오래된 버킷 시작 시간"""
+        return self.buffer.get('bucket_start', 0) if len(self.buffer) else None
+
+    def index_range(self, start: float, end: float) -> Tuple[int, int]:
+        """[start, end] 구간과 겹치는 버킷의 논리 인덱스 범위 (이진 탐색)"""
+        first_bucket = math.floor(start / self.resolution) * self.resolution
+        return self.buffer.bisect_left(first_bucket), self.buffer.bisect_right(end)
+
+
+class RollupHistory:
+    """다중 해상도 롤업 히스토리 클래스"""
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS, series: Sequence[str] = ROLLUP_SERIES):
+        """
+        Args:
+            tiers: (해상도 초, 보관 버킷 수) 목록, 해상도 오름차순
+            series: 롤업할 시리즈 이름 목록
+        """
+        self.series = tuple(series)
+        self.tiers = [RollupTier(resolution, capacity, self.series)
+                      for resolution, capacity in sorted(tiers)]
+        self._tiers_by_resolution = {tier.resolution: tier for tier in self.tiers}
+
+    @property
+    def resolutions(self) -> List[int]:
+        return [tier.resolution for tier in self.tiers]
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(tier.buffer.memory_bytes for tier in self.tiers)
+
+    def add(self, timestamp: float, values: Dict[str, Optional[float]]):
+        """모든 해상도에 포인트 반영 (티어 수만큼 O(1))"""
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+
+    def evict_before(self, cutoff: float):
+        """cutoff 이전 버킷 제거"""
+        for tier in self.tiers:
+            tier.evict_before(cutoff)
+
+    def choose_resolution(self, start: float, end: float, max_buckets: int) -> int:
+        """
+        구간을 max_buckets 이하로 표현하는 해상도 선택
+        구간 시작까지 데이터가 보관된 가장 세밀한 해상도를 우선하고,
+        그런 해상도가 없으면 (데이터가 구간보다 짧은 경우) 데이터가 있는 가장 세밀한 해상도를 선택합니다.
+        """
+        candidates = [tier for tier in self.tiers if (end - start) / tier.resolution <= max_buckets]
+        if not candidates:
+            return self.tiers[-1].resolution
+
+        for tier in candidates:
+            oldest = tier.oldest()
+            if oldest is not None and oldest <= start:
+                return tier.resolution
+
+        for tier in candidates:
+            if tier.oldest() is not None:
+                return tier.resolution
+        return candidates[0].resolution
+
+    def get_tier(self, resolution: int) -> Optional[RollupTier]:
+        return self._tiers_by_resolution.get(resolution)
+
+    def copy_range(self, start: float, end: float, resolution: int) -> Dict:
+        """
+        구간의 버킷 배열 복사본 (락 안에서 호출, O(log n + 버킷 수))
+        format_range로 응답 형식으로 변환합니다.
+        """
+        tier = self._tiers_by_resolution[resolution]
+        first, last = tier.index_range(start, end)
+        return {
+            'resolution': resolution,
+            'columns': tier.buffer.copy_columns(first, last),
+        }
+
+    def copy_latest(self, resolution: int, count: int = 1) -> Dict:
+        """
+        마지막 count개 버킷의 배열 복사본 (락 안에서 호출, 틱마다 갱신된 현재 버킷 전송용)
+        format_range로 응답 형식으로 변환합니다.
+        """
+        tier = self._tiers_by_resolution[resolution]
+        size = len(tier.buffer)
+        return {
+            'resolution': resolution,
+            'columns': tier.buffer.copy_columns(max(0, size - count), size),
+        }
+
+    def format_range(self, copied: Dict) -> Dict:
+        """
+        copy_range 결과를 JSON 응답 형식으로 변환 (락 밖에서 호출)
+
+        Returns:
+            {
+                'resolution': int,
+                'timestamps': List[float],  # 버킷 시작 시간 (epoch 초)
+                'series': {
+                    name: {'open': [...], 'high': [...], 'low': [...], 'close': [...],
+                           'mean': [...], 'count': [...]},
+                },
+            }
+        """
+        columns = copied['columns']
+        series = {}
+        for name in self.series:
+            sums = columns[f'{name}_sum'].tolist()
+            counts = columns[f'{name}_count'].tolist()
+            stats = {}
+            for stat in ('open', 'high', 'low', 'close'):
+                # 데이터가 없는 버킷(NaN)은 null
+                stats[stat] = [None if value != value else value
+                               for value in columns[f'{name}_{stat}'].tolist()]
+            stats['mean'] = [total / count if count else None for total, count in zip(sums, counts)]
+            stats['count'] = [int(count) for count in counts]
+            series[name] = stats
+
+        return {
+            'resolution': copied['resolution'],
+            'timestamps': columns['bucket_start'].tolist(),
+            'series': series,
+        }
+
+
+if __name__ == '__main__':
+    # 테스트
+    import random
+
+    history = RollupHistory()
+    timestamp = 1_700_000_000.0
+    for _ in range(2000):
+        timestamp += 0.5
+        history.add(timestamp, {
+            'median_prices': 5_000_000 + random.uniform(-1000, 1000),
+            'upbit_eth_krw': 5_000_000 + random.uniform(-1000, 1000),
+            'upbit_usdt_krw': None,
+        })
+
+    start = timestamp - 600
+    resolution = history.choose_resolution(start, timestamp, max_buckets=100)
+    result = history.format_range(history.copy_range(start, timestamp, resolution))
+    print(f"해상도 {result['resolution']}초, 버킷 {len(result['timestamps'])}개, 메모리 {history.memory_bytes} bytes")
+    print({stat: values[:2] for stat, values in result['series']['median_prices'].items()})
+    assert result['series']['upbit_usdt_krw']['mean'][0] is None
+
+    # 구간보다 짧은 새 데이터는 가장 굵은 해상도가 아니라 데이터가 있는 가장 세밀한 해상도로 조회
+    fresh = RollupHistory()
+    for offset in range(20):
+        fresh.add(timestamp + offset, {'median_prices': 5_000_000.0})
+    assert fresh.choose_resolution(timestamp + 19 - 60, timestamp + 19, max_buckets=100) == 1
+
+    latest = history.format_range(history.copy_latest(60))
+    assert latest['timestamps'] == [math.floor(timestamp / 60) * 60]
@@ -0,0 +1,454 @@
+"""
+공유 메모리 스냅샷 (seqlock)
+수집 프로세스가 틱마다 최신 결과와 차트 히스토리를 multiprocessing.shared_memory 영역 하나에 게시하고,
+여러 웹 워커 프로세스가 같은 영역을 매핑해 IPC 왕복 없이 읽습니다.
+
+쓰기는 버전을 홀수로 올리고 → 데이터를 쓰고 → 다시 짝수로 올리며,
+읽기는 버전이 짝수이고 복사 전후의 버전이 같을 때만 결과를 사용합니다 (다르면 다시 읽음).
+쓰는 쪽은 하나(수집기)이므로 락이 없고, 읽는 쪽이 아무리 많아도 쓰기를 막지 않습니다.
+(쓰기 순서가 그대로 보이는 x86-64 기준으로 검증했습니다.)
+
+영역 구성: [헤더 | 히스토리 컬럼 (float64 × 용량 × 컬럼 수) | 틱 데이터 | 상태 데이터]
+- 히스토리: 수집기의 ColumnarRingBuffer가 이 구간을 직접 사용 (head/size는 헤더로 전달)
+- 틱 데이터: 틱마다 바뀌는 최신 결과 (인코딩된 바이트)
+- 상태 데이터: 가끔 바뀌는 통계 (버전이 바뀔 때만 읽음)
+
+수동 가격 같은 제어 값은 이 영역에 쓰지 않고 수집기가 소유한 Unix 데이터그램 소켓(ControlListener)으로
+보냅니다. 웹 워커는 send_control()로 요청만 보내고, 수집기가 받은 순서대로 반영해 다음 틱으로 게시하므로
+영역에 쓰는 쪽은 항상 수집기 하나입니다.
+"""
+import json
+import math
+import os
+import socket
+import struct
+import tempfile
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence
+
+from ring_buffer import ColumnarRingBuffer
+
+MAGIC = b'ORSS'
+LAYOUT_VERSION = 2
+HEADER_SIZE = 192
+
+# 헤더 필드 (오프셋, 형식)
+_HEADER = struct.Struct('<4sI')  # 매직, 레이아웃 버전
+_SEQUENCE = (8, 'Q')
+_PUBLISHED_AT = (16, 'd')
+_WRITER_PID = (24, 'Q')
+_CLOSED = (32, 'Q')
+_CAPACITY = (40, 'Q')
+_COLUMNS = (48, 'Q')
+_TICK_CAPACITY = (56, 'Q')
+_STATUS_CAPACITY = (64, 'Q')
+_HISTORY_HEAD = (72, 'Q')
+_HISTORY_SIZE = (80, 'Q')
+_TICK_LENGTH = (88, 'Q')
+_STATUS_LENGTH = (96, 'Q')
+_STATUS_VERSION = (104, 'Q')
+
+# 제어 값 (워커 → 수집기, None이면 해제)
+CONTROL_FIELDS = ('manual_usdt_krw', 'manual_eth_krw')
+CONTROL_AVAILABLE = hasattr(socket, 'AF_UNIX')
+CONTROL_MAX_BYTES = 4096
+
+DEFAULT_TICK_CAPACITY = 1 << 20  # 1MB
+DEFAULT_STATUS_CAPACITY = 4 << 20  # 4MB
+
+
+def _get(buf, field):
+    offset, fmt = field
+    return struct.unpack_from('<' + fmt, buf, offset)[0]
+
+
+def _set(buf, field, value):
+    offset, fmt = field
+    struct.pack_into('<' + fmt, buf, offset, value)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """기존 영역 열기 (읽는 쪽 종료 시 영역이 지워지지 않도록 resource_tracker 추적 제외)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class SnapshotWriter:
+    """스냅샷 게시 클래스 (수집 프로세스에서 하나만 사용)"""
+
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[str],
+        capacity: int,
+        tick_capacity: int = DEFAULT_TICK_CAPACITY,
+        status_capacity: int = DEFAULT_STATUS_CAPACITY
+    ):
+        """
+        Args:
+            name: 공유 메모리 이름 (웹 워커와 같은 이름 사용)
+            columns: 히스토리 컬럼 이름 목록 (첫 번째 컬럼이 타임스탬프)
+            capacity: 히스토리 최대 행 수
+            tick_capacity: 틱 데이터 최대 크기 (바이트)
+            status_capacity: 상태 데이터 최대 크기 (바이트)
+        """
+        self.name = name
+        self.tick_capacity = tick_capacity
+        self.status_capacity = status_capacity
+        history_bytes = 8 * capacity * len(columns)
+        self._tick_offset = HEADER_SIZE + history_bytes
+        self._status_offset = self._tick_offset + tick_capacity
+        size = self._status_offset + status_capacity
+
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 이전 수집기가 비정상 종료하며 남긴 영역은 지우고 새로 생성
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        buf = self._buf = self._shm.buf
+        _HEADER.pack_into(buf, 0, MAGIC, LAYOUT_VERSION)
+        _set(buf, _WRITER_PID, os.getpid())
+        _set(buf, _CAPACITY, capacity)
+        _set(buf, _COLUMNS, len(columns))
+        _set(buf, _TICK_CAPACITY, tick_capacity)
+        _set(buf, _STATUS_CAPACITY, status_capacity)
+
+        # 수집기의 차트 히스토리 (begin()과 commit() 사이에서만 변경해야 읽는 쪽이 일관된 값을 봄)
+        self.history = ColumnarRingBuffer(columns, capacity, buffer=buf[HEADER_SIZE:self._tick_offset])
+        self._sequence = 0
+        self._status_version = 0
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def begin(self):
+        """쓰기 시작 (버전을 홀수로, 읽는 쪽은 commit()까지 재시도)"""
+        self._sequence += 1
+        _set(self._buf, _SEQUENCE, self._sequence)
+
+    def commit(self, tick: bytes, status: Optional[bytes] = None):
+        """
+        틱 데이터(와 상태 데이터)를 쓰고 히스토리 head/size와 함께 게시 (버전을 짝수로)
+        크기를 넘는 데이터는 쓰지 않고 버전만 닫은 뒤 ValueError를 발생시킵니다.
+        """
+        buf = self._buf
+        try:
+            if len(tick) > self.tick_capacity:
+                raise ValueError(f"틱 데이터가 너무 큽니다 ({len(tick)} > {self.tick_capacity}바이트)")
+            if status is not None and len(status) > self.status_capacity:
+                raise ValueError(f"상태 데이터가 너무 큽니다 ({len(status)} > {self.status_capacity}바이트)")
+
+            buf[self._tick_offset:self._tick_offset + len(tick)] = tick
+            _set(buf, _TICK_LENGTH, len(tick))
+            if status is not None:
+                buf[self._status_offset:self._status_offset + len(status)] = status
+                _set(buf, _STATUS_LENGTH, len(status))
+                self._status_version += 1
+                _set(buf, _STATUS_VERSION, self._status_version)
+            head, size = self.history.state
+            _set(buf, _HISTORY_HEAD, head)
+            _set(buf, _HISTORY_SIZE, size)
+            _set(buf, _PUBLISHED_AT, time.time())
+        finally:
+            self._sequence += 1
+            _set(buf, _SEQUENCE, self._sequence)
+
+    def publish(self, tick: bytes, status: Optional[bytes] = None):
+        """히스토리 변경 없이 게시"""
+        self.begin()
+        self.commit(tick, status)
+
+    def close(self):
+        """영역 닫기 및 삭제 (읽는 쪽은 closed로 재연결 필요를 알 수 있음)"""
+        _set(self._buf, _CLOSED, 1)
+        self.history.release()
+        self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotReader:
+    """스냅샷 읽기 클래스 (웹 워커마다 하나, 읽기 전용으로 사용)"""
+
+    def __init__(self, name: str, columns: Sequence[str]):
+        """
+        Args:
+            name: 공유 메모리 이름
+            columns: 히스토리 컬럼 이름 목록 (수집기와 같아야 함)
+
+        Raises:
+            FileNotFoundError: 수집기가 아직 영역을 만들지 않은 경우
+        """
+        self.name = name
+        self._shm = _attach(name)
+        buf = self._buf = self._shm.buf
+        magic, layout = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION:
+            self._shm.close()
+            raise ValueError(f"공유 메모리 '{name}'의 형식이 다릅니다 ({magic!r}, 레이아웃 {layout})")
+        if _get(buf, _COLUMNS) != len(columns):
+            self._shm.close()
+            raise ValueError(f"히스토리 컬럼 수가 다릅니다 (수집기 {_get(buf, _COLUMNS)}개, 요청 {len(columns)}개)")
+
+        capacity = self.capacity = _get(buf, _CAPACITY)
+        self.tick_capacity = _get(buf, _TICK_CAPACITY)
+        self.status_capacity = _get(buf, _STATUS_CAPACITY)
+        self._tick_offset = HEADER_SIZE + 8 * capacity * len(columns)
+        self._status_offset = self._tick_offset + self.tick_capacity
+        self.history = ColumnarRingBuffer(columns, capacity, buffer=buf[HEADER_SIZE:self._tick_offset])
+        self.retries = 0  # 쓰기와 겹쳐 다시 읽은 횟수
+
+    @property
+    def sequence(self) -> int:
+        """현재 버전 (홀수면 쓰는 중)"""
+        return _get(self._buf, _SEQUENCE)
+
+    @property
+    def closed(self) -> bool:
+        """수집기가 영역을 닫았는지 여부"""
+        return bool(_get(self._buf, _CLOSED))
+
+    @property
+    def writer_pid(self) -> int:
+        return _get(self._buf, _WRITER_PID)
+
+    def age(self) -> float:
+        """마지막 게시 이후 경과 시간 (초)"""
+        return time.time() - _get(self._buf, _PUBLISHED_AT)
+
+    def read(self, since: float = -math.inf, status_version: Optional[int] = None,
+             max_attempts: int = 10000) -> Optional[Dict]:
+        """
+        일관된 스냅샷 복사
+
+        Args:
+            since: 이 타임스탬프보다 새로운 히스토리 행만 복사
+            status_version: 이미 가진 상태 데이터 버전 (같으면 상태 데이터를 복사하지 않음)
+            max_attempts: 쓰기와 계속 겹칠 때 포기하기까지의 시도 횟수
+
+        Returns:
+            {'sequence', 'published_at', 'tick': bytes, 'status': bytes | None, 'status_version',
+             'history': {컬럼: array}, 'history_size'} 또는 None (게시 전이거나 시도 횟수 초과)
+        """
+        buf = self._buf
+        history = self.history
+        for attempt in range(max_attempts):
+            sequence = _get(buf, _SEQUENCE)
+            if sequence == 0:
+                return None
+            if sequence & 1:
+                self.retries += 1
+                time.sleep(0)  # 쓰는 쪽에 실행 기회 양보
+                continue
+
+            tick_length = _get(buf, _TICK_LENGTH)
+            current_status = _get(buf, _STATUS_VERSION)
+            status_length = _get(buf, _STATUS_LENGTH)
+            head = _get(buf, _HISTORY_HEAD)
+            size = _get(buf, _HISTORY_SIZE)
+            published_at = _get(buf, _PUBLISHED_AT)
+            if (tick_length > self.tick_capacity or status_length > self.status_capacity
+                    or head >= self.capacity or size > self.capacity):
+                self.retries += 1
+                continue
+
+            tick = bytes(buf[self._tick_offset:self._tick_offset + tick_length])
+            status = None
+            if current_status != status_version:
+                status = bytes(buf[self._status_offset:self._status_offset + status_length])
+            history.set_state(head, size)
+            rows = history.copy_columns(history.bisect_right(since))
+
+            if _get(buf, _SEQUENCE) == sequence:
+                return {
+                    'sequence': sequence,
+                    'published_at': published_at,
+                    'tick': tick,
+                    'status': status,
+                    'status_version': current_status,
+                    'history': rows,
+                    'history_size': size,
+                }
+            self.retries += 1
+        return None
+
+    def close(self):
+        """매핑 해제 (영역은 수집기가 삭제)"""
+        self.history.release()
+        self._buf = None
+        self._shm.close()
+
+
+def control_path(name: str) -> str:
+    """공유 메모리 이름에 대응하는 제어 소켓 경로"""
+    return os.path.join(tempfile.gettempdir(), f'{name}.control.sock')
+
+
+def _check_control(field: str, value: Optional[float]) -> Optional[float]:
+    if field not in CONTROL_FIELDS:
+        raise ValueError(f"제어 필드는 {CONTROL_FIELDS} 중 하나여야 합니다")
+    if value is None:
+        return None
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"제어 값은 유한한 숫자여야 합니다: {value}")
+    return value
+
+
+class ControlListener:
+    """제어 값 수신 클래스 (수집 프로세스에서 하나만 사용, 받은 순서대로 반영)"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 공유 메모리 이름 (소켓 경로는 control_path(name))
+
+        Raises:
+            OSError: 이 플랫폼에 Unix 소켓이 없거나 바인드에 실패한 경우
+        """
+        if not CONTROL_AVAILABLE:
+            raise OSError("이 플랫폼은 Unix 소켓을 지원하지 않습니다")
+        self.path = control_path(name)
+        try:
+            os.unlink(self.path)  # 이전 수집기가 비정상 종료하며 남긴 소켓
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self.rejected = 0  # 형식이 잘못되어 버린 메시지 수
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        제어 메시지 하나 받기
+
+        Returns:
+            {'field': str, 'value': float | None} 또는 None (timeout 안에 받지 못함)
+        """
+        self._sock.settimeout(timeout)
+        while True:
+            try:
+                data = self._sock.recv(CONTROL_MAX_BYTES)
+            except socket.timeout:
+                return None
+            try:
+                message = json.loads(data)
+                return {'field': message['field'], 'value': _check_control(message['field'], message['value'])}
+            except (ValueError, KeyError, TypeError):
+                self.rejected += 1
+
+    def close(self):
+        """소켓 닫기 및 삭제"""
+        self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def send_control(name: str, field: str, value: Optional[float]):
+    """
+    수집기에 제어 값 보내기 (None이면 해제)
+
+    Raises:
+        ValueError: 알 수 없는 필드이거나 값이 유한한 숫자가 아닌 경우
+        OSError: 수집기가 제어 소켓을 열지 않은 경우
+    """
+    value = _check_control(field, value)
+    if not CONTROL_AVAILABLE:
+        raise OSError("이 플랫폼은 Unix 소켓을 지원하지 않습니다")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.sendto(json.dumps({'field': field, 'value': value}).encode(), control_path(name))
+
+
+def _check_reads(name: str, columns: Sequence[str], count: int) -> str:
+    """테스트용 읽기: 틱 데이터와 히스토리 마지막 행이 항상 같은 게시에서 왔는지 확인"""
+    reader = SnapshotReader(name, columns)
+    reads = mismatches = 0
+    last_timestamp = -math.inf
+    started = time.perf_counter()
+    while reads < count:
+        snapshot = reader.read(since=last_timestamp)
+        if snapshot is None:
+            continue
+        reads += 1
+        tick = int(snapshot['tick'])
+        timestamps = snapshot['history']['timestamps']
+        if timestamps:
+            last_timestamp = timestamps[-1]
+            if int(last_timestamp) != tick or any(b - a != 1.0 for a, b in zip(timestamps, timestamps[1:])):
+                mismatches += 1
+    elapsed = time.perf_counter() - started
+    reader.close()
+    return f"{reads} {mismatches} {reader.retries} {elapsed / reads}"
+
+
+if __name__ == '__main__':
+    # 테스트: 다른 프로세스가 계속 읽는 동안 게시해도 찢어진 스냅샷이 보이지 않는지 확인
+    # (웹 워커처럼 별도 인터프리터에서 읽음)
+    import subprocess
+    import sys
+
+    columns = ('timestamps', 'values')
+    if len(sys.argv) == 3 and sys.argv[1] == '--read':
+        print(_check_reads(sys.argv[2], columns, 20000))
+        sys.exit(0)
+    if len(sys.argv) == 3 and sys.argv[1] == '--control':
+        send_control(sys.argv[2], 'manual_usdt_krw', 1400.0)
+        send_control(sys.argv[2], 'manual_usdt_krw', None)
+        sys.exit(0)
+
+    name = f'oracle_test_{os.getpid()}'
+    writer = SnapshotWriter(name, columns, capacity=1000, tick_capacity=64, status_capacity=64)
+    writer.begin()
+    writer.history.append((1.0, 1.0))
+    writer.commit(b'1', b'{}')
+
+    readers = [subprocess.Popen([sys.executable, __file__, '--read', name], stdout=subprocess.PIPE, text=True)
+               for _ in range(2)]
+    started = time.perf_counter()
+    publishes = 0
+    while any(process.poll() is None for process in readers):
+        publishes += 1
+        writer.begin()
+        writer.history.append((publishes + 1.0, publishes * 0.5))
+        writer.commit(str(publishes + 1).encode())
+        if publishes % 100 == 0:
+            time.sleep(0.0001)
+    elapsed = time.perf_counter() - started
+
+    for process in readers:
+        reads, mismatches, retries, read_cost = process.stdout.read().split()
+        assert process.returncode == 0 and mismatches == '0', mismatches
+        print(f"읽기 {reads}회, 재시도 {retries}회, 불일치 {mismatches}회, 읽기당 {float(read_cost) * 1e6:.1f} µs")
+    print(f"게시 {publishes}회, 게시당 {elapsed / publishes * 1e6:.1f} µs")
+
+    writer.close()
+
+    # 제어 값은 영역이 아닌 수집기 소켓으로 순서대로 전달
+    listener = ControlListener(name)
+    subprocess.run([sys.executable, __file__, '--control', name], check=True)
+    assert listener.receive(timeout=1.0) == {'field': 'manual_usdt_krw', 'value': 1400.0}
+    assert listener.receive(timeout=1.0) == {'field': 'manual_usdt_krw', 'value': None}
+    assert listener.receive(timeout=0.01) is None
+    listener.close()
+    try:
+        send_control(name, 'manual_usdt_krw', 1400.0)
+        raise AssertionError('수집기 소켓이 없으면 OSError여야 합니다')
+    except OSError:
+        pass
+    print("제어 소켓 확인 완료")
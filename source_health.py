@@ -0,0 +1,228 @@
+"""
+소스 상태 관리 (서킷 브레이커)
+거래소별로 웹소켓 수신과 REST 폴백의 성공/실패를 기록해
+정상(healthy) → 저하(degraded) → 차단(open) → 시험(half_open) 상태를 관리합니다.
+
+실패할 때마다 지터를 섞은 지수 백오프로 다음 시도 시각을 늦추고,
+연속 실패가 failure_threshold에 도달하면 회로를 열어 재시도 시각까지 요청을 막고 중앙값에서 제외합니다.
+재시도 시각이 지나면 시험 상태로 한 번 더 시도해 성공하면 정상으로, 실패하면 더 긴 백오프로 다시 차단합니다.
+"""
+import random
+import threading
+from typing import Dict, Optional
+
+from clock import SYSTEM_CLOCK
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATES = (HEALTHY, DEGRADED, OPEN, HALF_OPEN)
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    maximum: float = 60.0,
+    jitter: float = 0.5,
+    rng: Optional[random.Random] = None
+) -> float:
+    """
+    지터를 섞은 지수 백오프 (초)
+    base × 2^(attempt-1)를 maximum으로 자른 뒤 (1 - jitter) ~ 1배 사이에서 무작위로 줄여
+    여러 연결이 같은 시각에 몰려 재시도하지 않게 합니다.
+
+    Args:
+        attempt: 연속 실패 횟수 (1부터)
+    """
+    delay = min(maximum, base * 2 ** max(attempt - 1, 0))
+    return delay * (1 - jitter * (rng or random).random())
+
+
+class SourceHealth:
+    """소스 하나의 상태 기계 클래스 (수집 루프와 틱 스레드에서 함께 사용)"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: float = 0.5,
+        clock=None,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Args:
+            name: 소스 이름 (거래소)
+            failure_threshold: 회로를 여는 연속 실패 횟수
+            base_backoff: 첫 실패 후 재시도 대기 (초)
+            max_backoff: 재시도 대기 상한 (초)
+            jitter: 백오프를 줄이는 무작위 비율 (0이면 지터 없음)
+            clock: 현재 시간을 제공하는 시계 (기본값: 시스템 시계)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.clock = clock or SYSTEM_CLOCK
+        self.rng = rng
+
+        self.state = HEALTHY
+        self.consecutive_failures = 0
+        self.retry_at = 0.0  # 이 시각 전에는 재시도하지 않음
+        self.opened_at: Optional[float] = None
+        self.trips = 0  # 회로가 열린 횟수
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        """성공 기록 (정상 상태에서는 속성 비교 한 번으로 끝나므로 수신 경로에서 매번 호출 가능)"""
+        if self.state is HEALTHY and not self.consecutive_failures:
+            return
+        with self._lock:
+            if self.state is not HEALTHY:
+                print(f"✅ {self.name} 상태 복구 ({self.state} → {HEALTHY})")
+            self.state = HEALTHY
+            self.consecutive_failures = 0
+            self.retry_at = 0.0
+            self.opened_at = None
+
+    def record_failure(self, error=None) -> float:
+        """
+        실패 기록
+
+        Returns:
+            다음 시도까지 대기할 시간 (초)
+        """
+        now = self.clock.time()
+        with self._lock:
+            self.consecutive_failures += 1
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            self.last_failure_at = now
+            delay = backoff_delay(self.consecutive_failures, self.base_backoff, self.max_backoff,
+                                  self.jitter, self.rng)
+            self.retry_at = now + delay
+
+            previous = self.state
+            if previous is HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                if previous is not OPEN:
+                    self.opened_at = now
+                    self.trips += 1
+                    print(f"⚠️ {self.name} 회로 차단 (연속 실패 {self.consecutive_failures}회, "
+                          f"{delay:.1f}초 후 재시도): {error}")
+            else:
+                self.state = DEGRADED
+            return delay
+
+    def allow_request(self) -> bool:
+        """
+        지금 요청해도 되는지 여부
+        차단 상태에서 재시도 시각이 지나면 시험 상태로 바꾸고 요청 하나만 허용합니다
+        (시험 결과가 나오기 전의 다른 요청은 다음 백오프 시각까지 막음).
+        """
+        if self.state is HEALTHY:
+            return True
+        now = self.clock.time()
+        with self._lock:
+            if now < self.retry_at:
+                return False
+            if self.state is OPEN or self.state is HALF_OPEN:
+                self.state = HALF_OPEN
+                self.retry_at = now + backoff_delay(self.consecutive_failures, self.base_backoff,
+                                                    self.max_backoff, self.jitter, self.rng)
+            return True
+
+    def retry_delay(self) -> float:
+        """다음 시도까지 남은 시간 (초, 지금 시도할 수 있으면 0)"""
+        return max(0.0, self.retry_at - self.clock.time())
+
+    @property
+    def available(self) -> bool:
+        """중앙값에 사용할 수 있는지 여부 (차단/시험 상태는 제외)"""
+        return self.state is HEALTHY or self.state is DEGRADED
+
+    def snapshot(self) -> Dict:
+        """
+        현재 상태
+
+        Returns:
+            {'state', 'consecutive_failures', 'failures', 'trips', 'retry_in', 'open_for', 'last_error'}
+        """
+        now = self.clock.time()
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failures': self.failures,
+                'trips': self.trips,
+                'retry_in': round(max(0.0, self.retry_at - now), 3) if self.state is not HEALTHY else 0.0,
+                'open_for': round(now - self.opened_at, 3) if self.opened_at is not None else None,
+                'last_error': self.last_error,
+            }
+
+
+class SourceHealthRegistry:
+    """거래소별 SourceHealth 모음 클래스"""
+
+    def __init__(self, **options):
+        """
+        Args:
+            options: 새로 만드는 SourceHealth에 전달할 설정 (failure_threshold, base_backoff, max_backoff, jitter, clock)
+        """
+        self.options = options
+        self._sources: Dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> SourceHealth:
+        """소스 상태 (없으면 생성)"""
+        health = self._sources.get(name)
+        if health is None:
+            with self._lock:
+                health = self._sources.get(name)
+                if health is None:
+                    health = self._sources[name] = SourceHealth(name, **self.options)
+        return health
+
+    def states(self) -> Dict[str, str]:
+        """{소스: 상태}"""
+        return {name: health.state for name, health in list(self._sources.items())}
+
+    def unavailable(self) -> set:
+        """중앙값에서 제외할 소스 (차단/시험 상태)"""
+        return {name for name, health in list(self._sources.items()) if not health.available}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{소스: 상태 상세}"""
+        return {name: health.snapshot() for name, health in list(self._sources.items())}
+
+
+if __name__ == '__main__':
+    # 테스트: 연속 실패로 회로가 열리고, 재시도 시각 이후 시험 요청 성공으로 복구
+    from clock import ManualClock
+
+    clock = ManualClock(1_700_000_000.0)
+    health = SourceHealth('binance', failure_threshold=3, jitter=0.0, clock=clock)
+    delays = [health.record_failure('timeout') for _ in range(3)]
+    assert delays == [1.0, 2.0, 4.0], delays
+    assert health.state == OPEN and not health.available and not health.allow_request()
+
+    clock.advance(4.0)
+    assert health.allow_request() and health.state == HALF_OPEN
+    assert not health.allow_request()  # 시험 요청은 하나만
+    assert health.record_failure('timeout') == 8.0 and health.state == OPEN  # 시험 실패 → 더 긴 백오프
+
+    clock.advance(8.0)
+    assert health.allow_request()
+    health.record_success()
+    assert health.state == HEALTHY and health.available and health.allow_request()
+    print(health.snapshot())
+
+    delays = [round(backoff_delay(attempt), 2) for attempt in range(1, 9)]
+    print(f"지터 백오프: {delays}")
@@ -0,0 +1,274 @@
+// 차트 히스토리 워커
+// 가격 히스토리를 고정 크기 링 버퍼(Float64Array)에 변경분만 누적하고, 차트 픽셀 폭에 맞춰
+// min/max 데시메이션한 결과 중 바뀐 부분(앞쪽 제거 수, 마지막 버킷 교체, 추가 포인트)만 메인 스레드로 보냅니다.
+// Web Worker로 실행되며, Worker를 쓸 수 없는 환경에서는 같은 코드를 메인 스레드에서 그대로 사용합니다.
+
+const CHART_SERIES = ['timestamps', 'median_prices', 'upbit_eth_krw'];
+const CHART_VALUE_SERIES = ['median_prices', 'upbit_eth_krw'];
+const CHART_MAX_POINTS = 10000; // 탭당 보관 포인트 상한 (서버 HISTORY_MAX_POINTS와 동일, 3컬럼 × 8바이트 = 240KB)
+const CHART_DEFAULT_WIDTH = 1000; // 차트 폭을 받기 전 기본 픽셀 수
+const CHART_BASE_BUCKET_SECONDS = 0.25; // 가장 작은 버킷 폭 (이보다 촘촘하면 원본 그대로 표시)
+
+// 버킷 폭 선택: 기본 폭의 2의 거듭제곱 배 중 버킷 수가 픽셀 폭 이하가 되는 가장 작은 값
+// (버킷 경계가 절대 시각 기준이라 폭이 바뀌지 않는 한 이미 그린 버킷은 그대로 재사용)
+function chooseBucketSeconds(span, width) {
+    let bucketSeconds = CHART_BASE_BUCKET_SECONDS;
+    while (span / bucketSeconds > width) {
+        bucketSeconds *= 2;
+    }
+    return bucketSeconds;
+}
+
+class ChartHistory {
+    constructor(capacity = CHART_MAX_POINTS) {
+        this.width = CHART_DEFAULT_WIDTH;
+        this._allocate(capacity);
+        this._resetRendered();
+    }
+
+    _allocate(capacity) {
+        this.capacity = capacity;
+        this.columns = {};
+        CHART_SERIES.forEach(key => {
+            this.columns[key] = new Float64Array(capacity);
+        });
+        this.head = 0; // 가장 오래된 포인트 위치
+        this.size = 0;
+    }
+
+    _resetRendered() {
+        // 메인 스레드 차트에 그려진 포인트의 사본 (버킷별 포인트 수 포함, 픽셀 폭의 2배 이하)
+        this.bucketSeconds = 0;
+        this.bucketIds = [];
+        this.rendered = {};
+        CHART_VALUE_SERIES.forEach(key => {
+            this.rendered[key] = { x: [], y: [], counts: [] };
+        });
+    }
+
+    _timestamp(index) {
+        return this.columns.timestamps[(this.head + index) % this.capacity];
+    }
+
+    _value(key, index) {
+        return this.columns[key][(this.head + index) % this.capacity];
+    }
+
+    // 전체 스냅샷으로 교체
+    reset(history) {
+        const capacity = Math.min(history.max_points || CHART_MAX_POINTS, CHART_MAX_POINTS);
+        if (capacity !== this.capacity) {
+            this._allocate(capacity);
+        }
+        this.head = 0;
+        this.size = 0;
+        this.append(history);
+        this._resetRendered();
+    }
+
+    // 변경분 적용 (서버와 같은 순서: 추가 후 오래된 포인트 evicted개 제거)
+    append(delta) {
+        const timestamps = delta.timestamps || [];
+        const total = this.size + timestamps.length - (delta.evicted || 0);
+        for (let i = 0; i < timestamps.length; i++) {
+            const tail = (this.head + this.size) % this.capacity;
+            CHART_SERIES.forEach(key => {
+                const values = delta[key];
+                this.columns[key][tail] = (values && values[i]) || 0; // 누락된 가격은 0 (차트에서 제외)
+            });
+            if (this.size < this.capacity) {
+                this.size++;
+            } else {
+                this.head = (this.head + 1) % this.capacity; // 용량 초과 시 가장 오래된 포인트를 덮어씀
+            }
+        }
+        const keep = Math.max(0, Math.min(this.size, total));
+        this.head = (this.head + this.size - keep) % this.capacity;
+        this.size = keep;
+    }
+
+    // bucketId 버킷이 시작되는 포인트 위치 (이진 탐색)
+    _bucketStart(bucketId) {
+        let low = 0;
+        let high = this.size;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (Math.floor(this._timestamp(mid) / this.bucketSeconds) < bucketId) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        return low;
+    }
+
+    // start 위치부터 끝까지 버킷마다 최저/최고 포인트를 시간 순서로 계산
+    _decimate(start) {
+        const output = {};
+        CHART_VALUE_SERIES.forEach(key => {
+            output[key] = { x: [], y: [], counts: [] };
+        });
+        const bucketIds = [];
+        let index = start;
+        while (index < this.size) {
+            const bucketId = Math.floor(this._timestamp(index) / this.bucketSeconds);
+            let end = index + 1;
+            while (end < this.size && Math.floor(this._timestamp(end) / this.bucketSeconds) === bucketId) {
+                end++;
+            }
+            bucketIds.push(bucketId);
+            CHART_VALUE_SERIES.forEach(key => {
+                let minIndex = -1;
+                let maxIndex = -1;
+                for (let i = index; i < end; i++) {
+                    const value = this._value(key, i);
+                    if (!(value > 0)) continue;
+                    if (minIndex < 0 || value < this._value(key, minIndex)) minIndex = i;
+                    if (maxIndex < 0 || value > this._value(key, maxIndex)) maxIndex = i;
+                }
+                const series = output[key];
+                let count = 0;
+                if (minIndex >= 0) {
+                    const first = Math.min(minIndex, maxIndex);
+                    const last = Math.max(minIndex, maxIndex);
+                    series.x.push(this._timestamp(first));
+                    series.y.push(this._value(key, first));
+                    count = 1;
+                    if (last !== first) {
+                        series.x.push(this._timestamp(last));
+                        series.y.push(this._value(key, last));
+                        count = 2;
+                    }
+                }
+                series.counts.push(count);
+            });
+            index = end;
+        }
+        return { bucketIds, output };
+    }
+
+    /**
+     * 차트 갱신 메시지 생성
+     *
+     * full이 아니면 시리즈마다 앞쪽에서 drop개, 끝에서 pop개를 지운 뒤 x/y를 추가하면 됩니다.
+     * (앞쪽은 완전히 밀려난 버킷만 제거, 마지막 버킷은 아직 채워지는 중일 수 있어 다시 계산)
+     */
+    render(full) {
+        const message = { full: full, size: this.size, series: {} };
+        if (this.size === 0) {
+            this._resetRendered();
+            message.full = true;
+            CHART_VALUE_SERIES.forEach(key => {
+                message.series[key] = { drop: 0, pop: 0, x: new Float64Array(0), y: new Float64Array(0) };
+            });
+            return message;
+        }
+
+        const first = this._timestamp(0);
+        const last = this._timestamp(this.size - 1);
+        const bucketSeconds = chooseBucketSeconds(last - first, this.width);
+        if (bucketSeconds !== this.bucketSeconds) {
+            message.full = true;
+        }
+
+        let dropBuckets = 0;
+        let popBuckets = 0;
+        let start = 0;
+        if (message.full) {
+            this._resetRendered();
+            this.bucketSeconds = bucketSeconds;
+        } else {
+            const firstBucket = Math.floor(first / bucketSeconds);
+            while (dropBuckets < this.bucketIds.length && this.bucketIds[dropBuckets] < firstBucket) {
+                dropBuckets++;
+            }
+            if (dropBuckets < this.bucketIds.length) {
+                popBuckets = 1;
+                start = this._bucketStart(this.bucketIds[this.bucketIds.length - 1]);
+            }
+        }
+
+        const { bucketIds, output } = this._decimate(start);
+        this.bucketIds.splice(0, dropBuckets);
+        this.bucketIds.length -= popBuckets;
+        this.bucketIds.push(...bucketIds);
+
+        let yMin = Infinity;
+        let yMax = -Infinity;
+        CHART_VALUE_SERIES.forEach(key => {
+            const rendered = this.rendered[key];
+            const added = output[key];
+            const removed = rendered.counts.splice(0, dropBuckets);
+            const drop = removed.reduce((sum, count) => sum + count, 0);
+            const pop = popBuckets ? rendered.counts.pop() : 0;
+            rendered.x.splice(0, drop);
+            rendered.y.splice(0, drop);
+            rendered.x.length -= pop;
+            rendered.y.length -= pop;
+            rendered.counts.push(...added.counts);
+            rendered.x.push(...added.x);
+            rendered.y.push(...added.y);
+            rendered.y.forEach(value => {
+                if (value < yMin) yMin = value;
+                if (value > yMax) yMax = value;
+            });
+            message.series[key] = {
+                drop: drop,
+                pop: pop,
+                x: Float64Array.from(added.x),
+                y: Float64Array.from(added.y),
+            };
+        });
+
+        message.xMin = first;
+        message.xMax = last;
+        if (yMin <= yMax) {
+            message.yMin = yMin;
+            message.yMax = yMax;
+        }
+        return message;
+    }
+}
+
+// 메시지 처리기 생성: 연속으로 들어온 변경분은 한 번의 렌더링으로 묶어서 post(message, transfer) 호출
+// 메시지: {type: 'snapshot', history} | {type: 'delta', delta} | {type: 'resize', width}
+function createChartHistoryHandler(post) {
+    const history = new ChartHistory();
+    let renderPending = false;
+    let fullRender = true;
+
+    const flush = () => {
+        renderPending = false;
+        const message = history.render(fullRender);
+        fullRender = false;
+        const transfer = [];
+        CHART_VALUE_SERIES.forEach(key => {
+            transfer.push(message.series[key].x.buffer, message.series[key].y.buffer);
+        });
+        post(message, transfer);
+    };
+
+    return (message) => {
+        if (message.type === 'snapshot') {
+            history.reset(message.history);
+            fullRender = true;
+        } else if (message.type === 'delta') {
+            history.append(message.delta);
+        } else if (message.type === 'resize') {
+            history.width = Math.max(50, Math.floor(message.width) || CHART_DEFAULT_WIDTH);
+            fullRender = true;
+        } else {
+            return;
+        }
+        if (!renderPending) {
+            renderPending = true;
+            setTimeout(flush, 0);
+        }
+    };
+}
+
+// Web Worker로 실행된 경우 메시지 연결
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    const handle = createChartHistoryHandler((message, transfer) => self.postMessage(message, transfer));
+    self.onmessage = (event) => handle(event.data);
+}
@@ -4,6 +4,29 @@ let manualEthKrwPrice = null;
 let priceChart = null;
 let socket = null;
 
+// 히스토리 상태 (delta 프로토콜: 스냅샷 이후 변경분을 누적 적용)
+// 히스토리 배열은 차트 워커(static/chart_worker.js)가 고정 크기 링 버퍼로 보관하고, 여기서는 시퀀스만 추적
+let historySeq = null;
+let historyResyncPending = false;
+let chartWorker = null;
+
+// 페이로드 코덱 (MessagePack 라이브러리가 로드되면 바이너리, 아니면 JSON 바이트로 수신)
+const PAYLOAD_CODEC = (typeof MessagePack !== 'undefined') ? 'msgpack' : 'json';
+const payloadTextDecoder = new TextDecoder();
+
+// 서버가 미리 인코딩한 price_update 페이로드 디코딩
+function decodePayload(payload) {
+    if (payload instanceof ArrayBuffer || ArrayBuffer.isView(payload)) {
+        const bytes = payload instanceof ArrayBuffer ? new Uint8Array(payload) : payload;
+        if (PAYLOAD_CODEC === 'msgpack') {
+            return MessagePack.decode(bytes);
+        }
+        return JSON.parse(payloadTextDecoder.decode(bytes));
+    }
+    // 코덱을 협상하지 않은 경우 (객체로 수신)
+    return payload;
+}
+
 // 숫자 포맷팅 함수
 function formatNumber(num) {
     if (num === null || num === undefined) return '-';
@@ -57,6 +80,124 @@ function formatExchangeName(name) {
     return name.split(' ').map(word => capitalizeWord(word)).join(' ');
 }
 
+// 차트 워커 시작 (Worker를 쓸 수 없으면 같은 처리기를 메인 스레드에서 실행)
+function setupChartWorker() {
+    const script = document.getElementById('chart-worker-script');
+    if (typeof Worker !== 'undefined' && script) {
+        try {
+            const worker = new Worker(script.src);
+            worker.onmessage = (event) => renderChartHistory(event.data);
+            worker.onerror = (error) => {
+                console.warn('차트 워커 오류, 메인 스레드에서 처리합니다:', error.message);
+                worker.terminate();
+                useMainThreadChartHistory();
+                // 워커에 쌓인 히스토리를 잃었으므로 전체 스냅샷 재요청
+                if (socket && socket.connected) {
+                    historyResyncPending = true;
+                    socket.emit('history_resync');
+                }
+            };
+            chartWorker = worker;
+            postChartWidth();
+            return;
+        } catch (error) {
+            console.warn('차트 워커를 시작할 수 없어 메인 스레드에서 처리합니다:', error);
+        }
+    }
+    useMainThreadChartHistory();
+}
+
+function useMainThreadChartHistory() {
+    const handle = createChartHistoryHandler((message) => renderChartHistory(message));
+    chartWorker = { postMessage: handle };
+    postChartWidth();
+}
+
+// 데시메이션 기준 폭 (차트 영역의 픽셀 수) 전달
+function postChartWidth(width) {
+    if (priceChart && chartWorker) {
+        chartWorker.postMessage({ type: 'resize', width: width || (priceChart.chartArea ? priceChart.chartArea.width : priceChart.width) });
+    }
+}
+
+// 히스토리 전체 스냅샷 적용
+function applyHistorySnapshot(history, seq) {
+    chartWorker.postMessage({ type: 'snapshot', history: history });
+    historySeq = seq;
+    historyResyncPending = false;
+}
+
+// 히스토리 변경분 적용 (적용 실패 시 false 반환)
+// base: 변경분의 기준 시퀀스 (웹소켓은 틱마다 하나라 seq - 1, HTTP 폴링은 여러 틱을 합친 history_base)
+function applyHistoryDelta(delta, seq, base = seq - 1, requestResync = () => socket.emit('history_resync')) {
+    if (historySeq === null || historyResyncPending) {
+        // 스냅샷 대기 중
+        return false;
+    }
+    if (seq <= historySeq) {
+        // 스냅샷에 이미 반영된 메시지
+        return true;
+    }
+    if (base !== historySeq) {
+        // 시퀀스 누락 감지 → 전체 스냅샷 재요청
+        console.warn(`히스토리 시퀀스 누락 (기대: ${historySeq}, 수신: ${base}), 재동기화 요청`);
+        historyResyncPending = true;
+        requestResync();
+        return false;
+    }
+    
+    // 링 버퍼 추가/제거는 워커에서 처리 (서버와 같은 순서: 추가 후 오래된 포인트 제거)
+    chartWorker.postMessage({ type: 'delta', delta: delta });
+    historySeq = seq;
+    return true;
+}
+
+// 워커가 보낸 차트 갱신 적용 (전체 교체 또는 앞쪽 제거 + 마지막 버킷 교체 + 추가)
+function renderChartHistory(message) {
+    if (!priceChart) return;
+    
+    ['median_prices', 'upbit_eth_krw'].forEach((key, index) => {
+        const dataset = priceChart.data.datasets[index];
+        const update = message.series[key];
+        const points = message.full ? [] : dataset.data;
+        if (!message.full) {
+            if (update.drop > 0) points.splice(0, update.drop);
+            if (update.pop > 0) points.length -= update.pop;
+        }
+        for (let i = 0; i < update.x.length; i++) {
+            points.push({ x: update.x[i], y: update.y[i] });
+        }
+        dataset.data = points;
+    });
+    
+    if (message.size > 0) {
+        priceChart.options.scales.x.min = message.xMin;
+        priceChart.options.scales.x.max = message.xMax;
+    }
+    
+    // Y축 스케일을 데이터 범위에 맞춰 조정 (차이를 더 잘 보이도록)
+    if (message.yMin !== undefined) {
+        const priceRange = message.yMax - message.yMin;
+        
+        // 최소한의 여백만 추가 (1% 또는 최소 1000원)
+        const padding = Math.max(priceRange * 0.01, 1000);
+        
+        // Y축 범위를 정확히 설정 (Chart.js의 자동 조정 방지)
+        priceChart.options.scales.y.min = message.yMin - padding;
+        priceChart.options.scales.y.max = message.yMax + padding;
+        priceChart.options.scales.y.grace = 0; // 자동 여백 완전히 제거
+    }
+    
+    // 틱마다 갱신되므로 애니메이션 없이 업데이트
+    priceChart.update('none');
+}
+
+// 히스토리 타임스탬프 (epoch 초) → 시각 문자열
+function formatChartTime(epochSeconds) {
+    const date = new Date(epochSeconds * 1000);
+    return date.toLocaleTimeString('ko-KR', { hour: '2-digit', minute: '2-digit', second: '2-digit' });
+}
+
 // 웹소켓 연결 설정
 function setupWebSocket() {
     socket = io({
@@ -64,6 +205,10 @@ function setupWebSocket() {
         reconnection: true,
         reconnectionDelay: 1000,
         reconnectionAttempts: 5,
+        auth: {
+            history: 'delta', // 연결 시 스냅샷 1회, 이후 변경분만 수신
+            codec: PAYLOAD_CODEC, // 틱마다 한 번 인코딩된 바이너리 프레임 수신
+        },
     });
     
     socket.on('connect', () => {
@@ -78,7 +223,17 @@ function setupWebSocket() {
         console.log(`🔄 웹소켓 재연결됨 (시도 ${attemptNumber})`);
     });
     
-    socket.on('price_update', (data) => {
+    socket.on('price_update', (payload) => {
+        const data = decodePayload(payload);
+        if (data.price_history) {
+            // 전체 스냅샷 (연결 직후 또는 재동기화 응답)
+            applyHistorySnapshot(data.price_history, data.history_seq);
+        } else if (data.price_history_delta) {
+            if (!applyHistoryDelta(data.price_history_delta, data.history_seq)) {
+                return;
+            }
+        }
+        
         // 즉시 대시보드 업데이트 (지연 없음)
         updateDashboard(data);
     });
@@ -91,23 +246,48 @@ function setupWebSocket() {
     });
 }
 
-// HTTP 폴링 (웹소켓 폴백용)
+// HTTP 롱 폴링 (웹소켓 폴백용)
+// ?since=<version>으로 요청하면 서버가 새 틱이 생길 때 바로 응답하고, 대기 시간 동안 없으면 304
+// history=delta: 처음(또는 재동기화 시)에만 전체 스냅샷, 이후에는 since 이후 변경분만 받아 웹소켓과 같은 시퀀스로 검사
+let httpPollingStarted = false;
+
 function setupHttpPolling() {
-    const fetchData = async () => {
+    if (httpPollingStarted) return;
+    httpPollingStarted = true;
+    
+    const poll = async () => {
+        if (socket && socket.connected) {
+            // 웹소켓이 다시 연결되면 중단 (소켓 시퀀스는 워커별이라 HTTP 버전과 섞지 않음)
+            httpPollingStarted = false;
+            return;
+        }
         try {
-            const response = await fetch('/api/data');
-            const data = await response.json();
-            updateDashboard(data);
+            // 스냅샷이 필요하면 since 없이 바로 받음
+            const url = (historySeq === null || historyResyncPending)
+                ? '/api/data?history=delta'
+                : `/api/data?history=delta&since=${historySeq}`;
+            const response = await fetch(url, { cache: 'no-store' });
+            if (response.status === 200) {
+                const data = await response.json();
+                if (data.price_history) {
+                    applyHistorySnapshot(data.price_history, data.version);
+                } else if (data.price_history_delta) {
+                    // 누락 시 다음 요청이 스냅샷을 받음
+                    applyHistoryDelta(data.price_history_delta, data.version, data.history_base, () => {});
+                }
+                updateDashboard(data);
+            } else if (response.status !== 304) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            setTimeout(poll, 0);
         } catch (error) {
             console.error('데이터 가져오기 실패:', error);
+            setTimeout(poll, 1000);
         }
     };
     
     // 즉시 한 번 실행
-    fetchData();
-    
-    // 0.5초마다 폴링 (웹소켓 업데이트 주기와 동일)
-    setInterval(fetchData, 500);
+    poll();
 }
 
 // 차트 초기화
@@ -148,7 +328,6 @@ function initPriceChart() {
     priceChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: [],
             datasets: [
                 {
                     label: '중앙값 가격',
@@ -185,6 +364,9 @@ function initPriceChart() {
             responsive: true,
             maintainAspectRatio: true,
             aspectRatio: 3,
+            parsing: false, // 워커가 {x, y} 포인트를 만들어 보내므로 파싱 생략
+            normalized: true, // x 오름차순 보장
+            onResize: (chart, size) => postChartWidth(size.width),
             animation: {
                 duration: 400,
                 easing: 'easeOutQuart',
@@ -209,7 +391,8 @@ function initPriceChart() {
                     }
                 },
                 tooltip: {
-                    mode: 'index',
+                    mode: 'nearest', // 시리즈마다 데시메이션된 x가 달라 index 모드 대신 가장 가까운 포인트
+                    axis: 'x',
                     intersect: false,
                     backgroundColor: isDark ? 'rgba(0, 0, 0, 0.9)' : 'rgba(255, 255, 255, 0.95)',
                     titleColor: isDark ? 'rgba(255, 255, 255, 0.9)' : 'rgba(0, 0, 0, 0.9)',
@@ -220,6 +403,9 @@ function initPriceChart() {
                     cornerRadius: 8,
                     displayColors: true,
                     callbacks: {
+                        title: function(items) {
+                            return items.length > 0 ? formatChartTime(items[0].parsed.x) : '';
+                        },
                         label: function(context) {
                             return context.dataset.label + ': ' + formatCurrency(context.parsed.y);
                         }
@@ -233,6 +419,7 @@ function initPriceChart() {
             },
             scales: {
                 x: {
+                    type: 'linear', // 히스토리 타임스탬프 (epoch 초)
                     grid: {
                         color: gridColor,
                         drawBorder: false,
@@ -247,6 +434,9 @@ function initPriceChart() {
                         maxRotation: 45,
                         minRotation: 45,
                         padding: 8,
+                        callback: function(value) {
+                            return formatChartTime(value);
+                        }
                     },
                     border: {
                         display: false,
@@ -304,18 +494,8 @@ function updateDashboard(data) {
 
     const { prices, oracle_result } = data;
     
-    // 차트 업데이트
-    if (data.price_history && priceChart && data.price_history.timestamps && data.price_history.timestamps.length > 0) {
-        const history = data.price_history;
-        const labels = history.timestamps.map(ts => {
-            const date = new Date(ts);
-            return date.toLocaleTimeString('ko-KR', { hour: '2-digit', minute: '2-digit', second: '2-digit' });
-        });
-        
-        priceChart.data.labels = labels;
-        priceChart.data.datasets[0].data = history.median_prices || [];
-        priceChart.data.datasets[1].data = history.upbit_eth_krw || [];
-        
+    // 차트 색상 업데이트 (히스토리 포인트는 차트 워커가 renderChartHistory로 반영)
+    if (priceChart) {
         // 계산 방법에 따라 차트 색상 변경
         const isDark = document.body.classList.contains('dark-mode');
         const calculationMethod = oracle_result.calculation_method;
@@ -373,31 +553,6 @@ function updateDashboard(data) {
         }
         
         priceChart.data.datasets[0].backgroundColor = gradient;
-        
-        // Y축 스케일을 데이터 범위에 맞춰 조정 (차이를 더 잘 보이도록)
-        const allPrices = [
-            ...(history.median_prices || []).filter(p => p !== null && p !== undefined && p > 0),
-            ...(history.upbit_eth_krw || []).filter(p => p !== null && p !== undefined && p > 0)
-        ];
-        
-        if (allPrices.length > 0) {
-            const minPrice = Math.min(...allPrices);
-            const maxPrice = Math.max(...allPrices);
-            const priceRange = maxPrice - minPrice;
-            
-            // 최소한의 여백만 추가 (1% 또는 최소 1000원)
-            const padding = Math.max(priceRange * 0.01, 1000);
-            const suggestedMin = minPrice - padding;
-            const suggestedMax = maxPrice + padding;
-            
-            // Y축 범위를 정확히 설정 (Chart.js의 자동 조정 방지)
-            priceChart.options.scales.y.min = suggestedMin;
-            priceChart.options.scales.y.max = suggestedMax;
-            priceChart.options.scales.y.grace = 0; // 자동 여백 완전히 제거
-        }
-        
-        // 부드러운 애니메이션으로 업데이트
-        priceChart.update('active');
     }
 
     // 중앙값 가격 표시
@@ -557,6 +712,7 @@ function updateDashboard(data) {
     priceDetailsEl.innerHTML = '';
     
     if (oracle_result.price_details && oracle_result.price_details.length > 0) {
+        const sourceAges = oracle_result.source_ages || {};
         oracle_result.price_details.forEach(([name, price]) => {
             const detailItem = document.createElement('div');
             detailItem.className = 'price-detail-item';
@@ -565,16 +721,38 @@ function updateDashboard(data) {
             const isUpbit = name === 'upbit';
             const itemStyle = isUpbit ? 'border-left: 3px solid #1a1a1a;' : '';
             
+            // 소스 가격의 나이 (1초 이상 갱신되지 않은 소스만 표시)
+            const venue = name.split(' ')[0];
+            const age = name === 'upbit' ? sourceAges.upbit_eth_krw : sourceAges[`${venue}_eth_usdt`];
+            const ageText = age != null && age >= 1 ? `<span class="source-age">${age.toFixed(1)}초 전</span>` : '';
+            
             detailItem.style.cssText = itemStyle;
             detailItem.innerHTML = `
-                <span class="exchange-name">${formatExchangeName(name)}</span>
+                <span class="exchange-name">${formatExchangeName(name)}${ageText}</span>
                 <span class="price-value">${formatCurrency(price)}</span>
             `;
             priceDetailsEl.appendChild(detailItem);
         });
     }
+
+    // 거래소 상태 (회로가 차단된 거래소는 중앙값에서 제외됨)
+    const sourceHealthEl = document.getElementById('source-health-list');
+    sourceHealthEl.innerHTML = '';
+    Object.entries(prices.source_health || {}).forEach(([venue, state]) => {
+        const badge = document.createElement('span');
+        badge.className = `source-health-badge ${state}`;
+        badge.textContent = `${formatExchangeName(venue)} ${SOURCE_HEALTH_LABELS[state] || state}`;
+        sourceHealthEl.appendChild(badge);
+    });
 }
 
+const SOURCE_HEALTH_LABELS = {
+    healthy: '정상',
+    degraded: '저하',
+    open: '차단',
+    half_open: '재시도 중',
+};
+
 // USDT/KRW 게이지 이벤트
 function setupUsdtKrwGauge() {
     const gauge = document.getElementById('usdt-krw-gauge');
@@ -877,6 +1055,7 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // 차트 초기화
     initPriceChart();
+    setupChartWorker();
     
     // 웹소켓 연결
     setupWebSocket();
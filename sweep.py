@@ -0,0 +1,350 @@
+"""
+오라클 파라미터 스윕
+틱 로그의 과거 데이터로 twap_window_seconds × volatility_threshold 조합마다 오라클 출력을 다시 계산해
+기준값 대비 편차, 역산 모드 발동 비율, 출력 시계열을 비교합니다.
+
+조합마다 오라클을 틱 단위로 재생하지 않고 다음처럼 나눠 계산합니다.
+    - 정상 모드 / 역산 모드 중앙값 시계열: 설정과 무관하므로 한 번만 계산
+    - TWAP 시계열: 윈도우마다 한 번, IncrementalTWAP 식을 누적합 + searchsorted로 계산
+    - 변동성 판단과 출력 시계열: 임계값마다 배열 비교 한 번
+윈도우 단위 작업은 프로세스 풀에 나눠 실행합니다.
+
+    python sweep.py data/ticks --windows 60:900:60 --thresholds 0.005:0.1:0.005 --output sweep.jsonl
+    python sweep.py data/ticks --since 1700000000 --reference upbit --series sweep_series.npz --workers 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from asset_matrix import compute_krw_prices
+from replay import EVALUATE_MODES, ReplayState
+from tick_log import KIND_ORACLE, KIND_SOURCE, TickLog
+
+REFERENCES = ('recorded', 'upbit', 'normal')
+
+# 워커 프로세스가 공유하는 데이터셋 (initializer로 프로세스당 한 번만 전달)
+_worker_context: Dict = {}
+
+
+def parse_grid(spec: str) -> List[float]:
+    """'a,b,c' 또는 'start:stop:step' (stop 포함) 형식의 그리드"""
+    if ':' in spec:
+        start, stop, step = (float(part) for part in spec.split(':'))
+        if step <= 0:
+            raise ValueError(f"그리드 간격은 0보다 커야 합니다: {spec}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + step * i, 10) for i in range(count)]
+    return [float(part) for part in spec.split(',') if part.strip()]
+
+
+def load_dataset(
+    records: Iterable[Tuple],
+    evaluate: str = 'recorded',
+    max_source_age: Optional[float] = None
+) -> Dict:
+    """
+    틱 로그 레코드를 평가 시점별 배열로 변환 (replay와 같은 평가 시점, 레코드는 한 번만 순회)
+
+    Returns:
+        {
+            'timestamps': (시점,) 오라클 시계 시각,
+            'upbit_eth_krw': (시점,),
+            'upbit_usdt_krw': (시점,),
+            'overseas_eth_usdt': (시점, 거래소),
+            'venues': [거래소, ...],
+            'recorded_median': (시점,) 기록된 오라클 중앙값 (evaluate='tick'이면 모두 NaN),
+        }
+        값이 없으면 NaN
+    """
+    if evaluate not in EVALUATE_MODES:
+        raise ValueError(f"evaluate는 {EVALUATE_MODES} 중 하나여야 합니다")
+
+    state = ReplayState()
+    venue_index: Dict[str, int] = {}
+    now = float('-inf')
+    timestamps: List[float] = []
+    domestic: List[Tuple[float, float, float]] = []  # (ETH/KRW, USDT/KRW, 기록된 중앙값)
+    overseas_rows: List[List[float]] = []
+
+    for timestamp, kind, name, v0, v1, v2, v3 in records:
+        # ManualClock과 같이 시계는 되돌아가지 않음
+        now = max(now, timestamp)
+        if kind == KIND_SOURCE:
+            if v0 != v0 or not state.apply(timestamp, name, v0):
+                continue
+            if evaluate != 'tick':
+                continue
+            recorded_median = np.nan
+        elif kind == KIND_ORACLE:
+            if evaluate != 'recorded':
+                continue
+            recorded_median = v0
+        else:
+            continue
+
+        prices = state.prices(timestamp, max_source_age)
+        row = [np.nan] * len(venue_index)
+        for venue, price in prices['overseas_eth_usdt'].items():
+            index = venue_index.get(venue)
+            if index is None:
+                index = venue_index[venue] = len(venue_index)
+                row.append(np.nan)
+            if price is not None:
+                row[index] = price
+        timestamps.append(now)
+        domestic.append((
+            np.nan if prices['upbit_eth_krw'] is None else prices['upbit_eth_krw'],
+            np.nan if prices['upbit_usdt_krw'] is None else prices['upbit_usdt_krw'],
+            recorded_median,
+        ))
+        overseas_rows.append(row)
+
+    overseas = np.full((len(overseas_rows), len(venue_index)), np.nan)
+    for i, row in enumerate(overseas_rows):
+        overseas[i, :len(row)] = row
+    domestic_array = np.array(domestic, dtype=np.float64).reshape(-1, 3)
+
+    return {
+        'timestamps': np.array(timestamps, dtype=np.float64),
+        'upbit_eth_krw': domestic_array[:, 0],
+        'upbit_usdt_krw': domestic_array[:, 1],
+        'overseas_eth_usdt': overseas,
+        'venues': list(venue_index),
+        'recorded_median': domestic_array[:, 2],
+    }
+
+
+def median_series(dataset: Dict) -> Dict[str, np.ndarray]:
+    """정상 모드 / 역산 모드 중앙값 시계열 (설정과 무관하므로 한 번만 계산)"""
+    eth_krw = dataset['upbit_eth_krw']
+    overseas = dataset['overseas_eth_usdt']
+    return {
+        'normal': compute_krw_prices(eth_krw, overseas, dataset['upbit_usdt_krw'], inverse=False)['median_krw'],
+        'inverse': compute_krw_prices(eth_krw, overseas, None, inverse=True)['median_krw'],
+    }
+
+
+def volatility_ratio(timestamps: np.ndarray, usdt_krw: np.ndarray, window: float) -> np.ndarray:
+    """
+    평가 시점마다 |USDT/KRW - TWAP| / TWAP (Oracle.check_usdt_krw_volatility와 같은 값)
+
+    오라클은 USDT/KRW가 있는 시점에만 히스토리에 추가하고 그 시각 기준 window보다 오래된 값을 제거하므로,
+    시점 n의 윈도우 시작 l은 searchsorted로, 구간 사다리꼴 합은 누적합의 차로 구합니다.
+    (IncrementalTWAP.value와 같은 식, now = 마지막 추가 시각이라 꼬리 구간은 0)
+
+    Returns:
+        (시점,) 변동성 비율 (USDT/KRW가 없거나 TWAP이 정의되지 않는 시점은 NaN)
+    """
+    ratio = np.full(timestamps.shape, np.nan)
+    present = np.flatnonzero(~np.isnan(usdt_krw))
+    if present.size == 0:
+        return ratio
+
+    t_abs = timestamps[present]
+    price = usdt_krw[present]
+    # 누적합 오차를 줄이기 위해 시각과 가격을 첫 값 기준으로 옮겨서 계산 (TWAP은 평행 이동에 불변)
+    t = t_abs - t_abs[0]
+    p = price - price[0]
+    gaps = np.diff(t)
+    trapezoid = np.concatenate(([0.0], np.cumsum((p[:-1] + p[1:]) / 2 * gaps)))
+
+    n = np.arange(present.size)
+    l = np.searchsorted(t_abs, t_abs - window, side='left')
+    multi = l < n
+    first_gap = np.where(multi, t[np.minimum(l + 1, n)] - t[l], 0.0)
+    last_gap = np.where(multi, t - t[np.maximum(n - 1, 0)], 0.0)
+
+    weighted_sum = trapezoid - trapezoid[l] + p[l] * first_gap / 2 - p * last_gap / 2
+    total_weight = (t - t[l]) + first_gap / 2 - last_gap / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        twap = np.where(multi, weighted_sum / np.where(total_weight > 0, total_weight, np.nan), p) + price[0]
+        ratio[present] = np.abs(price - twap) / twap
+    return ratio
+
+
+def _init_worker(context: Dict):
+    _worker_context.clear()
+    _worker_context.update(context)
+
+
+def _evaluate_window(window: float, thresholds: Sequence[float]) -> List[Dict]:
+    """윈도우 하나의 TWAP을 한 번 계산하고 임계값마다 출력 시계열과 통계 계산"""
+    context = _worker_context
+    scored = context['scored']
+    ratio = volatility_ratio(context['timestamps'], context['upbit_usdt_krw'], window)[scored]
+    normal = context['normal'][scored]
+    inverse_median = context['inverse'][scored]
+    reference = context['reference'][scored]
+
+    results = []
+    for threshold in thresholds:
+        # NaN 비율(USDT/KRW 없음, TWAP 없음)은 비교 결과가 False라 정상 모드
+        inverse = ratio > threshold
+        median = np.where(inverse, inverse_median, normal)
+        diff = median - reference
+        valid = ~np.isnan(diff)
+        abs_diff = np.abs(diff[valid])
+        compared = int(valid.sum())
+        result = {
+            'twap_window_seconds': window,
+            'volatility_threshold': threshold,
+            'evaluations': int(inverse.size),
+            'inverse_ratio': round(float(inverse.mean()), 6) if inverse.size else None,
+            'inverse_switches': int(np.count_nonzero(inverse[1:] & ~inverse[:-1])),
+            'no_data': int(np.isnan(median).sum()),
+            'compared': compared,
+            'mean_abs_diff': float(abs_diff.mean()) if compared else None,
+            'max_abs_diff': float(abs_diff.max()) if compared else None,
+            'rms_diff': float(np.sqrt(np.mean(abs_diff ** 2))) if compared else None,
+            'mean_abs_diff_bps': float((abs_diff / np.abs(reference[valid])).mean() * 1e4) if compared else None,
+        }
+        if context['keep_series']:
+            result['inverse_mask'] = np.packbits(inverse)
+        results.append(result)
+    return results
+
+
+def run_sweep(
+    dataset: Dict,
+    windows: Sequence[float],
+    thresholds: Sequence[float],
+    reference: str = 'recorded',
+    emit_since: Optional[float] = None,
+    workers: int = 1,
+    keep_series: bool = False
+) -> Dict:
+    """
+    모든 윈도우 × 임계값 조합 평가
+
+    Args:
+        dataset: load_dataset() 결과
+        reference: 편차 기준 ('recorded' 기록된 오라클 중앙값, 'upbit' 업비트 ETH/KRW, 'normal' 정상 모드 중앙값)
+        emit_since: 이 시각 이전 시점은 TWAP 윈도우만 채우고 통계에서 제외
+        workers: 프로세스 수 (1이면 현재 프로세스에서 실행)
+        keep_series: 조합마다 역산 모드 마스크(packbits)를 결과에 포함
+
+    Returns:
+        {'results': [조합별 통계, ...], 'timestamps', 'normal', 'inverse', 'reference'}  # 시계열은 통계 대상 시점만
+    """
+    if reference not in REFERENCES:
+        raise ValueError(f"reference는 {REFERENCES} 중 하나여야 합니다")
+
+    medians = median_series(dataset)
+    reference_series = {
+        'recorded': dataset['recorded_median'],
+        'upbit': dataset['upbit_eth_krw'],
+        'normal': medians['normal'],
+    }[reference]
+    timestamps = dataset['timestamps']
+    scored = np.ones(timestamps.shape, dtype=bool) if emit_since is None else timestamps >= emit_since
+
+    context = {
+        'timestamps': timestamps,
+        'upbit_usdt_krw': dataset['upbit_usdt_krw'],
+        'normal': medians['normal'],
+        'inverse': medians['inverse'],
+        'reference': reference_series,
+        'scored': scored,
+        'keep_series': keep_series,
+    }
+
+    thresholds = list(thresholds)
+    if workers <= 1:
+        _init_worker(context)
+        per_window = [_evaluate_window(window, thresholds) for window in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as executor:
+            per_window = list(executor.map(_evaluate_window, windows, [thresholds] * len(windows)))
+
+    return {
+        'results': [result for results in per_window for result in results],
+        'timestamps': timestamps[scored],
+        'normal': medians['normal'][scored],
+        'inverse': medians['inverse'][scored],
+        'reference': reference_series[scored],
+    }
+
+
+def save_series(path: str, sweep: Dict):
+    """
+    출력 시계열 저장 (npz)
+    공통 시계열은 한 번만 저장하고 조합별로는 역산 모드 마스크만 비트로 저장합니다.
+    조합 i의 출력 = np.where(np.unpackbits(masks[i], count=len(timestamps)), inverse, normal)
+    """
+    results = sweep['results']
+    np.savez_compressed(
+        path,
+        timestamps=sweep['timestamps'],
+        normal=sweep['normal'],
+        inverse=sweep['inverse'],
+        reference=sweep['reference'],
+        twap_window_seconds=np.array([r['twap_window_seconds'] for r in results]),
+        volatility_threshold=np.array([r['volatility_threshold'] for r in results]),
+        masks=np.array([r['inverse_mask'] for r in results], dtype=np.uint8).reshape(len(results), -1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='틱 로그 디렉터리')
+    parser.add_argument('--since', type=float, help='시작 시각 (epoch 초)')
+    parser.add_argument('--until', type=float, help='종료 시각 (epoch 초)')
+    parser.add_argument('--windows', default='60:900:60', help='TWAP 윈도우 그리드 (초, "a,b,c" 또는 "start:stop:step")')
+    parser.add_argument('--thresholds', default='0.005:0.1:0.005', help='변동성 임계값 그리드')
+    parser.add_argument('--evaluate', choices=EVALUATE_MODES, default='recorded')
+    parser.add_argument('--reference', choices=REFERENCES, help='편차 기준 (기본값: recorded, --evaluate tick이면 upbit)')
+    parser.add_argument('--max-source-age', type=float, help='이보다 오래된 소스 가격 제외 (초)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='프로세스 수')
+    parser.add_argument('--output', help='조합별 통계 저장 경로 (JSON Lines)')
+    parser.add_argument('--series', help='출력 시계열 저장 경로 (npz)')
+    parser.add_argument('--top', type=int, default=10, help='편차가 작은 순으로 출력할 조합 수')
+    args = parser.parse_args()
+
+    windows = parse_grid(args.windows)
+    thresholds = parse_grid(args.thresholds)
+    reference = args.reference or ('upbit' if args.evaluate == 'tick' else 'recorded')
+    if reference == 'recorded' and args.evaluate != 'recorded':
+        parser.error('--reference recorded에는 --evaluate recorded가 필요합니다')
+
+    started = time.perf_counter()
+    tick_log = TickLog(args.directory)
+    # 시작 시각 이전 가장 긴 TWAP 윈도우만큼 먼저 읽어 TWAP을 채움
+    read_since = args.since - max(windows) if args.since is not None else None
+    try:
+        dataset = load_dataset(tick_log.read(read_since, args.until), args.evaluate, args.max_source_age)
+    finally:
+        tick_log.close()
+    loaded = time.perf_counter()
+
+    sweep = run_sweep(dataset, windows, thresholds, reference, args.since, args.workers, keep_series=bool(args.series))
+    finished = time.perf_counter()
+
+    results = sweep['results']
+    if args.series:
+        save_series(args.series, sweep)
+    for result in results:
+        result.pop('inverse_mask', None)
+    if args.output:
+        with open(args.output, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+    ranked = sorted((r for r in results if r['mean_abs_diff'] is not None), key=lambda r: r['mean_abs_diff'])
+    print(json.dumps({
+        'evaluations': int(sweep['timestamps'].size),
+        'venues': dataset['venues'],
+        'configs': len(results),
+        'reference': reference,
+        'load_s': round(loaded - started, 3),
+        'sweep_s': round(finished - loaded, 3),
+        'best': ranked[:args.top],
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+"""
+테스트 공통 설정
+저장소 최상위 모듈(twap, metrics 등)을 바로 import할 수 있도록 경로를 추가합니다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
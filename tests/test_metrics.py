@@ -0,0 +1,114 @@
+"""지연 히스토그램 버킷과 /metrics Prometheus 텍스트 형식 테스트"""
+import math
+import re
+
+import numpy as np
+import pytest
+
+from metrics import SUB_BUCKETS, LatencyHistogram, MetricsRegistry, _bucket_index, _bucket_value_ns
+
+# Prometheus 텍스트 형식 0.0.4의 샘플 줄: 이름{레이블} 값
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(,|$)')
+
+
+def parse_exposition(text: str) -> dict:
+    """
+    텍스트 형식을 파싱해 형식 오류가 있으면 AssertionError
+
+    Returns:
+        {메트릭 이름: {'type': str, 'help': str, 'samples': [(샘플 이름, 레이블 dict, 값)]}}
+    """
+    assert text.endswith('\n')
+    families = {}
+    current = None  # 마지막 HELP 줄의 메트릭 이름
+    for line in text.rstrip('\n').split('\n'):
+        if line.startswith('# HELP '):
+            name, _, help_text = line[7:].partition(' ')
+            families.setdefault(name, {'type': None, 'help': help_text, 'samples': []})
+            current = name
+            continue
+        if line.startswith('# TYPE '):
+            name, _, metric_type = line[7:].partition(' ')
+            assert name in families and metric_type in ('counter', 'gauge', 'summary', 'histogram', 'untyped')
+            families[name]['type'] = metric_type
+            continue
+
+        match = SAMPLE.match(line)
+        assert match, f'잘못된 샘플 줄: {line!r}'
+        sample_name, _, label_text, value = match.groups()
+        labels = {}
+        if label_text:
+            consumed = 0
+            for label in LABEL.finditer(label_text):
+                assert label.start() == consumed, f'잘못된 레이블: {line!r}'
+                labels[label.group(1)] = label.group(2)
+                consumed = label.end()
+            assert consumed == len(label_text), f'잘못된 레이블: {line!r}'
+        assert current is not None and sample_name.startswith(current), f'HELP 없는 샘플: {line!r}'
+        families[current]['samples'].append((sample_name, labels, float(value)))  # 'NaN', '+Inf'도 float로 파싱
+    return families
+
+
+def test_bucket_index_is_exact_below_linear_range_and_monotonic():
+    small = np.arange(2 * SUB_BUCKETS, dtype=np.int64)
+    assert (_bucket_index(small) == small).all()
+
+    values = np.unique(np.logspace(0, 12, 5000).astype(np.int64))
+    indices = _bucket_index(values)
+    assert (np.diff(indices) >= 0).all()
+
+
+def test_bucket_value_within_relative_error():
+    values = np.unique(np.logspace(2, 12, 5000).astype(np.int64))
+    for value, index in zip(values.tolist(), _bucket_index(values).tolist()):
+        assert abs(_bucket_value_ns(index) - value) / value <= 1 / SUB_BUCKETS
+
+
+def test_histogram_quantiles_and_clipping():
+    histogram = LatencyHistogram(max_seconds=1.0, flush_size=100)
+    for i in range(1, 1001):
+        histogram.record(i / 1000)  # 1ms ~ 1s
+    histogram.record(-1.0)  # 0으로 기록
+    histogram.record(5.0)  # max_seconds로 기록
+
+    stats = histogram.snapshot()
+    assert stats['count'] == 1002
+    assert stats['max'] == 1.0
+    assert stats['quantiles'][0.5] == pytest.approx(0.5, rel=1 / SUB_BUCKETS)
+    assert stats['quantiles'][0.99] == pytest.approx(0.99, rel=1 / SUB_BUCKETS)
+
+    empty = LatencyHistogram().snapshot()
+    assert empty['count'] == 0 and all(value is None for value in empty['quantiles'].values())
+
+
+def test_render_parses_as_prometheus_text():
+    registry = MetricsRegistry()
+    collect = registry.histogram('oracle_stage_seconds', '구간별 처리 시간', stage='collect')
+    for _ in range(10):
+        collect.record(0.002)
+    registry.histogram('oracle_stage_seconds', '구간별 처리 시간', stage='emit')  # 기록 없음
+    registry.add_collector('oracle_connected_clients', 'gauge', '접속 클라이언트 수',
+                           lambda: [({'codec': 'json', 'history': 'de"lta\\'}, 3)])
+    registry.add_collector('oracle_ticks_total', 'counter', '틱 수', lambda: 42)
+    registry.add_collector('oracle_source_age_seconds', 'gauge', '소스 나이', lambda: None)
+    registry.add_collector('oracle_broken', 'gauge', '수집 실패', lambda: 1 / 0)  # 건너뜀
+
+    families = parse_exposition(registry.render())
+    assert set(families) == {'oracle_stage_seconds', 'oracle_connected_clients',
+                             'oracle_ticks_total', 'oracle_source_age_seconds'}
+
+    summary = families['oracle_stage_seconds']
+    assert summary['type'] == 'summary'
+    samples = {(name, tuple(sorted(labels.items()))): value for name, labels, value in summary['samples']}
+    assert samples[('oracle_stage_seconds_count', (('stage', 'collect'),))] == 10
+    assert samples[('oracle_stage_seconds_sum', (('stage', 'collect'),))] == pytest.approx(0.02)
+    assert samples[('oracle_stage_seconds', (('quantile', '0.99'), ('stage', 'collect')))] == pytest.approx(
+        0.002, rel=1 / SUB_BUCKETS)
+    assert math.isnan(samples[('oracle_stage_seconds', (('quantile', '0.5'), ('stage', 'emit')))])
+
+    (_, labels, value), = families['oracle_connected_clients']['samples']
+    assert labels == {'codec': 'json', 'history': 'de\\"lta\\\\'} and value == 3
+    assert families['oracle_ticks_total']['type'] == 'counter'
+    assert families['oracle_ticks_total']['samples'] == [('oracle_ticks_total', {}, 42.0)]
+    assert math.isnan(families['oracle_source_age_seconds']['samples'][0][2])
@@ -0,0 +1,61 @@
+"""IncrementalTWAP과 기준 구현(calculate_twap_full_scan)의 동등성 테스트"""
+import random
+
+import pytest
+
+from twap import IncrementalTWAP, calculate_twap_full_scan
+
+
+def _run(twap: IncrementalTWAP, steps: int, window: float, seed: int) -> float:
+    """가격 추가 → 윈도우 밖 제거를 반복하며 기준 구현과의 최대 상대 오차 반환"""
+    rng = random.Random(seed)
+    timestamp = 1_700_000_000.0
+    max_error = 0.0
+    for _ in range(steps):
+        timestamp += rng.uniform(0.05, 1.5)
+        twap.append(timestamp, 1300 + rng.gauss(0, 5))
+        twap.evict_before(timestamp - window)
+
+        now = timestamp + rng.uniform(0, 0.01)
+        expected = calculate_twap_full_scan(twap.history, now)
+        max_error = max(max_error, abs(expected - twap.value(now)) / expected)
+    return max_error
+
+
+def test_matches_full_scan_with_eviction():
+    twap = IncrementalTWAP()
+    assert _run(twap, steps=5000, window=30, seed=7) < 1e-9
+    assert 0 < len(twap) < 5000  # 윈도우 밖 데이터가 실제로 제거됨
+
+
+def test_matches_full_scan_across_resync(monkeypatch):
+    # 재계산 주기를 줄여 여러 번 _resync 경계를 지나도록 함
+    monkeypatch.setattr(IncrementalTWAP, 'RESYNC_EVICTIONS', 50)
+    resyncs = []
+    original = IncrementalTWAP._resync
+
+    def counting_resync(self):
+        resyncs.append(len(self.history))
+        original(self)
+
+    monkeypatch.setattr(IncrementalTWAP, '_resync', counting_resync)
+    twap = IncrementalTWAP()
+    assert _run(twap, steps=3000, window=20, seed=11) < 1e-9
+    assert len(resyncs) > 10
+
+
+def test_single_point_and_eviction_to_empty():
+    twap = IncrementalTWAP()
+    assert twap.value(100.0) is None
+
+    twap.append(100.0, 1300.0)
+    assert twap.value(105.0) == calculate_twap_full_scan(twap.history, 105.0) == 1300.0
+
+    twap.append(101.0, 1310.0)
+    twap.evict_before(200.0)
+    assert len(twap) == 0 and twap.value(200.0) is None
+
+    # 모두 제거된 뒤 다시 추가해도 이전 합계가 남지 않음
+    twap.append(300.0, 1290.0)
+    twap.append(302.0, 1292.0)
+    assert twap.value(303.0) == pytest.approx(calculate_twap_full_scan(twap.history, 303.0))
@@ -0,0 +1,382 @@
+"""
+영속 틱 로그
+거래소 원본 가격과 오라클 출력을 고정 길이 바이너리 레코드로 기록하는 추가 전용 로그입니다.
+세그먼트 파일은 시간 단위로 나뉘고 mmap으로 쓰고 읽으며,
+재시작 시 TWAP 윈도우와 차트 히스토리를 빠르게 복원하는 데 사용합니다.
+디렉터리 잠금으로 한 프로세스만 기록하므로 같은 데이터 디렉터리를 쓰는 서버를 실수로 두 개 띄워도
+세그먼트가 겹치지 않습니다 (나중에 연 쪽은 읽기 전용, app.py는 이 때문에 Werkzeug 리로더를 끔).
+"""
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# 세그먼트 헤더: 매직, 버전, 레코드 크기 (레코드 크기에 맞춰 64바이트)
+HEADER = struct.Struct('<8sII48x')
+MAGIC = b'ORTICK01'
+VERSION = 1
+
+# 레코드: 수신 시각, 종류, 이름(23바이트), 값 4개 = 64바이트
+RECORD = struct.Struct('<dB23sdddd')
+
+KIND_SOURCE = 1  # 거래소 원본 가격: v0=가격, v1=거래소 타임스탬프
+KIND_ORACLE = 2  # 오라클 출력: v0=중앙값, v1=TWAP용 USDT/KRW, v2=업비트 ETH/KRW, v3=업비트 USDT/KRW
+
+NAN = float('nan')
+
+FSYNC_POLICIES = ('always', 'interval', 'none')
+
+LOCK_FILENAME = '.writer.lock'
+
+
+def _to_float(value: Optional[float]) -> float:
+    return NAN if value is None else float(value)
+
+
+def _from_float(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+class TickLog:
+    """mmap 기반 추가 전용 틱 로그 클래스"""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_seconds: int = 3600,
+        segment_records: int = 262144,
+        retention_seconds: int = 24 * 3600,
+        fsync: str = 'interval',
+        fsync_interval: float = 1.0
+    ):
+        """
+        Args:
+            directory: 세그먼트 파일 저장 디렉터리
+            segment_seconds: 세그먼트 하나가 담당하는 시간 (초)
+            segment_records: 세그먼트당 최대 레코드 수 (파일 크기 = 64바이트 × 레코드 수, 희소 파일)
+            retention_seconds: 보관 기간 (초), 이보다 오래된 세그먼트는 삭제
+            fsync: 'always' (레코드마다), 'interval' (fsync_interval마다), 'none' (OS에 맡김)
+            fsync_interval: fsync='interval'일 때 디스크 동기화 주기 (초)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync는 {FSYNC_POLICIES} 중 하나여야 합니다")
+
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.segment_records = segment_records
+        self.retention_seconds = retention_seconds
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        self._segment_path = None
+        self._segment_bucket = None
+        self._count = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._lock_fd = None  # 디렉터리 쓰기 잠금 (첫 기록 시 획득)
+        self._read_only = False  # 다른 프로세스가 기록 중이면 기록하지 않음
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+
+    def append_source(self, name: str, price: float, exchange_timestamp: Optional[float] = None,
+                      timestamp: Optional[float] = None):
+        """거래소 원본 가격 기록"""
+        if timestamp is None:
+            timestamp = time.time()
+        self._append(timestamp, KIND_SOURCE, name, price, _to_float(exchange_timestamp), NAN, NAN)
+
+    def append_oracle(self, oracle_result: Dict, prices: Dict, timestamp: Optional[float] = None):
+        """오라클 출력 기록 (TWAP 복원에 필요한 USDT/KRW 원본 가격 포함)"""
+        if timestamp is None:
+            timestamp = time.time()
+        name = f"oracle:{oracle_result.get('calculation_method', 'no_data')}"
+        self._append(
+            timestamp, KIND_ORACLE, name,
+            _to_float(oracle_result.get('median_price')),
+            _to_float(oracle_result.get('usdt_krw_original')),
+            _to_float(prices.get('upbit_eth_krw')),
+            _to_float(prices.get('upbit_usdt_krw')),
+        )
+
+    def _append(self, timestamp: float, kind: int, name: str, v0: float, v1: float, v2: float, v3: float):
+        record = RECORD.pack(timestamp, kind, name.encode(), v0, v1, v2, v3)  # 이름은 23바이트로 잘림
+        with self._lock:
+            if self._closed or self._read_only:
+                return
+            if self._lock_fd is None and not self._acquire_writer_lock():
+                return
+            bucket = math.floor(timestamp / self.segment_seconds)
+            if self._mmap is None or bucket != self._segment_bucket or self._count >= self.segment_records:
+                self._roll(timestamp, bucket)
+
+            offset = HEADER.size + self._count * RECORD.size
+            self._mmap[offset:offset + RECORD.size] = record
+            self._count += 1
+
+            if self.fsync == 'always':
+                self._mmap.flush()
+            elif self.fsync == 'interval':
+                now = time.monotonic()
+                if now - self._last_flush >= self.fsync_interval:
+                    self._mmap.flush()
+                    self._last_flush = now
+
+    def _acquire_writer_lock(self) -> bool:
+        """디렉터리 쓰기 잠금 획득 (락 안에서 호출, 실패하면 이 인스턴스는 기록하지 않음)"""
+        fd = os.open(os.path.join(self.directory, LOCK_FILENAME), os.O_RDWR | os.O_CREAT, 0o644)
+        if FCNTL_AVAILABLE:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                self._read_only = True
+                print(f"틱 로그 디렉터리를 다른 프로세스가 기록 중이므로 기록하지 않습니다: {self.directory}")
+                return False
+        self._lock_fd = fd
+        return True
+
+    def _roll(self, timestamp: float, bucket: int):
+        """새 세그먼트 파일 생성 (락 안에서 호출)"""
+        self._close_segment()
+
+        # 파일 이름은 첫 레코드 시각(ms)으로 정렬 가능하게 생성
+        path = os.path.join(self.directory, f'ticks-{int(timestamp * 1000):013d}.bin')
+        size = HEADER.size + self.segment_records * RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(fd, size)  # 희소 파일로 미리 할당 (미사용 영역은 0)
+        self._file = fd
+        self._mmap = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        self._mmap[:HEADER.size] = HEADER.pack(MAGIC, VERSION, RECORD.size)
+        self._segment_path = path
+        self._segment_bucket = bucket
+        self._count = 0
+
+        self._enforce_retention(timestamp)
+
+    def _close_segment(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            os.close(self._file)
+            self._file = None
+
+    def _enforce_retention(self, now: float):
+        """보관 기간이 지난 세그먼트 삭제 (다음 세그먼트 시작이 기준 이전이면 전체가 만료된 것)"""
+        cutoff = now - self.retention_seconds
+        segments = self._list_segments()
+        for (path, _), (_, next_start) in zip(segments, segments[1:]):
+            if next_start < cutoff and path != self._segment_path:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"틱 로그 세그먼트 삭제 실패: {path}: {e}")
+
+    def flush(self):
+        """디스크 동기화"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self):
+        """현재 세그먼트를 동기화하고 닫음"""
+        with self._lock:
+            self._close_segment()
+            self._closed = True
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)  # 잠금 해제
+                self._lock_fd = None
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+
+    def _list_segments(self) -> List[Tuple[str, float]]:
+        """[(경로, 첫 레코드 시각), ...] 시간순"""
+        segments = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith('ticks-') and filename.endswith('.bin'):
+                try:
+                    start = int(filename[6:-4]) / 1000.0
+                except ValueError:
+                    continue
+                segments.append((os.path.join(self.directory, filename), start))
+        segments.sort(key=lambda item: item[1])
+        return segments
+
+    @staticmethod
+    def _record_count(view: mmap.mmap, capacity: int) -> int:
+        """기록된 레코드 수 (미사용 영역의 타임스탬프는 0이므로 이진 탐색)"""
+        low, high = 0, capacity
+        while low < high:
+            mid = (low + high) // 2
+            offset = HEADER.size + mid * RECORD.size
+            if struct.unpack_from('<d', view, offset)[0] > 0:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def read(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Tuple]:
+        """
+        기록된 레코드를 시간순으로 반환
+
+        Yields:
+            (timestamp, kind, name, v0, v1, v2, v3)  # 값이 없으면 NaN
+        """
+        segments = self._list_segments()
+        for index, (path, start) in enumerate(segments):
+            next_start = segments[index + 1][1] if index + 1 < len(segments) else None
+            if since is not None and next_start is not None and next_start < since:
+                continue
+            if until is not None and start > until:
+                break
+            yield from self._read_segment(path, since, until)
+
+    def _read_segment(self, path: str, since: Optional[float], until: Optional[float]) -> Iterator[Tuple]:
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < HEADER.size:
+                    return
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+                    magic, version, record_size = HEADER.unpack_from(view, 0)
+                    if magic != MAGIC or record_size != RECORD.size:
+                        print(f"틱 로그 세그먼트 형식 오류: {path}")
+                        return
+                    capacity = (size - HEADER.size) // RECORD.size
+                    count = self._record_count(view, capacity)
+                    end = HEADER.size + count * RECORD.size
+                    for timestamp, kind, name, v0, v1, v2, v3 in RECORD.iter_unpack(view[HEADER.size:end]):
+                        if since is not None and timestamp < since:
+                            continue
+                        if until is not None and timestamp > until:
+                            return
+                        yield timestamp, kind, name.rstrip(b'\x00').decode(), v0, v1, v2, v3
+        except OSError as e:
+            print(f"틱 로그 세그먼트 읽기 실패: {path}: {e}")
+
+
+def restore_from_tick_log(tick_log: TickLog, oracle, price_history, rollup_history,
+                          history_seconds: float, now: Optional[float] = None) -> Dict:
+    """
+    틱 로그로 오라클 TWAP 윈도우와 차트 히스토리 복원
+    시간이 되돌아가는 레코드(겹친 세그먼트 등)는 링 버퍼와 TWAP의 시간순을 지키기 위해 건너뜁니다.
+
+    Returns:
+        {'oracle_records': int, 'skipped_records': int, 'twap_points': int, 'history_points': int,
+         'duration_ms': float}
+    """
+    started = time.perf_counter()
+    if now is None:
+        now = time.time()
+
+    twap_since = now - oracle.twap_window_seconds
+    history_since = now - history_seconds
+    since = min(twap_since, history_since)
+
+    oracle_records = skipped_records = twap_points = history_points = 0
+    last_timestamp = -math.inf
+    for timestamp, kind, name, median, usdt_krw, upbit_eth, upbit_usdt in tick_log.read(since=since, until=now):
+        if kind != KIND_ORACLE:
+            continue
+        if timestamp <= last_timestamp:
+            skipped_records += 1
+            continue
+        last_timestamp = timestamp
+        oracle_records += 1
+
+        if timestamp >= twap_since and usdt_krw == usdt_krw:
+            oracle.add_usdt_krw_price(usdt_krw, timestamp)
+            twap_points += 1
+
+        if timestamp >= history_since and median == median:
+            # 차트 히스토리는 누락 값을 0으로, 롤업은 제외하여 기록 (app의 기록 방식과 동일)
+            price_history.append((
+                timestamp, median,
+                upbit_eth if upbit_eth == upbit_eth else 0,
+                upbit_usdt if upbit_usdt == upbit_usdt else 0,
+            ))
+            rollup_history.add(timestamp, {
+                'median_prices': median,
+                'upbit_eth_krw': _from_float(upbit_eth),
+                'upbit_usdt_krw': _from_float(upbit_usdt),
+            })
+            history_points += 1
+
+    return {
+        'oracle_records': oracle_records,
+        'skipped_records': skipped_records,
+        'twap_points': twap_points,
+        'history_points': history_points,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+if __name__ == '__main__':
+    # 테스트
+    import tempfile
+    from oracle import Oracle
+    from ring_buffer import ColumnarRingBuffer
+    from rollup import RollupHistory
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = TickLog(directory, segment_seconds=600, fsync='none')
+        now = time.time()
+        for i in range(7200):
+            timestamp = now - 3600 + i * 0.5
+            log.append_source('binance_eth_usdt', 3000 + i % 7, timestamp - 0.05, timestamp=timestamp)
+            log.append_oracle(
+                {'median_price': 4_200_000 + i % 11, 'usdt_krw_original': 1400 + i % 3, 'calculation_method': 'normal'},
+                {'upbit_eth_krw': 4_200_000.0, 'upbit_usdt_krw': None},
+                timestamp=timestamp,
+            )
+        log.close()
+
+        oracle = Oracle()
+        history = ColumnarRingBuffer(('timestamps', 'median_prices', 'upbit_eth_krw', 'upbit_usdt_krw'), 10000)
+        rollups = RollupHistory()
+        stats = restore_from_tick_log(TickLog(directory), oracle, history, rollups, history_seconds=1800, now=now)
+        print(stats, f"세그먼트 {len(os.listdir(directory))}개, TWAP {oracle.calculate_twap():.2f}")
+        assert stats['twap_points'] == 600 and stats['history_points'] == 3600
+
+        # 다른 인스턴스가 기록 중이면 두 번째 인스턴스는 기록하지 않음
+        first, second = TickLog(directory, fsync='none'), TickLog(directory, fsync='none')
+        first.append_source('okx_eth_usdt', 3000.0, timestamp=now + 1)
+        second.append_source('okx_eth_usdt', 3001.0, timestamp=now + 2)
+        first.close()
+        second.close()
+        assert [record[3] for record in TickLog(directory).read(since=now)] == [3000.0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 겹친 세그먼트(시간이 되돌아가는 레코드)는 복원 시 건너뜀
+        now = time.time()
+        for offset in (0.0, 0.25):
+            log = TickLog(directory, fsync='none')
+            for i in range(10):
+                log.append_oracle({'median_price': 4_200_000.0, 'usdt_krw_original': 1400.0},
+                                  {'upbit_eth_krw': None, 'upbit_usdt_krw': None},
+                                  timestamp=now - 10 + offset + i)
+            log.close()
+        history = ColumnarRingBuffer(('timestamps', 'median_prices', 'upbit_eth_krw', 'upbit_usdt_krw'), 100)
+        stats = restore_from_tick_log(TickLog(directory), Oracle(), history, RollupHistory(), history_seconds=60, now=now)
+        timestamps = history.copy_columns(0, len(history))['timestamps']
+        assert stats['skipped_records'] == 9 and all(a < b for a, b in zip(timestamps, timestamps[1:])), stats
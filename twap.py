@@ -0,0 +1,149 @@
+"""
+증분 TWAP 계산 모듈
+가격이 추가/제거될 때 시간 가중 합계를 누적하여 TWAP을 O(1)로 계산합니다.
+"""
+from collections import deque
+from typing import Optional, Iterable, Tuple
+
+
+def calculate_twap_full_scan(history: Iterable[Tuple[float, float]], now: float) -> Optional[float]:
+    """
+    히스토리 전체를 순회하는 TWAP 계산 (기준 구현)
+    첫 번째 데이터는 다음 데이터까지의 간격, 중간 데이터는 양쪽 간격의 평균,
+    마지막 데이터는 현재 시간까지의 간격을 가중치로 사용합니다.
+    """
+    history = list(history)
+    if not history:
+        return None
+
+    if len(history) == 1:
+        return history[0][1]
+
+    total_weight = 0
+    weighted_sum = 0
+
+    for i, (timestamp, price) in enumerate(history):
+        if i == 0:
+            weight = history[1][0] - timestamp
+        elif i == len(history) - 1:
+            weight = now - timestamp
+        else:
+            prev_time = history[i-1][0]
+            next_time = history[i+1][0]
+            weight = (timestamp - prev_time + next_time - timestamp) / 2
+
+        weighted_sum += price * weight
+        total_weight += weight
+
+    return weighted_sum / total_weight if total_weight > 0 else None
+
+
+class IncrementalTWAP:
+    """
+    증분 TWAP 클래스
+
+    calculate_twap_full_scan의 가중치는 인접 구간의 사다리꼴 합으로 다시 쓸 수 있습니다.
+        가중합 = Σ 구간(p_j + p_j+1)/2 * g_j + p_0 * g_0/2 - p_n-1 * g_n-2/2 + p_n-1 * (now - t_n-1)
+        총가중치 = (t_n-1 - t_0) + g_0/2 - g_n-2/2 + (now - t_n-1)
+    (g_j = t_j+1 - t_j)
+    구간 사다리꼴 합만 누적해 두면 양 끝 보정항은 상수 시간에 계산됩니다.
+    """
+
+    # 누적 오차 방지를 위해 이 횟수만큼 제거되면 합계를 다시 계산 (분할 상환 O(1))
+    RESYNC_EVICTIONS = 100000
+
+    def __init__(self):
+        self.history = deque()  # [(timestamp, price), ...]
+        self._trapezoid_sum = 0.0  # Σ (p_j + p_j+1)/2 * g_j
+        self._evictions_since_resync = 0
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def append(self, timestamp: float, price: float):
+        """가격 추가"""
+        if self.history:
+            prev_timestamp, prev_price = self.history[-1]
+            self._trapezoid_sum += (prev_price + price) / 2 * (timestamp - prev_timestamp)
+        self.history.append((timestamp, price))
+
+    def evict_before(self, cutoff_time: float):
+        """cutoff_time보다 오래된 데이터 제거"""
+        history = self.history
+        while history and history[0][0] < cutoff_time:
+            timestamp, price = history.popleft()
+            if history:
+                next_timestamp, next_price = history[0]
+                self._trapezoid_sum -= (price + next_price) / 2 * (next_timestamp - timestamp)
+            else:
+                self._trapezoid_sum = 0.0
+            self._evictions_since_resync += 1
+
+        if self._evictions_since_resync >= self.RESYNC_EVICTIONS:
+            self._resync()
+
+    def clear(self):
+        """모든 데이터 제거"""
+        self.history.clear()
+        self._trapezoid_sum = 0.0
+        self._evictions_since_resync = 0
+
+    def _resync(self):
+        """누적 합계를 처음부터 다시 계산"""
+        total = 0.0
+        prev = None
+        for timestamp, price in self.history:
+            if prev is not None:
+                total += (prev[1] + price) / 2 * (timestamp - prev[0])
+            prev = (timestamp, price)
+        self._trapezoid_sum = total
+        self._evictions_since_resync = 0
+
+    def value(self, now: float) -> Optional[float]:
+        """현재 시간 기준 TWAP (calculate_twap_full_scan과 동일한 결과)"""
+        history = self.history
+        if not history:
+            return None
+
+        if len(history) == 1:
+            return history[0][1]
+
+        first_timestamp, first_price = history[0]
+        second_timestamp = history[1][0]
+        prev_last_timestamp = history[-2][0]
+        last_timestamp, last_price = history[-1]
+
+        first_gap = second_timestamp - first_timestamp
+        last_gap = last_timestamp - prev_last_timestamp
+        tail = now - last_timestamp
+
+        weighted_sum = (self._trapezoid_sum + first_price * first_gap / 2
+                        - last_price * last_gap / 2 + last_price * tail)
+        total_weight = (last_timestamp - first_timestamp) + first_gap / 2 - last_gap / 2 + tail
+
+        return weighted_sum / total_weight if total_weight > 0 else None
+
+
+if __name__ == '__main__':
+    # 테스트: 기준 구현과 동일한 결과인지 확인
+    import random
+
+    random.seed(7)
+    window = 300
+    twap = IncrementalTWAP()
+    timestamp = 1_700_000_000.0
+    max_error = 0.0
+
+    for step in range(20000):
+        timestamp += random.uniform(0.05, 1.5)
+        price = 1300 + random.gauss(0, 5)
+        twap.append(timestamp, price)
+        twap.evict_before(timestamp - window)
+
+        now = timestamp + random.uniform(0, 0.01)
+        expected = calculate_twap_full_scan(twap.history, now)
+        actual = twap.value(now)
+        max_error = max(max_error, abs(expected - actual) / expected)
+
+    print(f"포인트 {len(twap)}개, 최대 상대 오차: {max_error:.2e}")
+    assert max_error < 1e-9